@@ -39,11 +39,37 @@ SOFTWARE.
 #include <time.h>
 #include "vector.c"
 
+#if defined(_MSC_VER)
+#include <intrin.h>
+#define EC_RESTRICT __restrict
+#else
+#define EC_RESTRICT __restrict__
+#endif
+
+// SSE2 / AVX2 kernels are only available on x86 and x86_64 processors
+#if defined(__x86_64__) || defined(__i386__) || defined(_M_X64) || defined(_M_IX86)
+#define EC_X86 1
+#include <immintrin.h>
+#endif
+
+#if defined(EC_X86) && (defined(__GNUC__) || defined(__clang__))
+#define EC_TARGET_SSE2 __attribute__((target("sse2")))
+#define EC_TARGET_AVX2 __attribute__((target("avx2")))
+#else
+#define EC_TARGET_SSE2
+#define EC_TARGET_AVX2
+#endif
+
 #define TRY do{ jmp_buf ex_buf__; if( !setjmp(ex_buf__) ){
 #define CATCH } else {
 #define ETRY } }while(0)
 #define THROW longjmp(ex_buf__, 1)
 
+// Status codes returned by collision_status
+#define EC_OK            0      // the pair can be solved
+#define EC_INVALID_MASS  1      // m1 + m2 <= 0 (or not a number)
+#define EC_COINCIDENT    2      // both centres are identical, the contact normal is undefined
+
 
 /*
   Use structure <collider_object> to reference colliding objects
@@ -68,6 +94,27 @@ struct collision_vectors
  struct vector2d v21;   // object2 ---
 };
 
+
+/*
+ Use the structure <soa_pairs> to solve n pairs of objects with a single call (structure
+ of arrays). Each component is a contiguous array of n floats, the pair i is described by
+ (v1x[i], v1y[i], m1[i], x1x[i], x1y[i]) and (v2x[i], v2y[i], m2[i], x2x[i], x2y[i]).
+ The resultant vectors are written into v12x, v12y (object1) and v21x, v21y (object2).
+*/
+struct soa_pairs
+{
+  int n;                                    // number of pairs
+  const float *v1x, *v1y, *v2x, *v2y;       // objects velocities
+  const float *m1, *m2;                     // objects masses in kg
+  const float *x1x, *x1y, *x2x, *x2y;       // objects centres
+  float *v12x, *v12y, *v21x, *v21y;         // resultant vectors after contact
+  unsigned char *valid;                     // 1 if the pair is solved, 0 if invalid (can be NULL)
+};
+
+
+// Evaluation mode of the trigonometric method, see set_trig_free
+static int trig_free = 0;
+
  
 // --------------------------------------- INTERFACE --------------------------------------------------
 // STRUCTURES 
@@ -89,6 +136,13 @@ struct vector2d v21_vector_components(float v1, float v2, float theta1, float th
 // determine object 1 and object 2 directions and velocities after contact. 
 struct collision_vectors momentum_t(struct collider_object obj1, struct collider_object obj2);
 
+// same equations than momentum_t evaluated with dot & cross products (no trigonometric functions)
+struct collision_vectors momentum_t_projection(struct collider_object obj1, struct collider_object obj2);
+
+// select the evaluation mode of momentum_t & momentum_t_soa (1 projection, 0 trigonometric functions)
+void set_trig_free(int enable);
+int get_trig_free(void);
+
 // ------------------------------------- ANGLE FREE VERSION --------------------------------------
 // Determine object1 vector direction and velocity after impact.
 struct vector2d v1_vector_components(struct vector2d v1, struct vector2d v2, float m1, float m2, 
@@ -106,8 +160,52 @@ struct collision_vectors momentum_angle_free(register float v1_x, register float
 // Equivalent to momentum_angle_free method (using structural objects)
 struct collision_vectors momentum_angle_free1(struct collider_object obj1, struct collider_object obj2);
 
+// ------------------------------------- STRUCTURE OF ARRAYS (BATCH) ----------------------------
+struct soa_pairs;
+
+// Angle free method for n pairs, plain C loop (auto-vectorized by the compiler).
+void momentum_angle_free_soa_c(const struct soa_pairs *p);
+
+// Angle free method for n pairs, SSE2 intrinsics (4 pairs per iteration).
+void momentum_angle_free_soa_sse2(const struct soa_pairs *p);
+
+// Angle free method for n pairs, AVX2 intrinsics (8 pairs per iteration).
+void momentum_angle_free_soa_avx2(const struct soa_pairs *p);
+
+// Trigonometric method for n pairs, plain C loop (fill p->valid if not NULL).
+void momentum_t_soa_c(const struct soa_pairs *p);
+
+// Trigonometric method for n pairs evaluated with dot & cross products
+void momentum_t_soa_projection(const struct soa_pairs *p);
+
+// Select the fastest angle free kernel for the host CPU, return the kernel name.
+const char * soa_init(void);
+
+// Angle free method for n pairs, use the kernel selected by soa_init (fill p->valid if not NULL).
+void momentum_angle_free_soa(const struct soa_pairs *p);
+
+// Trigonometric method for n pairs.
+void momentum_t_soa(const struct soa_pairs *p);
+
+// ------------------------------------- STATUS ---------------------------------------------------
+// Return EC_OK when the pair can be solved, otherwise the reason (EC_INVALID_MASS, EC_COINCIDENT)
+int collision_status(float m1, float m2, float x1_x, float x1_y, float x2_x, float x2_y);
+
 // ------------------------------------- IMPLEMENTATION -----------------------------------------
 
+/*
+ Check a pair of objects before solving the collision (no assert, no setjmp).
+ Invalid pairs are not solved by the functions momentum_t, momentum_angle_free,
+ momentum_angle_free1 and the batch kernels, the objects keep their velocities.
+*/
+int collision_status(float m1, float m2, float x1_x, float x1_y, float x2_x, float x2_y)
+{
+  if (!(m1 + m2 > 0.0f)) return EC_INVALID_MASS;
+  if (x1_x == x2_x && x1_y == x2_y) return EC_COINCIDENT;
+  return EC_OK;
+}
+
+
 // Return the contact angle φ [π, -π] in radians between obj1 and obj2 (float)
 float contact_angle(struct vector2d object1, struct vector2d object2)
 {
@@ -121,22 +219,16 @@ float contact_angle(struct vector2d object1, struct vector2d object2)
 
 
 // Return theta angle Θ in radians [π, -π] (float)
+// A zero length vector (object at rest) has no direction, theta is 0.0
 float theta_angle(struct vector2d vector)
 { 
   float theta = 0.0f;
   float length = vlength(&vector);
-  assert (length!=0.0);
-  TRY
-  {
-    theta = (float)acos(vector.x/length);
-    // THROW;
+  if (length == 0.0f) {
+    return 0.0f;
   }
-  CATCH
-  {
-    printf("\nDivision by zero, vector length cannot be zero ");
-    return -1;
-  }
-  ETRY;
+  // clamp the cosine, rounding errors can push x/length slightly outside [-1, 1]
+  theta = (float)acos(fmin(fmax(vector.x / length, -1.0), 1.0));
   if (vector.y<0.0) {
     theta *= -1.0f;
   }
@@ -177,8 +269,7 @@ struct vector2d v12_vector_components(float v1, float v2, float theta1, float th
   // float inv_mass = (float)(1.0f/(m1+m2));
   float theta1_phi = theta1-phi;
 
-  assert ((v1>= 0.0) && (v2>= 0.0));    // |v1| and |v2| magnitude must be >= 0
-  assert ((m1+m2)>0.0);      			// m1 + m2 must be > 0 to avoid a div by zero.
+  // m1 + m2 must be > 0 (see collision_status)
 
   struct vector2d v12;
   float numerator=v1*(float)cos(theta1_phi)*(m1-m2)+(float)(2.0f*m2*v2)*(float)cos(theta2-phi);
@@ -218,8 +309,7 @@ struct vector2d v21_vector_components(float v1, float v2,
   float inv_mass = (float)(1.0f/(m1+m2));
   float theta2_phi = theta2-phi;
 
-  assert ((v1>= 0.0) && (v2>= 0.0));    // |v1| and |v2| magnitude must be >= 0
-  assert (m1+m2>0.0);      			    // m1 + m2 must be > 0 to avoid a div by zero.
+  // m1 + m2 must be > 0 (see collision_status)
 
   struct vector2d v21;
   float numerator=v2*(float)cos(theta2_phi)*(m2-m1)+(float)(2.0f*m1*v1)*(float)cos(theta1-phi);
@@ -257,6 +347,13 @@ struct collision_vectors momentum_t(struct collider_object obj1, struct collider
 {
   struct vector2d v12, v21;
   struct collision_vectors vec;
+  if (trig_free) return momentum_t_projection(obj1, obj2);
+  if (collision_status(obj1.mass, obj2.mass, obj1.centre.x, obj1.centre.y,
+      obj2.centre.x, obj2.centre.y) != EC_OK) {
+    vec.v12 = obj1.vector;
+    vec.v21 = obj2.vector;
+    return vec;
+  }
   float phi = contact_angle(obj1.centre, obj2.centre);
   float theta1 = theta_angle(obj1.vector);
   float theta2 = theta_angle(obj2.vector);
@@ -269,6 +366,58 @@ struct collision_vectors momentum_t(struct collider_object obj1, struct collider
   return vec;
 }
 
+/*
+********************************************************************************************
+  Trigonometric method evaluated without trigonometric functions (same results than momentum_t)
+********************************************************************************************
+//    With n = (cos(phi), sin(phi)) the unit vector from centre 1 to centre 2 and 
+//    vi = |vi|.(cos(theta_i), sin(theta_i)) :
+//      |vi|.cos(theta_i - phi) = vi . n   (dot product)
+//      |vi|.sin(theta_i - phi) = n x vi   (cross product)
+//      cos(phi + pi/2) = -sin(phi) and sin(phi + pi/2) = cos(phi)
+//    atan2, acos, cos and sin are replaced by a single square root.
+****************************************************************
+*/
+struct collision_vectors momentum_t_projection(struct collider_object obj1, struct collider_object obj2)
+{
+  struct collision_vectors vec;
+  float nx, ny, d, p1, p2, q1, q2, numerator, inv_mass;
+  if (collision_status(obj1.mass, obj2.mass, obj1.centre.x, obj1.centre.y,
+      obj2.centre.x, obj2.centre.y) != EC_OK) {
+    vec.v12 = obj1.vector;
+    vec.v21 = obj2.vector;
+    return vec;
+  }
+  nx = obj2.centre.x - obj1.centre.x;
+  ny = obj2.centre.y - obj1.centre.y;
+  d = (float)sqrt(nx * nx + ny * ny);
+  nx = nx / d;
+  ny = ny / d;
+  p1 = obj1.vector.x * nx + obj1.vector.y * ny;
+  p2 = obj2.vector.x * nx + obj2.vector.y * ny;
+  q1 = nx * obj1.vector.y - ny * obj1.vector.x;
+  q2 = nx * obj2.vector.y - ny * obj2.vector.x;
+  inv_mass = 1.0f / (obj1.mass + obj2.mass);
+
+  numerator = p1 * (obj1.mass - obj2.mass) + 2.0f * obj2.mass * p2;
+  vecinit(&vec.v12, numerator * nx * inv_mass - q1 * ny, numerator * ny * inv_mass + q1 * nx);
+  numerator = p2 * (obj2.mass - obj1.mass) + 2.0f * obj1.mass * p1;
+  vecinit(&vec.v21, numerator * nx * inv_mass - q2 * ny, numerator * ny * inv_mass + q2 * nx);
+  return vec;
+}
+
+
+void set_trig_free(int enable)
+{
+  trig_free = enable != 0;
+}
+
+
+int get_trig_free(void)
+{
+  return trig_free;
+}
+
 // ------------------------- ANGLE FREE METHOD ---------------------------------------------
 
 
@@ -304,8 +453,7 @@ struct collision_vectors momentum_t(struct collider_object obj1, struct collider
 struct vector2d v1_vector_components(struct vector2d v1, struct vector2d v2, float m1, float m2,
                      struct vector2d x1, struct vector2d x2)
 {
-	assert ((m1 + m2) > 0.0);		            // check the sum, should be != 0 to avoid division by zero
-	assert ((x1.x != x2.x) && (x1.y != x2.y));  // object1 and object2 centres coordinates must be different
+	// m1 + m2 must be > 0 and the centres x1 & x2 must be different (see collision_status)
 	float mass = (float)(2.0f * m2 / (m1 + m2)); 	        // mass coefficient in the equation
 	struct vector2d v12, x12;		            // 2d vector declaration v12 & x12
 	// vector initialization 
@@ -355,8 +503,7 @@ struct vector2d v1_vector_components(struct vector2d v1, struct vector2d v2, flo
 struct vector2d v2_vector_components(struct vector2d v1, struct vector2d v2, float m1, float m2, 
                      			struct vector2d x1, struct vector2d x2)
 {
-	assert ((m1 + m2) > 0.0);		            // check the sum, should be != 0 to avoid division by zero
-	assert ((x1.x != x2.x) && (x1.y != x2.y));  // object1 and object2 centres coordinates must be different
+	// m1 + m2 must be > 0 and the centres x1 & x2 must be different (see collision_status)
 	float mass = (float)(2.0f * m1 / (m1 + m2)); 	        // mass coefficient in the equation
 	struct vector2d v21, x21;		            // 2d vector declaration v21 & x21
 	// vector initialization 
@@ -401,6 +548,11 @@ struct collision_vectors momentum_angle_free(register float v1_x, register float
 	struct vector2d v1, v2, x1, x2, v12, v21;
 	vecinit(&v1, v1_x, v1_y);
 	vecinit(&v2, v2_x, v2_y);
+	if (collision_status(m1, m2, x1_x, x1_y, x2_x, x2_y) != EC_OK) {
+	  vec.v12 = v1;
+	  vec.v21 = v2;
+	  return vec;
+	}
 	vecinit(&x1, x1_x, x1_y);
 	vecinit(&x2, x2_x, x2_y);
     v12 = v1_vector_components(v1, v2, m1, m2, x1, x2);
@@ -419,6 +571,12 @@ struct collision_vectors momentum_angle_free1(struct collider_object obj1, struc
 //	vecinit(&v12, 0.0, 0.0);
 //	vecinit(&v21, 0.0, 0.0);
 	struct collision_vectors vec; 
+	if (collision_status(obj1.mass, obj2.mass, obj1.centre.x, obj1.centre.y,
+	    obj2.centre.x, obj2.centre.y) != EC_OK) {
+	  vec.v12 = obj1.vector;
+	  vec.v21 = obj2.vector;
+	  return vec;
+	}
     v12 = v1_vector_components(obj1.vector, obj2.vector, obj1.mass, obj2.mass, obj1.centre, obj2.centre);
     v21 = v2_vector_components(obj1.vector, obj2.vector, obj1.mass, obj2.mass, obj1.centre, obj2.centre);
 	vec.v12 = v12;
@@ -428,6 +586,334 @@ struct collision_vectors momentum_angle_free1(struct collider_object obj1, struc
 
 
 
+// ------------------------- STRUCTURE OF ARRAYS (BATCH) ------------------------------------
+/*
+    The batch kernels below solve n pairs with the angle free equations written on scalar
+    components (no struct passed by value, no call to subcomponents or scale_inplace).
+    For each pair :
+      x12 = x1 - x2, v12 = v1 - v2, k = <v12, x12> / |x12|^2
+      v1' = v1 - (2.m2 / (m1 + m2)) * k * x12
+      v2' = v2 + (2.m1 / (m1 + m2)) * k * x12
+    When both centres are identical (|x12| = 0) the contact normal is undefined, the pair
+    is invalid as well when m1 + m2 <= 0. For invalid pairs k is set to zero and the
+    velocities are returned unchanged (no branch, no division by zero).
+*/
+
+void momentum_angle_free_soa_c(const struct soa_pairs *p)
+{
+  const float * EC_RESTRICT v1x = p->v1x;
+  const float * EC_RESTRICT v1y = p->v1y;
+  const float * EC_RESTRICT v2x = p->v2x;
+  const float * EC_RESTRICT v2y = p->v2y;
+  const float * EC_RESTRICT m1  = p->m1;
+  const float * EC_RESTRICT m2  = p->m2;
+  const float * EC_RESTRICT x1x = p->x1x;
+  const float * EC_RESTRICT x1y = p->x1y;
+  const float * EC_RESTRICT x2x = p->x2x;
+  const float * EC_RESTRICT x2y = p->x2y;
+  float * EC_RESTRICT v12x = p->v12x;
+  float * EC_RESTRICT v12y = p->v12y;
+  float * EC_RESTRICT v21x = p->v21x;
+  float * EC_RESTRICT v21y = p->v21y;
+  int i;
+
+  for (i = 0; i < p->n; i++)
+  {
+    float dx = x1x[i] - x2x[i];
+    float dy = x1y[i] - x2y[i];
+    float d2 = dx * dx + dy * dy;
+    float d  = (v1x[i] - v2x[i]) * dx + (v1y[i] - v2y[i]) * dy;
+    float den = d2 * (m1[i] + m2[i]);
+    float k  = den > 0.0f ? 2.0f * d / den : 0.0f;
+    float k1 = k * m2[i];
+    float k2 = k * m1[i];
+    v12x[i] = v1x[i] - k1 * dx;
+    v12y[i] = v1y[i] - k1 * dy;
+    v21x[i] = v2x[i] + k2 * dx;
+    v21y[i] = v2y[i] + k2 * dy;
+  }
+}
+
+
+// Solve the pairs [start, n[ with the plain C loop (remaining pairs of the SIMD kernels)
+static void momentum_angle_free_soa_tail(const struct soa_pairs *p, int start)
+{
+  struct soa_pairs tail;
+  if (start >= p->n) return;
+  tail.n = p->n - start;
+  tail.v1x = p->v1x + start; tail.v1y = p->v1y + start;
+  tail.v2x = p->v2x + start; tail.v2y = p->v2y + start;
+  tail.m1  = p->m1  + start; tail.m2  = p->m2  + start;
+  tail.x1x = p->x1x + start; tail.x1y = p->x1y + start;
+  tail.x2x = p->x2x + start; tail.x2y = p->x2y + start;
+  tail.v12x = p->v12x + start; tail.v12y = p->v12y + start;
+  tail.v21x = p->v21x + start; tail.v21y = p->v21y + start;
+  tail.valid = NULL;
+  momentum_angle_free_soa_c(&tail);
+}
+
+
+#ifdef EC_X86
+
+EC_TARGET_SSE2 void momentum_angle_free_soa_sse2(const struct soa_pairs *p)
+{
+  const __m128 two  = _mm_set1_ps(2.0f);
+  const __m128 zero = _mm_setzero_ps();
+  int i;
+
+  for (i = 0; i + 4 <= p->n; i += 4)
+  {
+    __m128 m1 = _mm_loadu_ps(p->m1 + i);
+    __m128 m2 = _mm_loadu_ps(p->m2 + i);
+    __m128 v1x = _mm_loadu_ps(p->v1x + i);
+    __m128 v1y = _mm_loadu_ps(p->v1y + i);
+    __m128 v2x = _mm_loadu_ps(p->v2x + i);
+    __m128 v2y = _mm_loadu_ps(p->v2y + i);
+    __m128 dx = _mm_sub_ps(_mm_loadu_ps(p->x1x + i), _mm_loadu_ps(p->x2x + i));
+    __m128 dy = _mm_sub_ps(_mm_loadu_ps(p->x1y + i), _mm_loadu_ps(p->x2y + i));
+    __m128 d2 = _mm_add_ps(_mm_mul_ps(dx, dx), _mm_mul_ps(dy, dy));
+    __m128 d  = _mm_add_ps(_mm_mul_ps(_mm_sub_ps(v1x, v2x), dx),
+                           _mm_mul_ps(_mm_sub_ps(v1y, v2y), dy));
+    // k = 2.d / (d2.(m1 + m2)), invalid lanes (d2.(m1 + m2) <= 0) are masked to zero
+    __m128 den = _mm_mul_ps(d2, _mm_add_ps(m1, m2));
+    __m128 k  = _mm_and_ps(_mm_div_ps(_mm_mul_ps(two, d), den), _mm_cmpgt_ps(den, zero));
+    __m128 k1 = _mm_mul_ps(k, m2);
+    __m128 k2 = _mm_mul_ps(k, m1);
+    _mm_storeu_ps(p->v12x + i, _mm_sub_ps(v1x, _mm_mul_ps(k1, dx)));
+    _mm_storeu_ps(p->v12y + i, _mm_sub_ps(v1y, _mm_mul_ps(k1, dy)));
+    _mm_storeu_ps(p->v21x + i, _mm_add_ps(v2x, _mm_mul_ps(k2, dx)));
+    _mm_storeu_ps(p->v21y + i, _mm_add_ps(v2y, _mm_mul_ps(k2, dy)));
+  }
+  momentum_angle_free_soa_tail(p, i);
+}
+
+
+EC_TARGET_AVX2 void momentum_angle_free_soa_avx2(const struct soa_pairs *p)
+{
+  const __m256 two  = _mm256_set1_ps(2.0f);
+  const __m256 zero = _mm256_setzero_ps();
+  int i;
+
+  for (i = 0; i + 8 <= p->n; i += 8)
+  {
+    __m256 m1 = _mm256_loadu_ps(p->m1 + i);
+    __m256 m2 = _mm256_loadu_ps(p->m2 + i);
+    __m256 v1x = _mm256_loadu_ps(p->v1x + i);
+    __m256 v1y = _mm256_loadu_ps(p->v1y + i);
+    __m256 v2x = _mm256_loadu_ps(p->v2x + i);
+    __m256 v2y = _mm256_loadu_ps(p->v2y + i);
+    __m256 dx = _mm256_sub_ps(_mm256_loadu_ps(p->x1x + i), _mm256_loadu_ps(p->x2x + i));
+    __m256 dy = _mm256_sub_ps(_mm256_loadu_ps(p->x1y + i), _mm256_loadu_ps(p->x2y + i));
+    __m256 d2 = _mm256_add_ps(_mm256_mul_ps(dx, dx), _mm256_mul_ps(dy, dy));
+    __m256 d  = _mm256_add_ps(_mm256_mul_ps(_mm256_sub_ps(v1x, v2x), dx),
+                              _mm256_mul_ps(_mm256_sub_ps(v1y, v2y), dy));
+    // k = 2.d / (d2.(m1 + m2)), invalid lanes (d2.(m1 + m2) <= 0) are masked to zero
+    __m256 den = _mm256_mul_ps(d2, _mm256_add_ps(m1, m2));
+    __m256 k  = _mm256_and_ps(_mm256_div_ps(_mm256_mul_ps(two, d), den),
+                              _mm256_cmp_ps(den, zero, _CMP_GT_OQ));
+    __m256 k1 = _mm256_mul_ps(k, m2);
+    __m256 k2 = _mm256_mul_ps(k, m1);
+    _mm256_storeu_ps(p->v12x + i, _mm256_sub_ps(v1x, _mm256_mul_ps(k1, dx)));
+    _mm256_storeu_ps(p->v12y + i, _mm256_sub_ps(v1y, _mm256_mul_ps(k1, dy)));
+    _mm256_storeu_ps(p->v21x + i, _mm256_add_ps(v2x, _mm256_mul_ps(k2, dx)));
+    _mm256_storeu_ps(p->v21y + i, _mm256_add_ps(v2y, _mm256_mul_ps(k2, dy)));
+  }
+  momentum_angle_free_soa_tail(p, i);
+}
+
+
+// Return 1 when the processor and the operating system support the AVX2 instructions
+static int cpu_has_avx2(void)
+{
+#if defined(_MSC_VER)
+  int info[4];
+  __cpuid(info, 0);
+  if (info[0] < 7) return 0;
+  __cpuid(info, 1);
+  // OSXSAVE & AVX, the OS must save the YMM registers
+  if ((info[2] & (1 << 27)) == 0 || (info[2] & (1 << 28)) == 0) return 0;
+  if ((_xgetbv(0) & 6) != 6) return 0;
+  __cpuidex(info, 7, 0);
+  return (info[1] & (1 << 5)) != 0;
+#elif defined(__GNUC__) || defined(__clang__)
+  __builtin_cpu_init();
+  return __builtin_cpu_supports("avx2");
+#else
+  return 0;
+#endif
+}
+
+
+// Return 1 when the processor supports the SSE2 instructions
+static int cpu_has_sse2(void)
+{
+#if defined(_M_X64) || defined(__x86_64__)
+  return 1;                                 // SSE2 is part of the x86_64 instruction set
+#elif defined(_MSC_VER)
+  int info[4];
+  __cpuid(info, 1);
+  return (info[3] & (1 << 26)) != 0;
+#elif defined(__GNUC__) || defined(__clang__)
+  __builtin_cpu_init();
+  return __builtin_cpu_supports("sse2");
+#else
+  return 0;
+#endif
+}
+
+#else
+
+// Other processors, the SIMD kernels fallback to the plain C loop
+void momentum_angle_free_soa_sse2(const struct soa_pairs *p) { momentum_angle_free_soa_c(p); }
+void momentum_angle_free_soa_avx2(const struct soa_pairs *p) { momentum_angle_free_soa_c(p); }
+static int cpu_has_avx2(void) { return 0; }
+static int cpu_has_sse2(void) { return 0; }
+
+#endif
+
+
+/*
+    Trigonometric method for n pairs (same equations than momentum_t).
+    Invalid pairs (see collision_status) keep their velocities.
+    atan2, acos, cos and sin are not available as SSE/AVX instructions, this loop
+    is only vectorized by compilers providing a vector math library (e.g MSVC /fp:fast).
+*/
+void momentum_t_soa_c(const struct soa_pairs *p)
+{
+  int i;
+
+  for (i = 0; i < p->n; i++)
+  {
+    float v1x = p->v1x[i], v1y = p->v1y[i];
+    float v2x = p->v2x[i], v2y = p->v2y[i];
+    float m1 = p->m1[i], m2 = p->m2[i];
+    float v1 = (float)sqrt(v1x * v1x + v1y * v1y);
+    float v2 = (float)sqrt(v2x * v2x + v2y * v2y);
+    float phi = (float)atan2(p->x2y[i] - p->x1y[i], p->x2x[i] - p->x1x[i]);
+    float theta1 = v1 > 0.0f ? (float)acos(fmin(fmax(v1x / v1, -1.0f), 1.0f)) : 0.0f;
+    float theta2 = v2 > 0.0f ? (float)acos(fmin(fmax(v2x / v2, -1.0f), 1.0f)) : 0.0f;
+    float cos_phi, sin_phi, numerator, inv_mass;
+    int status = collision_status(m1, m2, p->x1x[i], p->x1y[i], p->x2x[i], p->x2y[i]);
+
+    if (p->valid != NULL) p->valid[i] = (unsigned char)(status == EC_OK);
+    if (status != EC_OK)
+    {
+      p->v12x[i] = v1x; p->v12y[i] = v1y;
+      p->v21x[i] = v2x; p->v21y[i] = v2y;
+      continue;
+    }
+    if (phi > 0.0f) phi = phi - 2.0f * (float)M_PI;
+    if (v1y < 0.0f) theta1 = -theta1;
+    if (v2y < 0.0f) theta2 = -theta2;
+
+    cos_phi = (float)cos(phi);
+    sin_phi = (float)sin(phi);
+    inv_mass = 1.0f / (m1 + m2);
+
+    // cos(phi + pi/2) = -sin(phi) & sin(phi + pi/2) = cos(phi)
+    numerator = v1 * (float)cos(theta1 - phi) * (m1 - m2) + 2.0f * m2 * v2 * (float)cos(theta2 - phi);
+    p->v12x[i] = numerator * cos_phi * inv_mass - v1 * (float)sin(theta1 - phi) * sin_phi;
+    p->v12y[i] = numerator * sin_phi * inv_mass + v1 * (float)sin(theta1 - phi) * cos_phi;
+
+    numerator = v2 * (float)cos(theta2 - phi) * (m2 - m1) + 2.0f * m1 * v1 * (float)cos(theta1 - phi);
+    p->v21x[i] = numerator * cos_phi * inv_mass - v2 * (float)sin(theta2 - phi) * sin_phi;
+    p->v21y[i] = numerator * sin_phi * inv_mass + v2 * (float)sin(theta2 - phi) * cos_phi;
+  }
+}
+
+
+/*
+    Trigonometric method for n pairs evaluated with dot & cross products (same equations 
+    than momentum_t_projection). Without trigonometric functions the loop can be vectorized 
+    by the compiler.
+*/
+void momentum_t_soa_projection(const struct soa_pairs *p)
+{
+  int i;
+
+  for (i = 0; i < p->n; i++)
+  {
+    float v1x = p->v1x[i], v1y = p->v1y[i];
+    float v2x = p->v2x[i], v2y = p->v2y[i];
+    float m1 = p->m1[i], m2 = p->m2[i];
+    float nx = p->x2x[i] - p->x1x[i];
+    float ny = p->x2y[i] - p->x1y[i];
+    float d, p1, p2, q1, q2, numerator, inv_mass;
+    int status = collision_status(m1, m2, p->x1x[i], p->x1y[i], p->x2x[i], p->x2y[i]);
+
+    if (p->valid != NULL) p->valid[i] = (unsigned char)(status == EC_OK);
+    if (status != EC_OK)
+    {
+      p->v12x[i] = v1x; p->v12y[i] = v1y;
+      p->v21x[i] = v2x; p->v21y[i] = v2y;
+      continue;
+    }
+    d = (float)sqrt(nx * nx + ny * ny);
+    nx = nx / d;
+    ny = ny / d;
+    p1 = v1x * nx + v1y * ny;
+    p2 = v2x * nx + v2y * ny;
+    q1 = nx * v1y - ny * v1x;
+    q2 = nx * v2y - ny * v2x;
+    inv_mass = 1.0f / (m1 + m2);
+
+    numerator = p1 * (m1 - m2) + 2.0f * m2 * p2;
+    p->v12x[i] = numerator * nx * inv_mass - q1 * ny;
+    p->v12y[i] = numerator * ny * inv_mass + q1 * nx;
+
+    numerator = p2 * (m2 - m1) + 2.0f * m1 * p1;
+    p->v21x[i] = numerator * nx * inv_mass - q2 * ny;
+    p->v21y[i] = numerator * ny * inv_mass + q2 * nx;
+  }
+}
+
+
+// Angle free kernel selected at runtime (default plain C loop until soa_init is called)
+static void (*soa_angle_free_kernel)(const struct soa_pairs *p) = momentum_angle_free_soa_c;
+
+
+// Select the fastest angle free kernel for the host CPU and return its name ("avx2", "sse2", "c")
+const char * soa_init(void)
+{
+  if (cpu_has_avx2())
+  {
+    soa_angle_free_kernel = momentum_angle_free_soa_avx2;
+    return "avx2";
+  }
+  if (cpu_has_sse2())
+  {
+    soa_angle_free_kernel = momentum_angle_free_soa_sse2;
+    return "sse2";
+  }
+  soa_angle_free_kernel = momentum_angle_free_soa_c;
+  return "c";
+}
+
+
+void momentum_angle_free_soa(const struct soa_pairs *p)
+{
+  int i;
+  float dx, dy;
+  soa_angle_free_kernel(p);
+  // validity mask, same test than the kernels (d2.(m1 + m2) > 0)
+  if (p->valid == NULL) return;
+  for (i = 0; i < p->n; i++)
+  {
+    dx = p->x1x[i] - p->x2x[i];
+    dy = p->x1y[i] - p->x2y[i];
+    p->valid[i] = (unsigned char)((dx * dx + dy * dy) * (p->m1[i] + p->m2[i]) > 0.0f);
+  }
+}
+
+
+void momentum_t_soa(const struct soa_pairs *p)
+{
+  if (trig_free) momentum_t_soa_projection(p);
+  else momentum_t_soa_c(p);
+}
+
+
+
 int main(){
 
 return 0;
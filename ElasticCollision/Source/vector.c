@@ -36,6 +36,7 @@ SOFTWARE.
 #include <ctype.h>
 #include <setjmp.h>
 #include <time.h>
+#include "vector.h"
 
 
 
@@ -54,16 +55,7 @@ SOFTWARE.
       __auto_type _b = (b); \
     _a > _b ? _a : _b; })
 
-/*
-2d Vector structure with components x & y (floats)
-Use the structure vector2d to declare vector type object
-e.g struct vector2d v-> v(x, y)
-*/
-struct vector2d
-{
-   float x;
-   float y;
-};
+// struct vector2d & struct v_struct are declared in vector.h
 
 struct rect_p
 {
@@ -72,13 +64,6 @@ struct rect_p
 };
 
 
-// PACK TO VECTORS
-struct v_struct
-{
-   struct vector2d vector1;
-   struct vector2d vector2;
-};
-
 /*
 Use this function to initialized a vector
 timing : 0.161s for 10 millions iterations.
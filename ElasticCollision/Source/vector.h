@@ -0,0 +1,56 @@
+/* C implementation
+
+MIT License
+
+Copyright (c) 2019 Yoann Berenguer
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+*/
+
+/*
+Vector structures shared by vector.c and the Cython declaration files (ec_game.pxd,
+ec_real.pxd). Other extensions cimporting ElasticCollision must add the directory
+returned by ElasticCollision.get_include() to their include_dirs.
+*/
+
+#ifndef EC_VECTOR_H
+#define EC_VECTOR_H
+
+/*
+2d Vector structure with components x & y (floats)
+Use the structure vector2d to declare vector type object
+e.g struct vector2d v-> v(x, y)
+*/
+struct vector2d
+{
+   float x;
+   float y;
+};
+
+
+// PACK TO VECTORS
+struct v_struct
+{
+   struct vector2d vector1;
+   struct vector2d vector2;
+};
+
+#endif
@@ -1,8 +1,43 @@
-from ElasticCollision.c_game import momentum_angle_free_c, momentum_trigonometry_c
-from ElasticCollision.ec_game import momentum_trigonometry, momentum_angle_free
+from ElasticCollision.c_game import momentum_angle_free_c, momentum_trigonometry_c, \
+    momentum_angle_free_c_soa, momentum_trigonometry_c_soa, momentum_angle_free_c_into, \
+    momentum_trigonometry_c_into
+from ElasticCollision.ec_game import momentum_trigonometry, momentum_angle_free, \
+    momentum_trigonometry_batch, resolve_pairs, integrate, time_of_impact, resolve_impacts, \
+    separate, momentum_trigonometry_into, momentum_trigonometry_inplace, \
+    momentum_angle_free_into, momentum_angle_free_inplace
 from ElasticCollision.ec_real import momentum_trigonometry_real,\
-    momentum_angle_free_real
+    momentum_angle_free_real, momentum_angle_free_real_batch, momentum_trigonometry_real_into, \
+    momentum_trigonometry_real_inplace, momentum_angle_free_real_into, \
+    momentum_angle_free_real_inplace, EventDriven, solve_contacts
+from ElasticCollision.ec_broadphase import SpatialHash, SweepAndPrune, \
+    LooseQuadtree, DynamicAABBTree, VerletList, HierarchicalGrid, cell_list_pairs, \
+    morton_order, strip_pairs, StripBroadphase, ContactCache
 __all__ = ["momentum_trigonometry", "momentum_angle_free",
            "momentum_trigonometry_c", "momentum_angle_free_c",
-           "momentum_angle_free_real", "momentum_trigonometry_real"]
+           "momentum_angle_free_real", "momentum_trigonometry_real",
+           "momentum_angle_free_real_batch", "momentum_trigonometry_batch",
+           "resolve_pairs", "integrate", "time_of_impact", "resolve_impacts", "separate",
+           "momentum_angle_free_c_soa", "momentum_trigonometry_c_soa",
+           "momentum_angle_free_c_into", "momentum_trigonometry_c_into",
+           "momentum_trigonometry_into", "momentum_trigonometry_inplace",
+           "momentum_angle_free_into", "momentum_angle_free_inplace",
+           "momentum_trigonometry_real_into", "momentum_trigonometry_real_inplace",
+           "momentum_angle_free_real_into", "momentum_angle_free_real_inplace", "EventDriven",
+           "solve_contacts",
+           "SpatialHash", "SweepAndPrune", "LooseQuadtree",
+           "DynamicAABBTree", "VerletList", "HierarchicalGrid", "cell_list_pairs",
+           "morton_order", "strip_pairs", "StripBroadphase", "ContactCache",
+           "get_include"]
 
+
+def get_include():
+    """
+    RETURN THE DIRECTORY CONTAINING THE C HEADERS (vector.h)
+
+    Extensions cimporting ElasticCollision.ec_game or ElasticCollision.ec_real
+    (see ec_game.pxd & ec_real.pxd) must add this directory to their include_dirs.
+
+    :return: string; absolute path of the Source directory
+    """
+    import os
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Source')
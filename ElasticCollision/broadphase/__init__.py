@@ -0,0 +1,2 @@
+"""
+"""
@@ -0,0 +1,2838 @@
+# cython: boundscheck=False, wraparound=False, nonecheck=False, cdivision=True, optimize.use_switch=True
+# encoding: utf-8
+"""
+MIT License
+
+Copyright (c) 2019 Yoann Berenguer
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+"""
+
+"""
+BROADPHASE COLLISION DETECTION
+
+Testing every body against every other body cost N * (N - 1) / 2 tests per frame.
+The classes below only test the bodies that are close to each other and return the
+pairs of overlapping circles (centre & radius) as a numpy.int32 array with shape (K, 2).
+Each row (i, j) is an index pair with i < j and the rows are sorted (i first, then j),
+the order in which a brute force loop would find them. The pairs can be passed straight
+to ec_game.resolve_pairs or used to index a list of objects.
+
+Positions are numpy arrays with shape (N, 2) (float32 or float64) and radii numpy
+arrays with shape (N, ), the radii are converted to the positions data type.
+"""
+
+# Cython is require
+try:
+    cimport cython
+
+except ImportError:
+    raise ImportError("\n<cython> library is missing on your system."
+          "\nTry: \n   C:\\pip install cython on a window command prompt.")
+
+
+import os
+
+# Numpy is require
+try:
+    import numpy
+
+except ImportError:
+    raise ImportError("\n<numpy> library is missing on your system."
+          "\nTry: \n   C:\\pip install numpy on a window command prompt.")
+
+from libc.math cimport floor, ceil
+from libc.stdlib cimport malloc, calloc, realloc, free, qsort
+from libc.string cimport memcpy
+from cython.parallel cimport prange
+
+# Floating point types accepted for the positions & radii (numpy float32 & float64 arrays)
+ctypedef fused real_t:
+    float
+    double
+
+
+# **************************** BODIES & PAIRS BUFFERS *********************************
+
+# Bodies copied from the caller arrays (structure of arrays, double precision)
+cdef struct body_table:
+    Py_ssize_t length
+    Py_ssize_t capacity
+    double * x
+    double * y
+    double * r
+    double r_max
+
+
+# Growing list of index pairs (i0, j0, i1, j1, ...)
+cdef struct pair_buffer:
+    Py_ssize_t length
+    Py_ssize_t capacity
+    int * data
+
+
+cdef int body_reserve(body_table * table, Py_ssize_t length) except -1:
+    """
+    GROW THE BODY TABLE TO HOLD AT LEAST <length> BODIES
+
+    :param table : pointer; body table
+    :param length: integer; number of bodies
+    :return: 0 or raise a MemoryError
+    """
+    cdef:
+        Py_ssize_t capacity
+        double * x
+        double * y
+        double * r
+
+    if length <= table.capacity:
+        return 0
+
+    capacity = max(length, 2 * table.capacity, 64)
+    x = <double *>realloc(table.x, capacity * sizeof(double))
+    if x == NULL:
+        raise MemoryError("\nCannot allocate the body table.")
+    table.x = x
+    y = <double *>realloc(table.y, capacity * sizeof(double))
+    if y == NULL:
+        raise MemoryError("\nCannot allocate the body table.")
+    table.y = y
+    r = <double *>realloc(table.r, capacity * sizeof(double))
+    if r == NULL:
+        raise MemoryError("\nCannot allocate the body table.")
+    table.r = r
+    table.capacity = capacity
+    return 0
+
+
+cdef void body_free(body_table * table) noexcept:
+    """
+    RELEASE THE BODY TABLE MEMORY
+
+    :param table: pointer; body table
+    :return: void
+    """
+    free(table.x)
+    free(table.y)
+    free(table.r)
+    table.x = NULL
+    table.y = NULL
+    table.r = NULL
+    table.length = 0
+    table.capacity = 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef int body_copy(body_table * table, real_t [:, ::1] pos, real_t [::1] radius) except -1:
+    """
+    COPY THE CALLER POSITIONS AND RADII INTO THE BODY TABLE
+
+    :param table : pointer; body table
+    :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+    :param radius: numpy.ndarray shape (N, ) same type; body radii
+    :return: 0 or raise an exception
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t i
+        double r_max = 0.0
+
+    if pos.shape[1] != 2:
+        raise ValueError("\nArgument pos must be an array with shape (N, 2), "
+                         "got (%s, %s) " % (pos.shape[0], pos.shape[1]))
+    if radius.shape[0] != n:
+        raise ValueError("\nArguments pos and radius must have the same length, "
+                         "got %s and %s " % (n, radius.shape[0]))
+
+    body_reserve(table, n)
+
+    with nogil:
+        for i in range(n):
+            table.x[i] = <double>pos[i, 0]
+            table.y[i] = <double>pos[i, 1]
+            table.r[i] = <double>radius[i]
+            if table.r[i] > r_max:
+                r_max = table.r[i]
+    table.length = n
+    table.r_max = r_max
+    return 0
+
+
+cdef int body_load(body_table * table, object pos, object radius) except -1:
+    """
+    LOAD THE BODIES (POSITIONS float32 OR float64, RADII CONVERTED TO THE SAME TYPE)
+
+    :param table : pointer; body table
+    :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+    :param radius: numpy.ndarray shape (N, ); body radii
+    :return: 0 or raise an exception
+    """
+    pos = numpy.asarray(pos)
+    if pos.dtype == numpy.float64:
+        return body_copy[double](
+            table, pos, numpy.ascontiguousarray(radius, dtype=numpy.float64))
+    return body_copy[float](
+        table, pos, numpy.ascontiguousarray(radius, dtype=numpy.float32))
+
+
+cdef inline int pair_push(pair_buffer * pairs, int i, int j) noexcept nogil:
+    """
+    APPEND THE PAIR (i, j) TO THE BUFFER
+
+    :param pairs: pointer; pair buffer
+    :param i    : integer; first body index
+    :param j    : integer; second body index
+    :return: 0 or -1 when the buffer cannot grow (out of memory)
+    """
+    cdef:
+        Py_ssize_t capacity
+        int * data
+
+    if pairs.length == pairs.capacity:
+        capacity = 2 * pairs.capacity if pairs.capacity > 0 else 256
+        data = <int *>realloc(pairs.data, 2 * capacity * sizeof(int))
+        if data == NULL:
+            return -1
+        pairs.data = data
+        pairs.capacity = capacity
+    pairs.data[2 * pairs.length] = i
+    pairs.data[2 * pairs.length + 1] = j
+    pairs.length += 1
+    return 0
+
+
+cdef int pair_compare(const void * a, const void * b) noexcept nogil:
+    """
+    ORDER TWO PAIRS (FIRST INDEX, THEN SECOND INDEX), qsort comparison function
+    """
+    cdef:
+        const int * p = <const int *>a
+        const int * q = <const int *>b
+    if p[0] != q[0]:
+        return -1 if p[0] < q[0] else 1
+    if p[1] != q[1]:
+        return -1 if p[1] < q[1] else 1
+    return 0
+
+
+cdef object pair_array(pair_buffer * pairs):
+    """
+    SORT THE PAIRS AND RETURN THEM AS A NUMPY ARRAY
+
+    :param pairs: pointer; pair buffer
+    :return: numpy.ndarray shape (K, 2) int32
+    """
+    cdef:
+        int [:, ::1] out_view
+
+    out = numpy.empty((pairs.length, 2), dtype=numpy.int32)
+    if pairs.length > 0:
+        out_view = out
+        with nogil:
+            qsort(pairs.data, pairs.length, 2 * sizeof(int), pair_compare)
+            memcpy(&out_view[0, 0], pairs.data, 2 * pairs.length * sizeof(int))
+    return out
+
+
+cdef object remap_inverse(object order, Py_ssize_t n):
+    """
+    CHECK A NEW BODY ORDER AND RETURN ITS INVERSE
+
+    order[new] is the former index of the body now at row new (see morton_order),
+    the inverse gives the new row of each former index.
+
+    :param order: numpy.ndarray shape (n,) integer; permutation of range(n)
+    :param n    : integer; number of bodies
+    :return: numpy.ndarray shape (n,) int32; inverse[old] = new
+    """
+    order = numpy.asarray(order)
+    if order.ndim != 1 or order.shape[0] != n:
+        raise ValueError("\nArgument order must be a permutation of %s bodies, "
+                         "got shape %s " % (n, order.shape))
+    inverse = numpy.full(n, -1, dtype=numpy.int32)
+    if n > 0:
+        if order.min() < 0 or order.max() >= n:
+            raise ValueError("\nArgument order indices must be in range [0, %s]." % (n - 1))
+        inverse[order] = numpy.arange(n, dtype=numpy.int32)
+        if inverse.min() < 0:
+            raise ValueError("\nArgument order must not contain duplicate indices.")
+    return inverse
+
+
+cdef inline bint overlap(body_table * table, Py_ssize_t i, Py_ssize_t j) noexcept nogil:
+    """
+    RETURN TRUE WHEN THE CIRCLES i AND j ARE OVERLAPPING (OR TOUCHING)
+    """
+    cdef:
+        double dx = table.x[i] - table.x[j]
+        double dy = table.y[i] - table.y[j]
+        double s  = table.r[i] + table.r[j]
+    return dx * dx + dy * dy <= s * s
+
+
+# **************************** UNIFORM GRID (SPATIAL HASH) ****************************
+
+cdef inline Py_ssize_t cell_hash(long long cx, long long cy, Py_ssize_t mask) noexcept nogil:
+    """
+    HASH THE CELL COORDINATES (cx, cy) INTO A BUCKET NUMBER (mask = buckets - 1)
+    """
+    return <Py_ssize_t>(((<unsigned long long>cx * <unsigned long long>73856093) ^
+                         (<unsigned long long>cy * <unsigned long long>19349663)) &
+                        <unsigned long long>mask)
+
+
+cdef class SpatialHash:
+    """
+    UNIFORM GRID BROADPHASE (SPATIAL HASH)
+
+    The plane is divided into square cells, by default the cell size is the largest
+    diameter, two overlapping circles are then in the same cell or in two neighbouring
+    cells. The cells are hashed into a table of buckets (no world boundaries) and each
+    body is only tested against the bodies in its own and neighbouring cells, the cost
+    grows with N and the number of contacts instead of N * N.
+
+    The buffers are kept between calls, call pairs() once per frame.
+
+    e.g:
+        grid = SpatialHash()
+        pairs = grid.pairs(centre, radius)
+    """
+    cdef:
+        readonly double cell_size
+        double fixed_size
+        body_table bodies
+        pair_buffer buffer
+        Py_ssize_t buckets
+        Py_ssize_t n_alloc
+        int * start
+        int * items
+        int * bucket
+        int * stamp
+
+    def __cinit__(self):
+        self.start  = NULL
+        self.items  = NULL
+        self.bucket = NULL
+        self.stamp  = NULL
+        self.buckets = 0
+        self.n_alloc = 0
+
+    def __init__(self, double cell_size = 0.0):
+        """
+        :param cell_size: float; cell size in pixels (default 0.0, the cell size is the
+            largest diameter found at each call)
+        """
+        if cell_size < 0.0:
+            raise ValueError("\nArgument cell_size must be >= 0.0, got %s " % cell_size)
+        self.fixed_size = cell_size
+        self.cell_size = cell_size
+
+    def __dealloc__(self):
+        body_free(&self.bodies)
+        free(self.buffer.data)
+        free(self.start)
+        free(self.items)
+        free(self.bucket)
+        free(self.stamp)
+
+    def __len__(self):
+        return self.bodies.length
+
+    cdef int reserve(self, Py_ssize_t n) except -1:
+        """
+        GROW THE GRID BUFFERS FOR n BODIES (BUCKETS = POWER OF TWO >= 2 * n)
+        """
+        cdef:
+            Py_ssize_t buckets = 64
+            int * p
+
+        while buckets < 2 * n:
+            buckets *= 2
+
+        if buckets != self.buckets:
+            p = <int *>realloc(self.start, (buckets + 1) * sizeof(int))
+            if p == NULL:
+                raise MemoryError("\nCannot allocate the grid buckets.")
+            self.start = p
+            p = <int *>realloc(self.stamp, buckets * sizeof(int))
+            if p == NULL:
+                raise MemoryError("\nCannot allocate the grid buckets.")
+            self.stamp = p
+            self.buckets = buckets
+
+        if n > self.n_alloc:
+            p = <int *>realloc(self.items, n * sizeof(int))
+            if p == NULL:
+                raise MemoryError("\nCannot allocate the grid cells.")
+            self.items = p
+            p = <int *>realloc(self.bucket, n * sizeof(int))
+            if p == NULL:
+                raise MemoryError("\nCannot allocate the grid cells.")
+            self.bucket = p
+            self.n_alloc = n
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int search(self) noexcept nogil:
+        """
+        BUILD THE GRID AND COLLECT THE OVERLAPPING PAIRS INTO THE PAIR BUFFER
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t n = b.length
+            Py_ssize_t mask = self.buckets - 1
+            Py_ssize_t i, k, h, total
+            int j, reach, dx, dy
+            long long cx, cy
+            double inv = 1.0 / self.cell_size
+
+        self.buffer.length = 0
+
+        # Counting sort of the bodies by bucket
+        for h in range(self.buckets + 1):
+            self.start[h] = 0
+        for i in range(n):
+            h = cell_hash(<long long>floor(b.x[i] * inv),
+                          <long long>floor(b.y[i] * inv), mask)
+            self.bucket[i] = <int>h
+            self.start[h + 1] += 1
+        total = 0
+        for h in range(self.buckets):
+            total += self.start[h + 1]
+            self.start[h + 1] = <int>total
+        # stamp is used as a temporary insertion cursor
+        for h in range(self.buckets):
+            self.stamp[h] = self.start[h]
+        for i in range(n):
+            h = self.bucket[i]
+            self.items[self.stamp[h]] = <int>i
+            self.stamp[h] += 1
+
+        for h in range(self.buckets):
+            self.stamp[h] = -1
+
+        # Each body visits the cells within its reach (r_i + r_max), a bucket shared by
+        # several cells (hash collision) is only visited once per body (stamp)
+        for i in range(n):
+            cx = <long long>floor(b.x[i] * inv)
+            cy = <long long>floor(b.y[i] * inv)
+            reach = <int>ceil((b.r[i] + b.r_max) * inv)
+            for dy in range(-reach, reach + 1):
+                for dx in range(-reach, reach + 1):
+                    h = cell_hash(cx + dx, cy + dy, mask)
+                    if self.stamp[h] == i:
+                        continue
+                    self.stamp[h] = <int>i
+                    for k in range(self.start[h], self.start[h + 1]):
+                        j = self.items[k]
+                        if j > i and overlap(b, i, j):
+                            if pair_push(&self.buffer, <int>i, j) < 0:
+                                return -1
+        return 0
+
+    def remap(self, object order):
+        """
+        FOLLOW A NEW BODY ORDER (see morton_order), NOTHING IS KEPT BETWEEN THE CALLS
+
+        :param order: numpy.ndarray shape (N,) integer; order[new] = former index
+        :return: void
+        """
+        remap_inverse(order, self.bodies.length)
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        cdef int status
+
+        body_load(&self.bodies, pos, radius)
+        self.reserve(self.bodies.length)
+
+        self.cell_size = self.fixed_size
+        if self.cell_size == 0.0:
+            self.cell_size = 2.0 * self.bodies.r_max if self.bodies.r_max > 0.0 else 1.0
+
+        with nogil:
+            status = self.search()
+        if status < 0:
+            raise MemoryError("\nCannot allocate the pair buffer.")
+        return pair_array(&self.buffer)
+
+
+# **************************** SWEEP AND PRUNE ****************************************
+
+# Interval endpoint, key = (body << 1) | is_max
+cdef struct endpoint:
+    double value
+    int key
+
+
+cdef int endpoint_compare(const void * a, const void * b) noexcept nogil:
+    """
+    ORDER TWO ENDPOINTS (VALUE, THEN MINIMUM BEFORE MAXIMUM), qsort comparison function
+    """
+    cdef:
+        const endpoint * p = <const endpoint *>a
+        const endpoint * q = <const endpoint *>b
+    if p.value != q.value:
+        return -1 if p.value < q.value else 1
+    return (p.key & 1) - (q.key & 1)
+
+
+cdef class SweepAndPrune:
+    """
+    INCREMENTAL SWEEP AND PRUNE BROADPHASE (SORT AND SWEEP ALONG THE X AXIS)
+
+    The interval [x - r, x + r] of every body is stored as two endpoints in a list kept
+    sorted between the calls. The bodies are only moving a few pixels per frame, the
+    order barely changes and an insertion sort repairs the list in O(n + swaps). The
+    sweep keeps the set of open intervals and only tests the bodies overlapping along
+    the x axis, the cost is close to O(n + k).
+
+    The body i is the row i of the arrays passed to pairs(), the sorted list is rebuilt
+    when the number of bodies changes.
+
+    e.g:
+        sap = SweepAndPrune()
+        pairs = sap.pairs(centre, radius)
+    """
+    cdef:
+        readonly Py_ssize_t swaps
+        body_table bodies
+        pair_buffer buffer
+        Py_ssize_t length
+        Py_ssize_t n_alloc
+        endpoint * ends
+        int * active
+        int * slot
+
+    def __cinit__(self):
+        self.ends   = NULL
+        self.active = NULL
+        self.slot   = NULL
+        self.length = 0
+        self.n_alloc = 0
+        self.swaps = 0
+
+    def __dealloc__(self):
+        body_free(&self.bodies)
+        free(self.buffer.data)
+        free(self.ends)
+        free(self.active)
+        free(self.slot)
+
+    def __len__(self):
+        return self.length
+
+    cdef int reserve(self, Py_ssize_t n) except -1:
+        """
+        GROW THE ENDPOINT LIST FOR n BODIES (2 * n ENDPOINTS)
+        """
+        cdef:
+            endpoint * ends
+            int * p
+
+        if n <= self.n_alloc:
+            return 0
+        ends = <endpoint *>realloc(self.ends, 2 * n * sizeof(endpoint))
+        if ends == NULL:
+            raise MemoryError("\nCannot allocate the endpoint list.")
+        self.ends = ends
+        p = <int *>realloc(self.active, n * sizeof(int))
+        if p == NULL:
+            raise MemoryError("\nCannot allocate the endpoint list.")
+        self.active = p
+        p = <int *>realloc(self.slot, n * sizeof(int))
+        if p == NULL:
+            raise MemoryError("\nCannot allocate the endpoint list.")
+        self.slot = p
+        self.n_alloc = n
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef void repair(self) noexcept nogil:
+        """
+        REFRESH THE ENDPOINT VALUES AND RESTORE THE ORDER WITH AN INSERTION SORT
+
+        At equal value a minimum is placed before a maximum (touching intervals
+        are overlapping).
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t e, k, count = 2 * self.length
+            Py_ssize_t swaps = 0
+            int body
+            endpoint current
+
+        for e in range(count):
+            body = self.ends[e].key >> 1
+            if self.ends[e].key & 1:
+                self.ends[e].value = b.x[body] + b.r[body]
+            else:
+                self.ends[e].value = b.x[body] - b.r[body]
+
+        for e in range(1, count):
+            current = self.ends[e]
+            k = e
+            while k > 0 and endpoint_compare(&self.ends[k - 1], &current) > 0:
+                self.ends[k] = self.ends[k - 1]
+                k -= 1
+            self.ends[k] = current
+            swaps += e - k
+        self.swaps = swaps
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int sweep(self) noexcept nogil:
+        """
+        SWEEP THE SORTED ENDPOINTS AND COLLECT THE OVERLAPPING PAIRS
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t e, k, opened = 0
+            int body, other, last
+
+        self.buffer.length = 0
+        for e in range(2 * self.length):
+            body = self.ends[e].key >> 1
+            if self.ends[e].key & 1:
+                # Close the interval, the last open interval takes its slot
+                k = self.slot[body]
+                opened -= 1
+                last = self.active[opened]
+                self.active[k] = last
+                self.slot[last] = <int>k
+            else:
+                for k in range(opened):
+                    other = self.active[k]
+                    if overlap(b, body, other):
+                        if body < other:
+                            if pair_push(&self.buffer, body, other) < 0:
+                                return -1
+                        elif pair_push(&self.buffer, other, body) < 0:
+                            return -1
+                self.active[opened] = body
+                self.slot[body] = <int>opened
+                opened += 1
+        return 0
+
+    def remap(self, object order):
+        """
+        RENAME THE BODIES AFTER A REORDER OF THE ARRAYS (see morton_order)
+
+        The endpoint list stays sorted, the next call does not pay for the new order.
+
+        :param order: numpy.ndarray shape (N,) integer; order[new] = former index
+        :return: void
+        """
+        cdef:
+            int [::1] inverse = remap_inverse(order, max(self.length, 0))
+            Py_ssize_t e
+
+        for e in range(2 * self.length):
+            self.ends[e].key = (inverse[self.ends[e].key >> 1] << 1) | (self.ends[e].key & 1)
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t i
+            int status
+
+        body_load(b, pos, radius)
+        self.reserve(b.length)
+
+        with nogil:
+            # New set of bodies, the list is filled and fully sorted once
+            if b.length != self.length:
+                self.length = b.length
+                for i in range(self.length):
+                    self.ends[2 * i].key = <int>(i << 1)
+                    self.ends[2 * i].value = b.x[i] - b.r[i]
+                    self.ends[2 * i + 1].key = <int>((i << 1) | 1)
+                    self.ends[2 * i + 1].value = b.x[i] + b.r[i]
+                qsort(self.ends, 2 * self.length, sizeof(endpoint), endpoint_compare)
+            self.repair()
+            status = self.sweep()
+        if status < 0:
+            raise MemoryError("\nCannot allocate the pair buffer.")
+        return pair_array(&self.buffer)
+
+
+# **************************** LOOSE QUADTREE *****************************************
+
+# Quadtree node, region [x, x + size] x [y, y + size], loose bounds extended by size / 2
+cdef struct qnode:
+    double x
+    double y
+    double size
+    int child[4]
+    int parent
+    int first
+    int count
+
+
+DEF QT_STACK = 128
+
+
+cdef class LooseQuadtree:
+    """
+    LOOSE QUADTREE BROADPHASE FOR BODIES OF MIXED SIZES
+
+    Each body is stored in the deepest node whose size is larger than its diameter
+    (node containing the body centre). The node loose bounds are twice the node size,
+    a body therefore never straddles a node boundary and a body query only descends
+    into the nodes whose loose bounds overlap the body. Small particles are living in
+    the deep nodes and the large balls in the shallow nodes, the queries stay short
+    when the radii differ by more than 10x (a uniform grid sized for the large bodies
+    puts all the particles into the same few cells).
+
+    The nodes are created when needed and released when empty. Between two calls a
+    body is only moved when it changes node. The body i is the row i of the arrays
+    passed to pairs(), the bodies outside the region are kept in the root node.
+
+    e.g:
+        tree = LooseQuadtree(0, 0, 1024)
+        pairs = tree.pairs(centre, radius)
+    """
+    cdef:
+        readonly double x
+        readonly double y
+        readonly double size
+        readonly int max_depth
+        readonly Py_ssize_t nodes
+        readonly Py_ssize_t moves
+        body_table bodies
+        pair_buffer buffer
+        qnode * pool
+        Py_ssize_t pool_alloc
+        Py_ssize_t pool_used
+        int free_node
+        Py_ssize_t length
+        Py_ssize_t n_alloc
+        int * node_of
+        int * next
+        int * prev
+        int * depth
+        int * cx
+        int * cy
+
+    def __cinit__(self):
+        self.pool = NULL
+        self.node_of = NULL
+        self.next = NULL
+        self.prev = NULL
+        self.depth = NULL
+        self.cx = NULL
+        self.cy = NULL
+        self.pool_alloc = 0
+        self.pool_used = 0
+        self.free_node = -1
+        self.length = 0
+        self.n_alloc = 0
+        self.nodes = 0
+        self.moves = 0
+
+    def __init__(self, double x, double y, double size, int max_depth = 8):
+        """
+        :param x        : float; region top left corner x
+        :param y        : float; region top left corner y
+        :param size     : float; region width & height (square region, must be > 0)
+        :param max_depth: integer; maximum depth of the tree (0 to 20, default 8)
+        """
+        if size <= 0.0:
+            raise ValueError("\nArgument size must be > 0.0, got %s " % size)
+        if not 0 <= max_depth <= 20:
+            raise ValueError("\nArgument max_depth must be in range [0, 20], got %s " % max_depth)
+        self.x = x
+        self.y = y
+        self.size = size
+        self.max_depth = max_depth
+        if self.new_node(-1, x, y, size) < 0:
+            raise MemoryError("\nCannot allocate the quadtree nodes.")
+
+    def __dealloc__(self):
+        body_free(&self.bodies)
+        free(self.buffer.data)
+        free(self.pool)
+        free(self.node_of)
+        free(self.next)
+        free(self.prev)
+        free(self.depth)
+        free(self.cx)
+        free(self.cy)
+
+    def __len__(self):
+        return self.length
+
+    cdef int reserve(self, Py_ssize_t n) except -1:
+        """
+        GROW THE BODY ARRAYS FOR n BODIES
+        """
+        cdef:
+            int ** arrays[6]
+            int * p
+            Py_ssize_t k
+
+        if n <= self.n_alloc:
+            return 0
+        arrays[0] = &self.node_of
+        arrays[1] = &self.next
+        arrays[2] = &self.prev
+        arrays[3] = &self.depth
+        arrays[4] = &self.cx
+        arrays[5] = &self.cy
+        for k in range(6):
+            p = <int *>realloc(arrays[k][0], n * sizeof(int))
+            if p == NULL:
+                raise MemoryError("\nCannot allocate the quadtree bodies.")
+            arrays[k][0] = p
+        self.n_alloc = n
+        return 0
+
+    cdef int new_node(self, int parent, double x, double y, double size) noexcept nogil:
+        """
+        ALLOCATE A NODE (RE-USE A RELEASED NODE WHEN POSSIBLE)
+
+        :return: node index or -1 (out of memory)
+        """
+        cdef:
+            int node
+            Py_ssize_t capacity
+            qnode * pool
+
+        if self.free_node >= 0:
+            node = self.free_node
+            self.free_node = self.pool[node].parent
+        else:
+            if self.pool_used == self.pool_alloc:
+                capacity = 2 * self.pool_alloc if self.pool_alloc > 0 else 64
+                pool = <qnode *>realloc(self.pool, capacity * sizeof(qnode))
+                if pool == NULL:
+                    return -1
+                self.pool = pool
+                self.pool_alloc = capacity
+            node = <int>self.pool_used
+            self.pool_used += 1
+
+        self.pool[node].x = x
+        self.pool[node].y = y
+        self.pool[node].size = size
+        self.pool[node].child[0] = -1
+        self.pool[node].child[1] = -1
+        self.pool[node].child[2] = -1
+        self.pool[node].child[3] = -1
+        self.pool[node].parent = parent
+        self.pool[node].first = -1
+        self.pool[node].count = 0
+        self.nodes += 1
+        return node
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef void target(self, Py_ssize_t i, int * depth, int * cx, int * cy) noexcept nogil:
+        """
+        NODE OF THE BODY i (DEPTH & CELL COORDINATES AT THAT DEPTH)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            double u = (b.x[i] - self.x) / self.size
+            double v = (b.y[i] - self.y) / self.size
+            double node_size = self.size
+            int d = 0, cells
+
+        depth[0] = 0
+        cx[0] = 0
+        cy[0] = 0
+        # Bodies outside the region are kept in the root node
+        if not (0.0 <= u < 1.0 and 0.0 <= v < 1.0):
+            return
+        while d < self.max_depth and node_size * 0.5 >= 2.0 * b.r[i]:
+            node_size *= 0.5
+            d += 1
+        cells = 1 << d
+        depth[0] = d
+        cx[0] = min(<int>(u * cells), cells - 1)
+        cy[0] = min(<int>(v * cells), cells - 1)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int insert(self, int i, int depth, int cx, int cy) noexcept nogil:
+        """
+        INSERT THE BODY i IN THE NODE (depth, cx, cy), THE MISSING NODES ARE CREATED
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            int node = 0, child, level, q, shift
+            double half
+
+        self.pool[0].count += 1
+        for level in range(1, depth + 1):
+            shift = depth - level
+            q = ((cx >> shift) & 1) | (((cy >> shift) & 1) << 1)
+            child = self.pool[node].child[q]
+            if child < 0:
+                half = self.pool[node].size * 0.5
+                child = self.new_node(
+                    node, self.pool[node].x + (q & 1) * half,
+                    self.pool[node].y + (q >> 1) * half, half)
+                if child < 0:
+                    return -1
+                self.pool[node].child[q] = child
+            node = child
+            self.pool[node].count += 1
+
+        self.node_of[i] = node
+        self.depth[i] = depth
+        self.cx[i] = cx
+        self.cy[i] = cy
+        self.prev[i] = -1
+        self.next[i] = self.pool[node].first
+        if self.pool[node].first >= 0:
+            self.prev[self.pool[node].first] = i
+        self.pool[node].first = i
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef void remove(self, int i) noexcept nogil:
+        """
+        REMOVE THE BODY i FROM ITS NODE, THE EMPTY NODES ARE RELEASED
+        """
+        cdef:
+            int node = self.node_of[i], parent, q
+
+        if self.prev[i] >= 0:
+            self.next[self.prev[i]] = self.next[i]
+        else:
+            self.pool[node].first = self.next[i]
+        if self.next[i] >= 0:
+            self.prev[self.next[i]] = self.prev[i]
+        self.node_of[i] = -1
+
+        while node >= 0:
+            self.pool[node].count -= 1
+            parent = self.pool[node].parent
+            if self.pool[node].count == 0 and parent >= 0:
+                for q in range(4):
+                    if self.pool[parent].child[q] == node:
+                        self.pool[parent].child[q] = -1
+                self.pool[node].parent = self.free_node
+                self.free_node = node
+                self.nodes -= 1
+            node = parent
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int update(self, Py_ssize_t n) noexcept nogil:
+        """
+        SYNCHRONISE THE TREE WITH THE n BODIES OF THE BODY TABLE
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            Py_ssize_t i
+            int depth, cx, cy
+
+        # Bodies removed from the end of the arrays
+        for i in range(n, self.length):
+            self.remove(<int>i)
+        for i in range(self.length, n):
+            self.node_of[i] = -1
+        self.length = n
+
+        self.moves = 0
+        for i in range(n):
+            self.target(i, &depth, &cx, &cy)
+            if self.node_of[i] >= 0:
+                if depth == self.depth[i] and cx == self.cx[i] and cy == self.cy[i]:
+                    continue
+                self.remove(<int>i)
+            if self.insert(<int>i, depth, cx, cy) < 0:
+                return -1
+            self.moves += 1
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int search(self) noexcept nogil:
+        """
+        QUERY THE TREE WITH EVERY BODY AND COLLECT THE OVERLAPPING PAIRS
+
+        A body only visits the nodes down to its own depth, the smaller bodies stored
+        deeper find the pair with their own query (each pair is found once).
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            int stack[QT_STACK]
+            int level[QT_STACK]
+            int top, node, child, q, j, d
+            Py_ssize_t i
+            double x0, x1, y0, y1, half
+            qnode * c
+
+        self.buffer.length = 0
+        for i in range(self.length):
+            x0 = b.x[i] - b.r[i]
+            x1 = b.x[i] + b.r[i]
+            y0 = b.y[i] - b.r[i]
+            y1 = b.y[i] + b.r[i]
+            stack[0] = 0
+            level[0] = 0
+            top = 1
+            while top > 0:
+                top -= 1
+                node = stack[top]
+                d = level[top]
+                j = self.pool[node].first
+                while j >= 0:
+                    # Same depth, the pair is kept by the smallest index
+                    if (d < self.depth[i] or j > i) and overlap(b, i, j):
+                        if pair_push(&self.buffer, <int>min(i, j), <int>max(i, j)) < 0:
+                            return -1
+                    j = self.next[j]
+                if d == self.depth[i]:
+                    continue
+                for q in range(4):
+                    child = self.pool[node].child[q]
+                    if child < 0:
+                        continue
+                    c = &self.pool[child]
+                    half = c.size * 0.5
+                    # Loose bounds [x - size / 2, x + size * 1.5]
+                    if (x1 >= c.x - half and x0 <= c.x + c.size + half and
+                            y1 >= c.y - half and y0 <= c.y + c.size + half):
+                        stack[top] = child
+                        level[top] = d + 1
+                        top += 1
+        return 0
+
+    def remap(self, object order):
+        """
+        RENAME THE BODIES AFTER A REORDER OF THE ARRAYS (see morton_order)
+
+        The bodies stay in their nodes, the next call does not pay for the new order.
+
+        :param order: numpy.ndarray shape (N,) integer; order[new] = former index
+        :return: void
+        """
+        cdef:
+            Py_ssize_t n = self.length
+            int [::1] inverse = remap_inverse(order, n)
+            int [::1] old = numpy.asarray(order, dtype=numpy.int32)
+            int [:, ::1] copy = numpy.empty((6, max(n, 1)), dtype=numpy.int32)
+            Py_ssize_t i, node
+            int k
+
+        for i in range(n):
+            copy[0, i] = self.node_of[i]
+            copy[1, i] = self.next[i]
+            copy[2, i] = self.prev[i]
+            copy[3, i] = self.depth[i]
+            copy[4, i] = self.cx[i]
+            copy[5, i] = self.cy[i]
+        for i in range(n):
+            k = old[i]
+            self.node_of[i] = copy[0, k]
+            self.next[i] = inverse[copy[1, k]] if copy[1, k] >= 0 else -1
+            self.prev[i] = inverse[copy[2, k]] if copy[2, k] >= 0 else -1
+            self.depth[i] = copy[3, k]
+            self.cx[i] = copy[4, k]
+            self.cy[i] = copy[5, k]
+        for node in range(self.pool_used):
+            if self.pool[node].first >= 0:
+                self.pool[node].first = inverse[self.pool[node].first]
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        cdef int status
+
+        body_load(&self.bodies, pos, radius)
+        self.reserve(self.bodies.length)
+
+        with nogil:
+            status = self.update(self.bodies.length)
+            if status == 0:
+                status = self.search()
+        if status < 0:
+            raise MemoryError("\nCannot allocate the quadtree.")
+        return pair_array(&self.buffer)
+
+
+# **************************** DYNAMIC AABB TREE **************************************
+
+# Tree node, leaves hold one body fat box, a released node has height -1 and
+# parent = next released node
+cdef struct tree_node:
+    double x0
+    double y0
+    double x1
+    double y1
+    int parent
+    int child1
+    int child2
+    int height
+    int body
+
+
+cdef inline double perimeter(double x0, double y0, double x1, double y1) noexcept nogil:
+    """
+    RETURN THE PERIMETER OF THE BOX [x0, x1] x [y0, y1] (INSERTION COST)
+    """
+    return 2.0 * ((x1 - x0) + (y1 - y0))
+
+
+cdef inline void merge(tree_node * n, tree_node * a, tree_node * b) noexcept nogil:
+    """
+    BOX OF THE NODE n = UNION OF THE BOXES OF THE NODES a AND b
+    """
+    n.x0 = min(a.x0, b.x0)
+    n.y0 = min(a.y0, b.y0)
+    n.x1 = max(a.x1, b.x1)
+    n.y1 = max(a.y1, b.y1)
+
+
+cdef inline bint boxes_overlap(tree_node * a, tree_node * b) noexcept nogil:
+    """
+    RETURN TRUE WHEN THE BOXES OF THE NODES a AND b ARE OVERLAPPING
+    """
+    return a.x0 <= b.x1 and b.x0 <= a.x1 and a.y0 <= b.y1 and b.y0 <= a.y1
+
+
+cdef class DynamicAABBTree:
+    """
+    DYNAMIC AABB TREE BROADPHASE (BOUNDING VOLUME HIERARCHY)
+
+    Each body is a leaf holding a fat box, the body box extended by a margin. While
+    the body box stays inside its fat box the tree is left untouched, a body is only
+    removed and re-inserted when it leaves its fat box. The insertion picks the
+    sibling with the smallest perimeter increase and the tree is kept balanced with
+    rotations (height O(log n)). The pairs are collected by a tree versus tree
+    traversal, the sub-trees whose boxes are not overlapping are skipped.
+
+    The body i is the row i of the arrays passed to pairs().
+
+    e.g:
+        tree = DynamicAABBTree(margin=4.0)
+        pairs = tree.pairs(centre, radius)
+    """
+    cdef:
+        readonly double margin
+        readonly Py_ssize_t reinserts
+        body_table bodies
+        pair_buffer buffer
+        tree_node * pool
+        Py_ssize_t pool_alloc
+        Py_ssize_t pool_used
+        int free_node
+        int root
+        Py_ssize_t length
+        Py_ssize_t n_alloc
+        int * leaf_of
+        int * stack
+        Py_ssize_t stack_alloc
+
+    def __cinit__(self):
+        self.pool = NULL
+        self.leaf_of = NULL
+        self.stack = NULL
+        self.pool_alloc = 0
+        self.pool_used = 0
+        self.stack_alloc = 0
+        self.free_node = -1
+        self.root = -1
+        self.length = 0
+        self.n_alloc = 0
+        self.reinserts = 0
+
+    def __init__(self, double margin = 4.0):
+        """
+        :param margin: float; fat box margin in pixels added on each side of the body
+            box (default 4.0), a larger margin means fewer re-insertions but more
+            candidate pairs
+        """
+        if margin < 0.0:
+            raise ValueError("\nArgument margin must be >= 0.0, got %s " % margin)
+        self.margin = margin
+
+    def __dealloc__(self):
+        body_free(&self.bodies)
+        free(self.buffer.data)
+        free(self.pool)
+        free(self.leaf_of)
+        free(self.stack)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def height(self):
+        """
+        HEIGHT OF THE TREE (0 FOR A SINGLE LEAF, -1 WHEN EMPTY)
+        """
+        return self.pool[self.root].height if self.root >= 0 else -1
+
+    cdef int reserve(self, Py_ssize_t n) except -1:
+        """
+        GROW THE BODY ARRAYS FOR n BODIES
+        """
+        cdef int * p
+
+        if n <= self.n_alloc:
+            return 0
+        p = <int *>realloc(self.leaf_of, n * sizeof(int))
+        if p == NULL:
+            raise MemoryError("\nCannot allocate the tree bodies.")
+        self.leaf_of = p
+        self.n_alloc = n
+        return 0
+
+    cdef int new_node(self) noexcept nogil:
+        """
+        ALLOCATE A NODE (RE-USE A RELEASED NODE WHEN POSSIBLE)
+
+        :return: node index or -1 (out of memory)
+        """
+        cdef:
+            int node
+            Py_ssize_t capacity
+            tree_node * pool
+
+        if self.free_node >= 0:
+            node = self.free_node
+            self.free_node = self.pool[node].parent
+        else:
+            if self.pool_used == self.pool_alloc:
+                capacity = 2 * self.pool_alloc if self.pool_alloc > 0 else 128
+                pool = <tree_node *>realloc(self.pool, capacity * sizeof(tree_node))
+                if pool == NULL:
+                    return -1
+                self.pool = pool
+                self.pool_alloc = capacity
+            node = <int>self.pool_used
+            self.pool_used += 1
+        self.pool[node].parent = -1
+        self.pool[node].child1 = -1
+        self.pool[node].child2 = -1
+        self.pool[node].height = 0
+        self.pool[node].body = -1
+        return node
+
+    cdef inline void release(self, int node) noexcept nogil:
+        """
+        RELEASE THE NODE (ADDED TO THE FREE LIST)
+        """
+        self.pool[node].parent = self.free_node
+        self.pool[node].height = -1
+        self.free_node = node
+
+    cdef inline void refit(self, int node) noexcept nogil:
+        """
+        RECOMPUTE THE BOX AND THE HEIGHT OF AN INTERNAL NODE FROM ITS CHILDREN
+        """
+        cdef:
+            tree_node * n = &self.pool[node]
+            tree_node * a = &self.pool[n.child1]
+            tree_node * b = &self.pool[n.child2]
+        merge(n, a, b)
+        n.height = 1 + max(a.height, b.height)
+
+    cdef inline void replace_child(self, int parent, int old, int new) noexcept nogil:
+        """
+        REPLACE THE CHILD old OF parent BY new (new BECOMES THE ROOT WHEN parent = -1)
+        """
+        if parent < 0:
+            self.root = new
+        elif self.pool[parent].child1 == old:
+            self.pool[parent].child1 = new
+        else:
+            self.pool[parent].child2 = new
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int rotate(self, int ia) noexcept nogil:
+        """
+        BALANCE THE SUB-TREE ia WITH A ROTATION WHEN ITS CHILDREN HEIGHTS DIFFER BY
+        MORE THAN ONE
+
+        :return: index of the node now at the place of ia
+        """
+        cdef:
+            tree_node * pool = self.pool
+            int ib, ic, i1, i2, up, low, other
+            int balance
+
+        if pool[ia].height < 2:
+            return ia
+
+        ib = pool[ia].child1
+        ic = pool[ia].child2
+        balance = pool[ic].height - pool[ib].height
+        if -1 <= balance <= 1:
+            return ia
+
+        # The highest child (up) takes the place of ia, ia keeps the other child and
+        # the lowest grandchild, the highest grandchild stays below up
+        if balance > 1:
+            up = ic
+            other = ib
+        else:
+            up = ib
+            other = ic
+        i1 = pool[up].child1
+        i2 = pool[up].child2
+        if pool[i1].height > pool[i2].height:
+            low = i2
+        else:
+            low = i1
+            i1 = i2
+
+        pool[up].parent = pool[ia].parent
+        self.replace_child(pool[up].parent, ia, up)
+        pool[up].child1 = ia
+        pool[up].child2 = i1
+        pool[ia].parent = up
+        pool[i1].parent = up
+
+        pool[ia].child1 = other
+        pool[ia].child2 = low
+        pool[low].parent = ia
+
+        self.refit(ia)
+        self.refit(up)
+        return up
+
+    cdef void climb(self, int node) noexcept nogil:
+        """
+        REFIT AND BALANCE THE NODES FROM node UP TO THE ROOT
+        """
+        while node >= 0:
+            node = self.rotate(node)
+            self.refit(node)
+            node = self.pool[node].parent
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int insert(self, int leaf) noexcept nogil:
+        """
+        INSERT THE LEAF IN THE TREE NEXT TO THE SIBLING WITH THE LOWEST COST
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            tree_node * pool
+            tree_node * n
+            tree_node * c
+            int index, sibling, parent, old_parent, k
+            double area, combined, cost, inherit
+            double child_cost[2]
+            double x0, y0, x1, y1
+
+        parent = self.new_node()
+        if parent < 0:
+            return -1
+        pool = self.pool
+
+        if self.root < 0:
+            self.release(parent)
+            self.root = leaf
+            pool[leaf].parent = -1
+            return 0
+
+        n = &pool[leaf]
+        x0, y0, x1, y1 = n.x0, n.y0, n.x1, n.y1
+        index = self.root
+        while pool[index].height > 0:
+            n = &pool[index]
+            area = perimeter(n.x0, n.y0, n.x1, n.y1)
+            combined = perimeter(min(n.x0, x0), min(n.y0, y0), max(n.x1, x1), max(n.y1, y1))
+            # Cost of a new parent for this node & leaf, and cost pushed down to the children
+            cost = 2.0 * combined
+            inherit = 2.0 * (combined - area)
+            for k in range(2):
+                c = &pool[n.child1 if k == 0 else n.child2]
+                child_cost[k] = perimeter(min(c.x0, x0), min(c.y0, y0),
+                                          max(c.x1, x1), max(c.y1, y1)) + inherit
+                if c.height > 0:
+                    child_cost[k] -= perimeter(c.x0, c.y0, c.x1, c.y1)
+            if cost < child_cost[0] and cost < child_cost[1]:
+                break
+            index = n.child1 if child_cost[0] < child_cost[1] else n.child2
+        sibling = index
+
+        old_parent = pool[sibling].parent
+        pool[parent].parent = old_parent
+        self.replace_child(old_parent, sibling, parent)
+        pool[parent].child1 = sibling
+        pool[parent].child2 = leaf
+        pool[sibling].parent = parent
+        pool[leaf].parent = parent
+        self.climb(parent)
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef void remove(self, int leaf) noexcept nogil:
+        """
+        REMOVE THE LEAF FROM THE TREE, ITS SIBLING TAKES THE PLACE OF THEIR PARENT
+        """
+        cdef:
+            tree_node * pool = self.pool
+            int parent, grand, sibling
+
+        if leaf == self.root:
+            self.root = -1
+            return
+        parent = pool[leaf].parent
+        grand = pool[parent].parent
+        sibling = pool[parent].child2 if pool[parent].child1 == leaf else pool[parent].child1
+
+        self.replace_child(grand, parent, sibling)
+        pool[sibling].parent = grand
+        self.release(parent)
+        self.climb(grand)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int update(self, Py_ssize_t n) noexcept nogil:
+        """
+        SYNCHRONISE THE TREE WITH THE n BODIES OF THE BODY TABLE, A LEAF IS ONLY
+        RE-INSERTED WHEN THE BODY LEAVES ITS FAT BOX
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            tree_node * leaf
+            Py_ssize_t i
+            int node
+            double r
+
+        # Bodies removed from the end of the arrays
+        for i in range(n, self.length):
+            self.remove(self.leaf_of[i])
+            self.release(self.leaf_of[i])
+        for i in range(self.length, n):
+            self.leaf_of[i] = -1
+        self.length = n
+
+        self.reinserts = 0
+        for i in range(n):
+            node = self.leaf_of[i]
+            r = b.r[i]
+            if node >= 0:
+                leaf = &self.pool[node]
+                if (leaf.x0 <= b.x[i] - r and b.x[i] + r <= leaf.x1 and
+                        leaf.y0 <= b.y[i] - r and b.y[i] + r <= leaf.y1):
+                    continue
+                self.remove(node)
+            else:
+                node = self.new_node()
+                if node < 0:
+                    return -1
+                self.pool[node].body = <int>i
+                self.leaf_of[i] = node
+
+            leaf = &self.pool[node]
+            leaf.x0 = b.x[i] - r - self.margin
+            leaf.y0 = b.y[i] - r - self.margin
+            leaf.x1 = b.x[i] + r + self.margin
+            leaf.y1 = b.y[i] + r + self.margin
+            if self.insert(node) < 0:
+                return -1
+            self.reinserts += 1
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int search(self) noexcept nogil:
+        """
+        TREE VERSUS TREE TRAVERSAL COLLECTING THE OVERLAPPING PAIRS
+
+        The stack holds node pairs (a, b), a pair with a = b stands for the pairs
+        inside the sub-tree a. Every pair of leaves is visited at most once.
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            tree_node * pool = self.pool
+            int * stack
+            Py_ssize_t top = 0, capacity
+            int ia, ib, i, j
+
+        self.buffer.length = 0
+        if self.root < 0 or pool[self.root].height == 0:
+            return 0
+
+        if self.stack_alloc == 0:
+            self.stack = <int *>malloc(256 * sizeof(int))
+            if self.stack == NULL:
+                return -1
+            self.stack_alloc = 256
+        stack = self.stack
+
+        stack[0] = self.root
+        stack[1] = self.root
+        top = 2
+        while top > 0:
+            # Room for the 4 pairs pushed below
+            if top + 8 > self.stack_alloc:
+                capacity = 2 * self.stack_alloc
+                stack = <int *>realloc(self.stack, capacity * sizeof(int))
+                if stack == NULL:
+                    return -1
+                self.stack = stack
+                self.stack_alloc = capacity
+            top -= 2
+            ia = stack[top]
+            ib = stack[top + 1]
+
+            if ia == ib:
+                if pool[ia].height == 0:
+                    continue
+                stack[top] = pool[ia].child1
+                stack[top + 1] = pool[ia].child1
+                stack[top + 2] = pool[ia].child2
+                stack[top + 3] = pool[ia].child2
+                stack[top + 4] = pool[ia].child1
+                stack[top + 5] = pool[ia].child2
+                top += 6
+                continue
+
+            if not boxes_overlap(&pool[ia], &pool[ib]):
+                continue
+
+            if pool[ia].height == 0 and pool[ib].height == 0:
+                i = pool[ia].body
+                j = pool[ib].body
+                if overlap(b, i, j):
+                    if pair_push(&self.buffer, min(i, j), max(i, j)) < 0:
+                        return -1
+                continue
+
+            # Descend into the highest node
+            if pool[ib].height > pool[ia].height:
+                ia, ib = ib, ia
+            stack[top] = pool[ia].child1
+            stack[top + 1] = ib
+            stack[top + 2] = pool[ia].child2
+            stack[top + 3] = ib
+            top += 4
+        return 0
+
+    def remap(self, object order):
+        """
+        RENAME THE BODIES AFTER A REORDER OF THE ARRAYS (see morton_order)
+
+        The leaves stay in place, the next call does not pay for the new order.
+
+        :param order: numpy.ndarray shape (N,) integer; order[new] = former index
+        :return: void
+        """
+        cdef:
+            Py_ssize_t n = self.length
+            int [::1] old = numpy.asarray(order, dtype=numpy.int32)
+            int [::1] leaves = numpy.empty(max(n, 1), dtype=numpy.int32)
+            Py_ssize_t i
+
+        remap_inverse(order, n)
+        for i in range(n):
+            leaves[i] = self.leaf_of[i]
+        for i in range(n):
+            self.leaf_of[i] = leaves[old[i]]
+            self.pool[self.leaf_of[i]].body = <int>i
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        cdef int status
+
+        body_load(&self.bodies, pos, radius)
+        self.reserve(self.bodies.length)
+
+        with nogil:
+            status = self.update(self.bodies.length)
+            if status == 0:
+                status = self.search()
+        if status < 0:
+            raise MemoryError("\nCannot allocate the AABB tree.")
+        return pair_array(&self.buffer)
+
+
+# **************************** VERLET NEIGHBOUR LISTS *********************************
+
+cdef class VerletList:
+    """
+    VERLET NEIGHBOUR LISTS BROADPHASE (LISTS RE-USED OVER SEVERAL FRAMES)
+
+    Each body keeps the list of the bodies closer than r1 + r2 + skin (built with a
+    SpatialHash). As long as no body has moved by more than skin / 2 since the last
+    build, two bodies that were not neighbours cannot overlap and only the stored
+    neighbours are tested. The lists are rebuilt when a body moves further, when a
+    radius grows or when the number of bodies changes. With capped velocities the
+    lists are rebuilt every (skin / 2) / (maximum speed) frames at most.
+
+    The body i is the row i of the arrays passed to pairs().
+
+    e.g:
+        verlet = VerletList(skin=20.0)
+        pairs = verlet.pairs(centre, radius)
+    """
+    cdef:
+        readonly double skin
+        readonly Py_ssize_t rebuilds
+        readonly bint rebuilt
+        SpatialHash grid
+        body_table bodies
+        pair_buffer buffer
+        Py_ssize_t length
+        Py_ssize_t n_alloc
+        Py_ssize_t neighbour_alloc
+        double * x0
+        double * y0
+        double * r0
+        int * first
+        int * neighbours
+
+    def __cinit__(self):
+        self.x0 = NULL
+        self.y0 = NULL
+        self.r0 = NULL
+        self.first = NULL
+        self.neighbours = NULL
+        self.length = -1
+        self.n_alloc = 0
+        self.neighbour_alloc = 0
+        self.rebuilds = 0
+        self.rebuilt = False
+
+    def __init__(self, double skin = 20.0):
+        """
+        :param skin: float; distance in pixels added to r1 + r2 when the lists are
+            built (default 20.0), a larger skin means fewer rebuilds but longer lists
+        """
+        if skin < 0.0:
+            raise ValueError("\nArgument skin must be >= 0.0, got %s " % skin)
+        self.skin = skin
+        self.grid = SpatialHash()
+
+    def __dealloc__(self):
+        body_free(&self.bodies)
+        free(self.buffer.data)
+        free(self.x0)
+        free(self.y0)
+        free(self.r0)
+        free(self.first)
+        free(self.neighbours)
+
+    def __len__(self):
+        return max(self.length, 0)
+
+    cdef int reserve(self, Py_ssize_t n) except -1:
+        """
+        GROW THE BODY ARRAYS FOR n BODIES
+        """
+        cdef:
+            double * p
+            int * q
+
+        if n <= self.n_alloc and self.first != NULL:
+            return 0
+        p = <double *>realloc(self.x0, n * sizeof(double))
+        if p == NULL:
+            raise MemoryError("\nCannot allocate the neighbour lists.")
+        self.x0 = p
+        p = <double *>realloc(self.y0, n * sizeof(double))
+        if p == NULL:
+            raise MemoryError("\nCannot allocate the neighbour lists.")
+        self.y0 = p
+        p = <double *>realloc(self.r0, n * sizeof(double))
+        if p == NULL:
+            raise MemoryError("\nCannot allocate the neighbour lists.")
+        self.r0 = p
+        q = <int *>realloc(self.first, (n + 1) * sizeof(int))
+        if q == NULL:
+            raise MemoryError("\nCannot allocate the neighbour lists.")
+        self.first = q
+        self.n_alloc = n
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef bint stale(self) noexcept nogil:
+        """
+        RETURN TRUE WHEN THE LISTS MUST BE REBUILT (A BODY MOVED BY MORE THAN
+        skin / 2, A RADIUS GREW OR THE NUMBER OF BODIES CHANGED)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t i
+            double dx, dy, limit = 0.25 * self.skin * self.skin
+
+        if b.length != self.length:
+            return True
+        for i in range(b.length):
+            dx = b.x[i] - self.x0[i]
+            dy = b.y[i] - self.y0[i]
+            if dx * dx + dy * dy > limit or b.r[i] > self.r0[i]:
+                return True
+        return False
+
+    cdef int rebuild(self, object pos, object radius) except -1:
+        """
+        BUILD THE NEIGHBOUR LISTS (BODIES CLOSER THAN r1 + r2 + skin)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            int [:, ::1] candidates
+            Py_ssize_t i, k, count
+            int * q
+
+        radius = numpy.asarray(radius, dtype=numpy.float64) + 0.5 * self.skin
+        candidates = self.grid.pairs(pos, radius)
+        count = candidates.shape[0]
+
+        if count > self.neighbour_alloc:
+            q = <int *>realloc(self.neighbours, count * sizeof(int))
+            if q == NULL:
+                raise MemoryError("\nCannot allocate the neighbour lists.")
+            self.neighbours = q
+            self.neighbour_alloc = count
+
+        # Compressed rows, the neighbours of i are neighbours[first[i]:first[i + 1]]
+        with nogil:
+            for i in range(b.length + 1):
+                self.first[i] = 0
+            for k in range(count):
+                self.first[candidates[k, 0] + 1] += 1
+                self.neighbours[k] = candidates[k, 1]
+            for i in range(b.length):
+                self.first[i + 1] += self.first[i]
+                self.x0[i] = b.x[i]
+                self.y0[i] = b.y[i]
+                self.r0[i] = b.r[i]
+        self.length = b.length
+        self.rebuilds += 1
+        return 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int search(self) noexcept nogil:
+        """
+        TEST THE STORED NEIGHBOURS AND COLLECT THE OVERLAPPING PAIRS
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t i, k
+            int j
+
+        self.buffer.length = 0
+        for i in range(self.length):
+            for k in range(self.first[i], self.first[i + 1]):
+                j = self.neighbours[k]
+                if overlap(b, i, j):
+                    if pair_push(&self.buffer, <int>i, j) < 0:
+                        return -1
+        return 0
+
+    def remap(self, object order):
+        """
+        FOLLOW A NEW BODY ORDER (see morton_order), THE LISTS ARE REBUILT AT THE NEXT CALL
+
+        :param order: numpy.ndarray shape (N,) integer; order[new] = former index
+        :return: void
+        """
+        remap_inverse(order, max(self.length, 0))
+        self.length = -1
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        cdef int status
+
+        body_load(&self.bodies, pos, radius)
+        self.reserve(self.bodies.length)
+
+        with nogil:
+            self.rebuilt = self.stale()
+        if self.rebuilt:
+            self.rebuild(pos, radius)
+
+        with nogil:
+            status = self.search()
+        if status < 0:
+            raise MemoryError("\nCannot allocate the pair buffer.")
+        return pair_array(&self.buffer)
+
+
+# **************************** CELL LIST (FUNCTION) ***********************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef object cell_list_pairs(
+        real_t [:, ::1] pos,
+        real_t [::1] radius,
+        double cell_size = 0.0):
+    """
+    RETURN THE PAIRS OF OVERLAPPING BODIES (CELL LIST, SINGLE CALL)
+
+    The bounding box of the bodies is divided into a dense grid of cells, the bodies
+    are sorted by cell (counting sort) and each body is only tested against the bodies
+    of the cells within its reach. The whole search is running without the GIL and the
+    result is a single array, no Python object is created per pair.
+
+    * By default the cell size is the largest diameter (a body only visits the 9 cells
+      around it). The cell size is doubled when the grid would have more than 4 cells
+      per body (sparse scene), a few bodies far away from the others enlarge the cells
+      (SpatialHash hashes the cells and has no such limit).
+
+    * The pairs (i, j) are sorted with i < j, the array can be passed straight to
+      ec_game.resolve_pairs(pos, vel, mass, pairs).
+
+    :param pos      : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    :param radius   : numpy.ndarray shape (N,) same dtype contiguous; bodies radii
+    :param cell_size: float; cell size in pixels (default 0.0, largest diameter)
+    :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t i, k, c, cells, nx = 0, ny = 0
+        int j, cx, cy, gx, gy, reach, x_start, x_end, y_start, y_end
+        double x_min, y_min, x_max, y_max, r_max = 0.0, cell, inv, dx, dy, s
+        int * start = NULL
+        int * items = NULL
+        int * cell_of = NULL
+        pair_buffer buffer
+        int status = 0
+
+    if pos.shape[1] != 2:
+        raise ValueError("\nArgument pos must be an array with shape (N, 2), "
+                         "got (%s, %s) " % (pos.shape[0], pos.shape[1]))
+    if radius.shape[0] != n:
+        raise ValueError("\nArguments pos and radius must have the same length, "
+                         "got %s and %s " % (n, radius.shape[0]))
+    if cell_size < 0.0:
+        raise ValueError("\nArgument cell_size must be >= 0.0, got %s " % cell_size)
+
+    buffer.length = 0
+    buffer.capacity = 0
+    buffer.data = NULL
+    if n < 2:
+        return pair_array(&buffer)
+
+    with nogil:
+        x_min = x_max = pos[0, 0]
+        y_min = y_max = pos[0, 1]
+        for i in range(n):
+            x_min = min(x_min, <double>pos[i, 0])
+            x_max = max(x_max, <double>pos[i, 0])
+            y_min = min(y_min, <double>pos[i, 1])
+            y_max = max(y_max, <double>pos[i, 1])
+            r_max = max(r_max, <double>radius[i])
+
+        cell = cell_size
+        if cell == 0.0:
+            cell = 2.0 * r_max if r_max > 0.0 else 1.0
+        while True:
+            nx = <Py_ssize_t>((x_max - x_min) / cell) + 1
+            ny = <Py_ssize_t>((y_max - y_min) / cell) + 1
+            if <double>nx * <double>ny <= max(4.0 * n, 64.0):
+                break
+            cell *= 2.0
+        cells = nx * ny
+        inv = 1.0 / cell
+
+        start = <int *>malloc((cells + 1) * sizeof(int))
+        items = <int *>malloc(n * sizeof(int))
+        cell_of = <int *>malloc(n * sizeof(int))
+        if start == NULL or items == NULL or cell_of == NULL:
+            status = -1
+        else:
+            # Counting sort of the bodies by cell
+            for c in range(cells + 1):
+                start[c] = 0
+            for i in range(n):
+                cx = min(<int>((pos[i, 0] - x_min) * inv), <int>nx - 1)
+                cy = min(<int>((pos[i, 1] - y_min) * inv), <int>ny - 1)
+                cell_of[i] = cy * <int>nx + cx
+                start[cell_of[i] + 1] += 1
+            for c in range(cells):
+                start[c + 1] += start[c]
+            for i in range(n):
+                items[start[cell_of[i]]] = <int>i
+                start[cell_of[i]] += 1
+            # start[c] is now the end of the cell c, shift back
+            for c in range(cells, 0, -1):
+                start[c] = start[c - 1]
+            start[0] = 0
+
+            for i in range(n):
+                cx = cell_of[i] % <int>nx
+                cy = cell_of[i] // <int>nx
+                reach = <int>ceil((radius[i] + r_max) * inv)
+                x_start = max(cx - reach, 0)
+                x_end = min(cx + reach, <int>nx - 1)
+                y_start = max(cy - reach, 0)
+                y_end = min(cy + reach, <int>ny - 1)
+                for gy in range(y_start, y_end + 1):
+                    for gx in range(x_start, x_end + 1):
+                        c = gy * nx + gx
+                        for k in range(start[c], start[c + 1]):
+                            j = items[k]
+                            if j <= i:
+                                continue
+                            dx = <double>pos[i, 0] - <double>pos[j, 0]
+                            dy = <double>pos[i, 1] - <double>pos[j, 1]
+                            s = <double>radius[i] + <double>radius[j]
+                            if dx * dx + dy * dy <= s * s:
+                                if pair_push(&buffer, <int>i, j) < 0:
+                                    status = -1
+                                    break
+                        if status < 0:
+                            break
+                    if status < 0:
+                        break
+                if status < 0:
+                    break
+
+        free(start)
+        free(items)
+        free(cell_of)
+
+    if status < 0:
+        free(buffer.data)
+        raise MemoryError("\nCannot allocate the cell list.")
+    try:
+        return pair_array(&buffer)
+    finally:
+        free(buffer.data)
+
+
+# **************************** HIERARCHICAL GRID **************************************
+
+DEF HG_LEVELS = 32
+
+
+cdef inline Py_ssize_t level_hash(int level, long long cx, long long cy, Py_ssize_t mask) noexcept nogil:
+    """
+    HASH THE CELL (level, cx, cy) INTO A BUCKET NUMBER (mask = buckets - 1)
+    """
+    return <Py_ssize_t>(((<unsigned long long>cx * <unsigned long long>73856093) ^
+                         (<unsigned long long>cy * <unsigned long long>19349663) ^
+                         (<unsigned long long>level * <unsigned long long>83492791)) &
+                        <unsigned long long>mask)
+
+
+cdef class HierarchicalGrid(SpatialHash):
+    """
+    HIERARCHICAL GRID BROADPHASE FOR POLYDISPERSE BODIES (MULTI-LEVEL SPATIAL HASH)
+
+    The level L has a cell size of base * 2 ** L, by default base is the smallest
+    diameter. Each body is stored on the first level whose cells are larger than its
+    diameter, large obstacles, balls and debris all get cells matching their size.
+    A body is tested against the bodies of its own level and of the coarser levels
+    only (9 cells per occupied level), the smaller bodies find the pair with their own
+    query. The cost stays near-linear with a 100:1 radius ratio.
+
+    The cells of all the levels share the same hash table, the buffers are kept
+    between calls.
+
+    e.g:
+        grid = HierarchicalGrid()
+        pairs = grid.pairs(centre, radius)
+    """
+    cdef:
+        readonly int levels
+        int * level
+        Py_ssize_t level_alloc
+        double level_r_max[HG_LEVELS]
+
+    def __cinit__(self):
+        self.level = NULL
+        self.level_alloc = 0
+        self.levels = 0
+
+    def __init__(self, double cell_size = 0.0):
+        """
+        :param cell_size: float; cell size of the finest level in pixels (default 0.0,
+            the smallest diameter found at each call)
+        """
+        if cell_size < 0.0:
+            raise ValueError("\nArgument cell_size must be >= 0.0, got %s " % cell_size)
+        self.fixed_size = cell_size
+        self.cell_size = cell_size
+
+    def __dealloc__(self):
+        free(self.level)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    @cython.cdivision(True)
+    cdef int search(self) noexcept nogil:
+        """
+        BUILD THE LEVELS AND COLLECT THE OVERLAPPING PAIRS INTO THE PAIR BUFFER
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t n = b.length
+            Py_ssize_t mask = self.buckets - 1
+            Py_ssize_t i, k, h, total
+            int j, L, Li, reach, dx, dy
+            long long cx, cy
+            double cell, inv
+            double inv_level[HG_LEVELS]
+
+        self.buffer.length = 0
+        self.levels = 0
+        for L in range(HG_LEVELS):
+            self.level_r_max[L] = -1.0
+            inv_level[L] = 1.0 / (self.cell_size * (<double>(1ULL << L)))
+
+        # Level of each body (first level with cells larger than the diameter)
+        for i in range(n):
+            L = 0
+            cell = self.cell_size
+            while cell < 2.0 * b.r[i] and L < HG_LEVELS - 1:
+                cell *= 2.0
+                L += 1
+            self.level[i] = L
+            if b.r[i] > self.level_r_max[L]:
+                if self.level_r_max[L] < 0.0:
+                    self.levels += 1
+                self.level_r_max[L] = b.r[i]
+
+        # Counting sort of the bodies by bucket
+        for h in range(self.buckets + 1):
+            self.start[h] = 0
+        for i in range(n):
+            L = self.level[i]
+            h = level_hash(L, <long long>floor(b.x[i] * inv_level[L]),
+                           <long long>floor(b.y[i] * inv_level[L]), mask)
+            self.bucket[i] = <int>h
+            self.start[h + 1] += 1
+        total = 0
+        for h in range(self.buckets):
+            total += self.start[h + 1]
+            self.start[h + 1] = <int>total
+        for h in range(self.buckets):
+            self.stamp[h] = self.start[h]
+        for i in range(n):
+            h = self.bucket[i]
+            self.items[self.stamp[h]] = <int>i
+            self.stamp[h] += 1
+        for h in range(self.buckets):
+            self.stamp[h] = -1
+
+        for i in range(n):
+            Li = self.level[i]
+            for L in range(Li, HG_LEVELS):
+                if self.level_r_max[L] < 0.0:
+                    continue
+                inv = inv_level[L]
+                cx = <long long>floor(b.x[i] * inv)
+                cy = <long long>floor(b.y[i] * inv)
+                reach = <int>ceil((b.r[i] + self.level_r_max[L]) * inv)
+                for dy in range(-reach, reach + 1):
+                    for dx in range(-reach, reach + 1):
+                        h = level_hash(L, cx + dx, cy + dy, mask)
+                        if self.stamp[h] == i:
+                            continue
+                        self.stamp[h] = <int>i
+                        for k in range(self.start[h], self.start[h + 1]):
+                            j = self.items[k]
+                            # Finer bodies run their own query, same level kept once
+                            if self.level[j] < Li or (self.level[j] == Li and j <= i):
+                                continue
+                            if overlap(b, i, j):
+                                if pair_push(&self.buffer, <int>min(i, j), <int>max(i, j)) < 0:
+                                    return -1
+        return 0
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        cdef:
+            body_table * b = &self.bodies
+            Py_ssize_t i
+            double r_min = 0.0
+            int * p
+            int status
+
+        body_load(b, pos, radius)
+        self.reserve(b.length)
+        if b.length > self.level_alloc:
+            p = <int *>realloc(self.level, b.length * sizeof(int))
+            if p == NULL:
+                raise MemoryError("\nCannot allocate the grid levels.")
+            self.level = p
+            self.level_alloc = b.length
+
+        self.cell_size = self.fixed_size
+        if self.cell_size == 0.0:
+            # Smallest positive diameter
+            for i in range(b.length):
+                if b.r[i] > 0.0 and (r_min == 0.0 or b.r[i] < r_min):
+                    r_min = b.r[i]
+            self.cell_size = 2.0 * r_min if r_min > 0.0 else 1.0
+
+        with nogil:
+            status = self.search()
+        if status < 0:
+            raise MemoryError("\nCannot allocate the pair buffer.")
+        return pair_array(&self.buffer)
+
+
+# **************************** MORTON ORDER *******************************************
+
+# Body Morton code and index (qsort)
+cdef struct morton_key:
+    unsigned long long code
+    int index
+
+
+cdef int morton_compare(const void * a, const void * b) noexcept nogil:
+    """
+    ORDER TWO BODIES BY MORTON CODE (THEN BY INDEX), qsort comparison function
+    """
+    cdef:
+        const morton_key * p = <const morton_key *>a
+        const morton_key * q = <const morton_key *>b
+    if p.code != q.code:
+        return -1 if p.code < q.code else 1
+    return -1 if p.index < q.index else (1 if p.index > q.index else 0)
+
+
+cdef inline unsigned long long spread_bits(unsigned long long v) noexcept nogil:
+    """
+    INSERT A ZERO BIT BETWEEN EACH OF THE 32 LOW BITS OF v (MORTON INTERLEAVING)
+    """
+    v &= 0xFFFFFFFFULL
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFFULL
+    v = (v | (v << 8))  & 0x00FF00FF00FF00FFULL
+    v = (v | (v << 4))  & 0x0F0F0F0F0F0F0F0FULL
+    v = (v | (v << 2))  & 0x3333333333333333ULL
+    v = (v | (v << 1))  & 0x5555555555555555ULL
+    return v
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef object morton_order(real_t [:, ::1] pos, double cell_size = 0.0):
+    """
+    RETURN THE BODY ORDER FOLLOWING THE MORTON CODE (Z-CURVE) OF THEIR CELL
+
+    Bodies close in space are close on the Z-curve. Re-ordering the body arrays with
+    this order every few hundred frames keeps neighbouring bodies close in memory and
+    the broadphase & solver gathers hit the cache.
+
+    * order[new] is the former index of the body placed at row new, the arrays are
+      re-ordered with array[order] and a former index old becomes inverse[old] with
+      inverse[order] = numpy.arange(N). The broadphase classes follow the new order
+      with their method remap(order).
+
+    * By default the cells are 1/65536 of the bodies extent, cell_size can be set to the
+      broadphase cell size (bodies of the same cell keep their relative order).
+
+    :param pos      : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    :param cell_size: float; cell size in pixels (default 0.0, extent / 65536)
+    :return: numpy.ndarray shape (N,) int32; order[new] = former index
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t i
+        double x_min, y_min, x_max, y_max, inv, u, v
+        morton_key * keys
+        int [::1] order_view
+
+    if pos.shape[1] != 2:
+        raise ValueError("\nArgument pos must be an array with shape (N, 2), "
+                         "got (%s, %s) " % (pos.shape[0], pos.shape[1]))
+    if cell_size < 0.0:
+        raise ValueError("\nArgument cell_size must be >= 0.0, got %s " % cell_size)
+
+    order = numpy.empty(n, dtype=numpy.int32)
+    if n == 0:
+        return order
+    order_view = order
+
+    keys = <morton_key *>malloc(n * sizeof(morton_key))
+    if keys == NULL:
+        raise MemoryError("\nCannot allocate the Morton codes.")
+
+    with nogil:
+        x_min = x_max = pos[0, 0]
+        y_min = y_max = pos[0, 1]
+        for i in range(n):
+            x_min = min(x_min, <double>pos[i, 0])
+            x_max = max(x_max, <double>pos[i, 0])
+            y_min = min(y_min, <double>pos[i, 1])
+            y_max = max(y_max, <double>pos[i, 1])
+
+        if cell_size > 0.0:
+            inv = 1.0 / cell_size
+        else:
+            inv = 65535.0 / max(max(x_max - x_min, y_max - y_min), 1e-12)
+
+        for i in range(n):
+            u = min((<double>pos[i, 0] - x_min) * inv, 4294967295.0)
+            v = min((<double>pos[i, 1] - y_min) * inv, 4294967295.0)
+            keys[i].code = spread_bits(<unsigned long long>u) | \
+                (spread_bits(<unsigned long long>v) << 1)
+            keys[i].index = <int>i
+
+        qsort(keys, n, sizeof(morton_key), morton_compare)
+        for i in range(n):
+            order_view[i] = keys[i].index
+    free(keys)
+    return order
+
+
+# **************************** PARALLEL STRIPS ****************************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef int strip_search(
+        double * x, double * y, double * r, int * order, int * first, int * strip_of,
+        int t, int strips, double r_max, double core_x0, double core_x1, double margin,
+        pair_buffer * pairs) noexcept nogil:
+    """
+    COLLECT THE PAIRS OWNED BY STRIP t (CELL LIST OVER THE STRIP)
+
+    The bodies are bucketed by strip (order[first[t]:first[t + 1]] are the bodies of
+    strip t). The strip holds its own bodies plus the bodies of the two neighbour
+    strips with a centre in [core_x0 - margin, core_x1 + margin]. A pair (a, b) with
+    a < b is reported by the strip of a; margin >= 2 * r_max and the strips are not
+    narrower than the margin, every partner of a is inside the strip and each pair
+    is reported once.
+
+    :return: 0 or -1 (out of memory)
+    """
+    cdef:
+        Py_ssize_t i, k, c, m = 0, cells, nx, ny, lo, hi
+        int a, b, cx, cy, gx, gy, reach, x_start, x_end, y_start, y_end
+        double x_min, x_max, y_min = 0.0, y_max = 0.0, cell, inv, dx, dy, s
+        int * members = NULL
+        int * start = NULL
+        int * items = NULL
+        int * cell_of = NULL
+        int status = 0
+
+    x_min = core_x0 - margin
+    x_max = core_x1 + margin
+    lo = first[max(t - 1, 0)]
+    hi = first[min(t + 2, strips)]
+
+    members = <int *>malloc(max(hi - lo, 1) * sizeof(int))
+    if members == NULL:
+        return -1
+    for k in range(lo, hi):
+        a = order[k]
+        if strip_of[a] == t or x_min <= x[a] <= x_max:
+            if m == 0:
+                y_min = y_max = y[a]
+            else:
+                y_min = min(y_min, y[a])
+                y_max = max(y_max, y[a])
+            members[m] = a
+            m += 1
+    if m < 2:
+        free(members)
+        return 0
+
+    # Bodies outside the domain belong to the first or the last strip
+    x_min = x_max = x[members[0]]
+    for k in range(m):
+        x_min = min(x_min, x[members[k]])
+        x_max = max(x_max, x[members[k]])
+
+    cell = 2.0 * r_max if r_max > 0.0 else 1.0
+    while True:
+        nx = <Py_ssize_t>((x_max - x_min) / cell) + 1
+        ny = <Py_ssize_t>((y_max - y_min) / cell) + 1
+        if <double>nx * <double>ny <= max(4.0 * m, 64.0):
+            break
+        cell *= 2.0
+    cells = nx * ny
+    inv = 1.0 / cell
+
+    start = <int *>malloc((cells + 1) * sizeof(int))
+    items = <int *>malloc(m * sizeof(int))
+    cell_of = <int *>malloc(m * sizeof(int))
+    if start == NULL or items == NULL or cell_of == NULL:
+        status = -1
+    else:
+        # Counting sort of the strip bodies by cell (items holds strip positions)
+        for c in range(cells + 1):
+            start[c] = 0
+        for k in range(m):
+            a = members[k]
+            cx = min(<int>((x[a] - x_min) * inv), <int>nx - 1)
+            cy = min(<int>((y[a] - y_min) * inv), <int>ny - 1)
+            cell_of[k] = cy * <int>nx + cx
+            start[cell_of[k] + 1] += 1
+        for c in range(cells):
+            start[c + 1] += start[c]
+        for k in range(m):
+            items[start[cell_of[k]]] = <int>k
+            start[cell_of[k]] += 1
+        for c in range(cells, 0, -1):
+            start[c] = start[c - 1]
+        start[0] = 0
+
+        for k in range(m):
+            a = members[k]
+            # Only the strip bodies own pairs
+            if strip_of[a] != t:
+                continue
+            cx = cell_of[k] % <int>nx
+            cy = cell_of[k] // <int>nx
+            reach = <int>ceil((r[a] + r_max) * inv)
+            x_start = max(cx - reach, 0)
+            x_end = min(cx + reach, <int>nx - 1)
+            y_start = max(cy - reach, 0)
+            y_end = min(cy + reach, <int>ny - 1)
+            for gy in range(y_start, y_end + 1):
+                for gx in range(x_start, x_end + 1):
+                    c = gy * nx + gx
+                    for i in range(start[c], start[c + 1]):
+                        b = members[items[i]]
+                        if b <= a:
+                            continue
+                        dx = x[a] - x[b]
+                        dy = y[a] - y[b]
+                        s = r[a] + r[b]
+                        if dx * dx + dy * dy <= s * s:
+                            if pair_push(pairs, a, b) < 0:
+                                status = -1
+                                break
+                    if status < 0:
+                        break
+                if status < 0:
+                    break
+            if status < 0:
+                break
+
+    free(members)
+    free(start)
+    free(items)
+    free(cell_of)
+    return status
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef object strip_pairs(
+        real_t [:, ::1] pos,
+        real_t [::1] radius,
+        object lower = None,
+        object upper = None,
+        int strips = 0,
+        int threads = 0):
+    """
+    RETURN THE PAIRS OF OVERLAPPING BODIES (PARALLEL VERTICAL STRIPS)
+
+    The domain lower[0] ... upper[0] is split into vertical strips, each strip is
+    extended by an overlap margin of 2 * r_max on both sides and searched with a cell
+    list by an OpenMP thread without the GIL. A pair is kept by the strip holding the
+    centre of its lowest index body, the pairs found in two strips (boundary pairs)
+    are reported once. The strip lists are merged and sorted.
+
+    * lower & upper are the domain corners (x, y) e.g LOWER & UPPER of the simulation,
+      only the x coordinates are used. The bodies bounding box is used when None, the
+      bodies outside the domain are handled by the first and the last strips.
+
+    * strips = 0 uses 4 strips per thread (load balance), the strips are never narrower
+      than the margin. threads = 0 uses all the cores.
+
+    :param pos    : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    :param radius : numpy.ndarray shape (N,) same dtype contiguous; bodies radii
+    :param lower  : tuple (x, y) or None; domain top left corner
+    :param upper  : tuple (x, y) or None; domain bottom right corner
+    :param strips : integer; number of strips (default 0, 4 strips per thread)
+    :param threads: integer; number of threads (default 0, os.cpu_count())
+    :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t i, k, total = 0, offset = 0
+        int t, status = 0
+        double x_lo, x_hi, r_max = 0.0, width, margin
+        double * x = NULL
+        double * y = NULL
+        double * r = NULL
+        int * order = NULL
+        int * first = NULL
+        int * strip_of = NULL
+        pair_buffer * buffers = NULL
+        int * statuses = NULL
+        int [:, ::1] out_view
+
+    if pos.shape[1] != 2:
+        raise ValueError("\nArgument pos must be an array with shape (N, 2), "
+                         "got (%s, %s) " % (pos.shape[0], pos.shape[1]))
+    if radius.shape[0] != n:
+        raise ValueError("\nArguments pos and radius must have the same length, "
+                         "got %s and %s " % (n, radius.shape[0]))
+    if strips < 0 or threads < 0:
+        raise ValueError("\nArguments strips and threads must be >= 0, "
+                         "got %s and %s " % (strips, threads))
+
+    if threads == 0:
+        threads = <int>(os.cpu_count() or 1)
+    if n < 2:
+        return numpy.empty((0, 2), dtype=numpy.int32)
+
+    x = <double *>malloc(n * sizeof(double))
+    y = <double *>malloc(n * sizeof(double))
+    r = <double *>malloc(n * sizeof(double))
+    order = <int *>malloc(n * sizeof(int))
+    strip_of = <int *>malloc(n * sizeof(int))
+    if x == NULL or y == NULL or r == NULL or order == NULL or strip_of == NULL:
+        free(x)
+        free(y)
+        free(r)
+        free(order)
+        free(strip_of)
+        raise MemoryError("\nCannot allocate the strips.")
+
+    with nogil:
+        x_lo = x_hi = pos[0, 0]
+        for i in range(n):
+            x[i] = <double>pos[i, 0]
+            y[i] = <double>pos[i, 1]
+            r[i] = <double>radius[i]
+            r_max = max(r_max, r[i])
+            x_lo = min(x_lo, x[i])
+            x_hi = max(x_hi, x[i])
+
+    if lower is not None:
+        x_lo = <double>lower[0]
+    if upper is not None:
+        x_hi = <double>upper[0]
+    if x_hi < x_lo:
+        free(x)
+        free(y)
+        free(r)
+        free(order)
+        free(strip_of)
+        raise ValueError("\nArgument upper must be on the right of lower, "
+                         "got %s and %s " % (upper, lower))
+
+    # The margin is widened by a rounding slack, the strips are not narrower than it
+    margin = 2.0 * r_max + 1e-9 * (abs(x_lo) + abs(x_hi) + 1.0)
+    if strips == 0:
+        strips = 4 * threads
+    strips = max(1, min(strips, <int>((x_hi - x_lo) / margin)))
+    width = (x_hi - x_lo) / strips
+
+    buffers = <pair_buffer *>calloc(strips, sizeof(pair_buffer))
+    statuses = <int *>calloc(strips, sizeof(int))
+    first = <int *>calloc(strips + 1, sizeof(int))
+    if buffers == NULL or statuses == NULL or first == NULL:
+        status = -1
+    else:
+        with nogil:
+            # Counting sort of the bodies by strip
+            for i in range(n):
+                t = <int>floor((x[i] - x_lo) / width) if width > 0.0 else 0
+                strip_of[i] = min(max(t, 0), strips - 1)
+                first[strip_of[i] + 1] += 1
+            for t in range(strips):
+                first[t + 1] += first[t]
+            for i in range(n):
+                order[first[strip_of[i]]] = <int>i
+                first[strip_of[i]] += 1
+            for t in range(strips, 0, -1):
+                first[t] = first[t - 1]
+            first[0] = 0
+
+            for t in prange(strips, schedule='dynamic', num_threads=threads):
+                statuses[t] = strip_search(
+                    x, y, r, order, first, strip_of, t, strips, r_max,
+                    x_lo + t * width, x_lo + (t + 1) * width, margin, &buffers[t])
+        for t in range(strips):
+            if statuses[t] < 0:
+                status = -1
+            total += buffers[t].length
+
+    free(x)
+    free(y)
+    free(r)
+    free(order)
+    free(strip_of)
+    free(first)
+    if status < 0:
+        if buffers != NULL:
+            for t in range(strips):
+                free(buffers[t].data)
+        free(buffers)
+        free(statuses)
+        raise MemoryError("\nCannot allocate the strips.")
+
+    # Merge the strip lists
+    out = numpy.empty((total, 2), dtype=numpy.int32)
+    out_view = out
+    with nogil:
+        for t in range(strips):
+            if buffers[t].length > 0:
+                memcpy(&out_view[offset, 0], buffers[t].data,
+                       2 * buffers[t].length * sizeof(int))
+                offset += buffers[t].length
+            free(buffers[t].data)
+        if total > 0:
+            qsort(&out_view[0, 0], total, 2 * sizeof(int), pair_compare)
+    free(buffers)
+    free(statuses)
+    return out
+
+
+cdef class StripBroadphase:
+    """
+    PARALLEL STRIPS BROADPHASE (see strip_pairs)
+
+    Object version of strip_pairs with the same interface than the other broadphase
+    classes, e.g Collision(StripBroadphase(LOWER, UPPER)). Nothing is kept between the
+    calls.
+
+    e.g:
+        strips = StripBroadphase((0, 0), (1024, 1024))
+        pairs = strips.pairs(centre, radius)
+    """
+    cdef:
+        readonly object lower
+        readonly object upper
+        readonly int strips
+        readonly int threads
+        Py_ssize_t length
+
+    def __init__(self, object lower = None, object upper = None, int strips = 0, int threads = 0):
+        """
+        :param lower  : tuple (x, y) or None; domain top left corner
+        :param upper  : tuple (x, y) or None; domain bottom right corner
+        :param strips : integer; number of strips (default 0, 4 strips per thread)
+        :param threads: integer; number of threads (default 0, os.cpu_count())
+        """
+        if strips < 0 or threads < 0:
+            raise ValueError("\nArguments strips and threads must be >= 0, "
+                             "got %s and %s " % (strips, threads))
+        self.lower = lower
+        self.upper = upper
+        self.strips = strips
+        self.threads = threads
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def remap(self, object order):
+        """
+        FOLLOW A NEW BODY ORDER (see morton_order), NOTHING IS KEPT BETWEEN THE CALLS
+
+        :param order: numpy.ndarray shape (N,) integer; order[new] = former index
+        :return: void
+        """
+        remap_inverse(order, self.length)
+
+    cpdef object pairs(self, object pos, object radius):
+        """
+        RETURN THE PAIRS OF OVERLAPPING BODIES
+
+        :param pos   : numpy.ndarray shape (N, 2) float32 or float64; body centres
+        :param radius: numpy.ndarray shape (N, ); body radii
+        :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+        """
+        pos = numpy.ascontiguousarray(pos)
+        if pos.dtype == numpy.float64:
+            pairs = strip_pairs[double](
+                pos, numpy.ascontiguousarray(radius, dtype=numpy.float64),
+                self.lower, self.upper, self.strips, self.threads)
+        else:
+            pairs = strip_pairs[float](
+                pos.astype(numpy.float32, copy=False),
+                numpy.ascontiguousarray(radius, dtype=numpy.float32),
+                self.lower, self.upper, self.strips, self.threads)
+        self.length = pos.shape[0]
+        return pairs
+
+
+# **************************** CONTACT CACHE ******************************************
+
+# Contact between two bodies (handles a < b) and its row in the pairs array (qsort)
+cdef struct contact_key:
+    long long a
+    long long b
+    int index
+
+
+cdef int contact_compare(const void * p_, const void * q_) noexcept nogil:
+    """
+    ORDER TWO CONTACTS BY HANDLES (a, b), qsort comparison function
+    """
+    cdef:
+        const contact_key * p = <const contact_key *>p_
+        const contact_key * q = <const contact_key *>q_
+    if p.a != q.a:
+        return -1 if p.a < q.a else 1
+    if p.b != q.b:
+        return -1 if p.b < q.b else 1
+    return 0
+
+
+cdef class ContactCache:
+    """
+    PERSISTENT CONTACT CACHE (BEGIN / PERSIST / END CONTACT STATES)
+
+    Keeps the contacts of the previous frame keyed by body pair handle. update() takes
+    the pairs returned by a broadphase and returns the state of each pair, BEGIN (the
+    bodies were not in contact on the previous frame) or PERSIST. The contacts of the
+    previous frame missing from the pairs have ended. The handle pairs of the contacts
+    that began and ended during the last update are in the attributes began & ended,
+    effects (sound, particles) are triggered once per contact.
+
+    * A solver skips the PERSIST pairs already separating (already resolved), a pair
+      is only resolved again when the bodies keep approaching.
+
+    * The handles identify the bodies from one frame to the next (e.g id(object) or a
+      unique body number), by default the handle is the row index and the cache does
+      not follow a re-ordering of the bodies (see morton_order).
+
+    e.g:
+        contacts = ContactCache()
+        state = contacts.update(broadphase.pairs(centre, radius), handles)
+        for (i, j), s in zip(pairs.tolist(), state.tolist()):
+            if s == ContactCache.BEGIN: ...
+    """
+    BEGIN = 1
+    PERSIST = 2
+
+    cdef:
+        contact_key * keys
+        Py_ssize_t length
+        readonly object began
+        readonly object ended
+
+    def __cinit__(self):
+        self.keys = NULL
+        self.length = 0
+
+    def __init__(self):
+        self.began = numpy.empty((0, 2), dtype=numpy.int64)
+        self.ended = numpy.empty((0, 2), dtype=numpy.int64)
+
+    def __dealloc__(self):
+        free(self.keys)
+
+    def __len__(self):
+        return self.length
+
+    def clear(self):
+        """
+        FORGET THE CONTACTS (ALL THE PAIRS BEGIN ON THE NEXT UPDATE, NO END EVENT)
+
+        :return: void
+        """
+        self.length = 0
+        self.began = numpy.empty((0, 2), dtype=numpy.int64)
+        self.ended = numpy.empty((0, 2), dtype=numpy.int64)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    cpdef object update(self, object pairs, object handles = None):
+        """
+        RECORD THE CONTACTS OF THE FRAME AND RETURN THE STATE OF EACH PAIR
+
+        :param pairs  : numpy.ndarray shape (K, 2) integer; index pairs (e.g broadphase pairs)
+        :param handles: numpy.ndarray shape (N,) integer or None; body handles, the same
+            body keeps the same handle from one frame to the next (default None, row index)
+        :return: numpy.ndarray shape (K,) int8; ContactCache.BEGIN or ContactCache.PERSIST
+        """
+        cdef:
+            int [:, ::1] pair_view = numpy.ascontiguousarray(pairs, dtype=numpy.int32)
+            long long [::1] handle_view
+            Py_ssize_t k, n_pairs = pair_view.shape[0], p = 0, m = 0, b = 0, e = 0
+            long long hi, hj
+            int i, j, c
+            bint indexed = handles is None
+            contact_key * current
+            signed char [::1] state_view
+            long long [:, ::1] began_view
+            long long [:, ::1] ended_view
+
+        if pair_view.shape[1] != 2:
+            raise ValueError("\nArgument pairs must be an array with shape (K, 2), "
+                             "got %s " % (numpy.shape(pairs),))
+        if not indexed:
+            handle_view = numpy.ascontiguousarray(handles, dtype=numpy.int64)
+            for k in range(n_pairs):
+                i = pair_view[k, 0]
+                j = pair_view[k, 1]
+                if i < 0 or j < 0 or i >= handle_view.shape[0] or j >= handle_view.shape[0]:
+                    raise ValueError("\nArgument pairs refers to a body without handle, "
+                                     "got (%s, %s) for %s handles "
+                                     % (i, j, handle_view.shape[0]))
+
+        current = <contact_key *>malloc(max(n_pairs, 1) * sizeof(contact_key))
+        if current == NULL:
+            raise MemoryError("\nCannot allocate the contacts.")
+
+        state = numpy.empty(n_pairs, dtype=numpy.int8)
+        state_view = state
+        began = numpy.empty((n_pairs, 2), dtype=numpy.int64)
+        began_view = began
+        ended = numpy.empty((self.length, 2), dtype=numpy.int64)
+        ended_view = ended
+
+        with nogil:
+            for k in range(n_pairs):
+                if indexed:
+                    hi = pair_view[k, 0]
+                    hj = pair_view[k, 1]
+                else:
+                    hi = handle_view[pair_view[k, 0]]
+                    hj = handle_view[pair_view[k, 1]]
+                current[k].a = min(hi, hj)
+                current[k].b = max(hi, hj)
+                current[k].index = <int>k
+            qsort(current, n_pairs, sizeof(contact_key), contact_compare)
+
+            # Merge walk through the previous (sorted) and the current contacts
+            for k in range(n_pairs):
+                while p < self.length:
+                    c = contact_compare(&self.keys[p], &current[k])
+                    if c >= 0:
+                        break
+                    ended_view[e, 0] = self.keys[p].a
+                    ended_view[e, 1] = self.keys[p].b
+                    e += 1
+                    p += 1
+                if p < self.length and contact_compare(&self.keys[p], &current[k]) == 0:
+                    state_view[current[k].index] = 2
+                    p += 1
+                elif m > 0 and contact_compare(&current[m - 1], &current[k]) == 0:
+                    # Same handle pair listed twice, same state
+                    state_view[current[k].index] = state_view[current[m - 1].index]
+                    continue
+                else:
+                    state_view[current[k].index] = 1
+                    began_view[b, 0] = current[k].a
+                    began_view[b, 1] = current[k].b
+                    b += 1
+                current[m] = current[k]
+                m += 1
+            while p < self.length:
+                ended_view[e, 0] = self.keys[p].a
+                ended_view[e, 1] = self.keys[p].b
+                e += 1
+                p += 1
+
+        free(self.keys)
+        self.keys = current
+        self.length = m
+        self.began = began[:b].copy()
+        self.ended = ended[:e].copy()
+        return state
@@ -0,0 +1,20 @@
+"""
+SETUP EC_BROADPHASE.PYX
+"""
+from distutils.core import setup
+from distutils.extension import Extension
+from Cython.Distutils import build_ext
+from Cython.Build import cythonize
+import numpy
+
+ext_modules = cythonize([
+    Extension("ec_broadphase", ["ec_broadphase.pyx"],
+              extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"],
+              language="c")], include_path=[".."])
+
+setup(
+    name="broadphase",
+    cmdclass={"build_ext": build_ext},
+    ext_modules=ext_modules,
+    include_dirs=[numpy.get_include()]
+)
@@ -0,0 +1,93 @@
+# cython: language_level=3
+"""
+Cython declarations of the ec_game nogil kernels (game domain, Y-axis inverted)
+
+Other extensions can cimport these functions and call them inside their own nogil
+loops, e.g:
+
+    from ElasticCollision.ec_game cimport vector2d, v_struct, get_angle_free_vec
+
+The functions are exported through the module PyCapsule table (ec_game.__pyx_capi__),
+the extension must be compiled with the directory returned by 
+ElasticCollision.get_include() in its include_dirs (vector.h).
+"""
+
+cdef extern from "vector.h":
+
+    struct vector2d:
+        float x
+        float y
+
+    struct v_struct:
+        vector2d vector1
+        vector2d vector2
+
+
+# PAIR STATUS (the kernels do not raise, invalid pairs keep their velocities)
+cdef enum:
+    EC_OK           = 0
+    EC_INVALID_MASS = 1
+    EC_COINCIDENT   = 2
+
+cdef int pair_status(
+        float m1, float m2,
+        float x1x, float x1y,
+        float x2x, float x2y
+)noexcept nogil
+
+
+# TRIGONOMETRY
+cdef v_struct get_momentum_trigonometry_vec(
+        float obj1_cx, float obj1_cy,
+        float obj2_cx, float obj2_cy,
+        vector2d obj1_vec, vector2d obj2_vec,
+        float obj1_mass, float obj2_mass
+)noexcept nogil
+
+# same equations evaluated with dot & cross products (no trigonometric functions)
+cdef v_struct get_momentum_projection_vec(
+        float obj1_cx, float obj1_cy,
+        float obj2_cx, float obj2_cy,
+        vector2d obj1_vec, vector2d obj2_vec,
+        float obj1_mass, float obj2_mass
+)noexcept nogil
+
+cdef vector2d get_v1(
+        float v1_, float v2_,
+        float theta1_, float theta2_,
+        float phi_,
+        float m1_, float m2_
+)noexcept nogil
+
+cdef vector2d get_v2(
+        float v1_, float v2_,
+        float theta1_, float theta2_,
+        float phi_,
+        float m1_, float m2_
+)noexcept nogil
+
+# ANGLE FREE
+cdef vector2d get_v1_angle_free_vec(
+        vector2d v1, vector2d v2,
+        float m1, float m2,
+        vector2d x1, vector2d x2
+)noexcept nogil
+
+cdef vector2d get_v2_angle_free_vec(
+        vector2d v1, vector2d v2,
+        float m1, float m2,
+        vector2d x1, vector2d x2
+)noexcept nogil
+
+cdef v_struct get_angle_free_vec(
+        vector2d v1, vector2d v2,
+        float m1, float m2,
+        vector2d x1, vector2d x2
+)noexcept nogil
+
+# ANGLES
+cdef float vector_length(float x, float y)noexcept nogil
+
+cdef float get_contact_angle(float v1x, float v1y, float v2x, float v2y)noexcept nogil
+
+cdef float get_theta_angle(vector2d vector_)noexcept nogil
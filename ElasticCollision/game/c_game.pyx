@@ -29,6 +29,13 @@ SOFTWARE.
 This unit includes all the hook methods for the external C functions library
 cpdef tuple momentum_angle_free_c
 cpdef tuple momentum_trigonometry_c
+cpdef void momentum_angle_free_c_into
+cpdef void momentum_trigonometry_c_into
+cpdef object momentum_angle_free_c_soa
+cpdef object momentum_trigonometry_c_soa
+cpdef str soa_kernel
+cpdef void set_trig_free
+cpdef bint get_trig_free
 """
 
 
@@ -47,6 +54,13 @@ except ImportError:
 
 from pygame.math import Vector2
 
+try:
+    import numpy
+
+except ImportError:
+    raise ImportError("\n<numpy> library is missing on your system."
+          "\nTry: \n   C:\\pip install numpy on a window command prompt.")
+
 
 # Cython is require
 try:
@@ -56,6 +70,9 @@ except ImportError:
     raise ImportError("\n<cython> library is missing on your system."
           "\nTry: \n   C:\\pip install cython on a window command prompt.")
 
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, \
+    PyBUF_WRITABLE, PyBUF_FORMAT, PyBUF_ANY_CONTIGUOUS
+
 
 cdef extern from '../Source/elastic_collision.c':
 
@@ -92,6 +109,171 @@ cdef extern from '../Source/elastic_collision.c':
 
     collision_vectors momentum_t(collider_object obj1, collider_object obj2)nogil
 
+    struct soa_pairs:
+        int n
+        const float *v1x
+        const float *v1y
+        const float *v2x
+        const float *v2y
+        const float *m1
+        const float *m2
+        const float *x1x
+        const float *x1y
+        const float *x2x
+        const float *x2y
+        float *v12x
+        float *v12y
+        float *v21x
+        float *v21y
+        unsigned char *valid
+
+    int EC_OK
+    int EC_INVALID_MASS
+    int EC_COINCIDENT
+    int collision_status(float m1, float m2, float x1_x, float x1_y, float x2_x, float x2_y)nogil
+
+    const char * soa_init()nogil
+    void momentum_angle_free_soa(const soa_pairs *p)nogil
+    void momentum_t_soa(const soa_pairs *p)nogil
+
+    # C names, the python names are used by the hooks below
+    void c_set_trig_free "set_trig_free"(int enable)nogil
+    int c_get_trig_free "get_trig_free"()nogil
+
+
+# Select the SIMD kernel (avx2, sse2 or c) used by momentum_angle_free_c_soa
+cdef str SOA_KERNEL = soa_init().decode('ascii')
+
+
+cpdef str soa_kernel():
+    """
+    RETURN THE NAME OF THE KERNEL USED BY momentum_angle_free_c_soa
+    
+    The kernel is selected once at import time according to the CPU features
+    
+    :return: string; 'avx2', 'sse2' or 'c' (plain C loop) 
+    """
+    return SOA_KERNEL
+
+
+cpdef void set_trig_free(bint enable):
+    """
+    SELECT THE EVALUATION MODE OF THE TRIGONOMETRIC METHOD (momentum_trigonometry_c*)
+    
+    With enable=True the trigonometric equations are evaluated with dot & cross products
+    (cos(θ - φ), sin(θ - φ), cos(φ) & sin(φ) are never computed with atan2, acos, cos & sin). 
+    The results are identical within the float precision and the speed is close to the 
+    angle free method. The call sites do not change.
+    
+    :param enable: bool; True for the dot & cross products, False for the trigonometric 
+    functions (default)
+    :return: void
+    """
+    c_set_trig_free(enable)
+
+
+cpdef bint get_trig_free():
+    """
+    RETURN TRUE WHEN THE TRIGONOMETRIC METHOD IS EVALUATED WITH DOT & CROSS PRODUCTS
+
+    :return: bool
+    """
+    return c_get_trig_free()
+
+
+cdef int check_status(int status) except -1:
+    """
+    RAISE A VALUEERROR WHEN A PAIR CANNOT BE SOLVED (STATUS RETURNED BY collision_status)
+    
+    :param status: integer; EC_OK, EC_INVALID_MASS or EC_COINCIDENT
+    :return: 0, -1 when an exception is raised
+    """
+    if status == EC_INVALID_MASS:
+        raise ValueError("\nObject's mass should be > 0.0")
+    if status == EC_COINCIDENT:
+        raise ValueError("\nObjects centres cannot be identical (contact normal undefined).")
+    return 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+cdef float [:, ::1] soa_pack(
+        soa_pairs *p,
+        float [::1] v1x, float [::1] v1y,
+        float [::1] v2x, float [::1] v2y,
+        float [::1] m1, float [::1] m2,
+        float [::1] x1x, float [::1] x1y,
+        float [::1] x2x, float [::1] x2y,
+        object out,
+        unsigned char [::1] valid
+):
+    """
+    CHECK THE ARRAYS SIZES AND FILL THE STRUCTURE soa_pairs (POINTERS TO THE ARRAYS DATA)
+    
+    :return: Return the output buffer (4, n) float32
+    """
+    cdef Py_ssize_t n = v1x.shape[0]
+    cdef float [:, ::1] out_
+    cdef float [::1] a
+
+    p.valid = NULL
+    if valid is not None:
+        if valid.shape[0] != n:
+            raise ValueError("\nArgument valid must be a uint8 array with shape (%s,), got (%s,)."
+                             % (n, valid.shape[0]))
+        if n > 0:
+            p.valid = &valid[0]
+
+    for a in (v1y, v2x, v2y, m1, m2, x1x, x1y, x2x, x2y):
+        if a.shape[0] != n:
+            raise ValueError("\nAll the arrays must have the same length, got %s and %s."
+                             % (n, a.shape[0]))
+
+    if out is None:
+        out = numpy.empty((4, n), dtype=numpy.float32)
+    out_ = out
+    if out_.shape[0] != 4 or out_.shape[1] != n:
+        raise ValueError("\nArgument out must be a float32 array with shape (4, %s), got (%s, %s)."
+                         % (n, out_.shape[0], out_.shape[1]))
+    if n == 0:
+        p.n = 0
+        return out_
+
+    p.n    = <int>n
+    p.v1x  = &v1x[0]
+    p.v1y  = &v1y[0]
+    p.v2x  = &v2x[0]
+    p.v2y  = &v2y[0]
+    p.m1   = &m1[0]
+    p.m2   = &m2[0]
+    p.x1x  = &x1x[0]
+    p.x1y  = &x1y[0]
+    p.x2x  = &x2x[0]
+    p.x2y  = &x2y[0]
+    p.v12x = &out_[0, 0]
+    p.v12y = &out_[1, 0]
+    p.v21x = &out_[2, 0]
+    p.v21y = &out_[3, 0]
+    return out_
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+cdef void soa_invert(float [:, ::1] out_):
+    """
+    Y-AXIS INVERSION OF THE RESULTANT VECTORS (ROWS 1 AND 3)
+    
+    Both methods are symmetric with respect to the x-axis, solving the pairs with
+    the y components inverted is equivalent to inverting the y components of the solution
+    """
+    cdef Py_ssize_t i
+    with nogil:
+        for i in range(out_.shape[1]):
+            out_[1, i] = -out_[1, i]
+            out_[3, i] = -out_[3, i]
+
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -145,6 +327,7 @@ cpdef tuple momentum_angle_free_c(
         v2_y *=-<float>1.0
         x1_y *=-<float>1.0
         x2_y *=-<float>1.0
+    check_status(collision_status(m1, m2, x1_x, x1_y, x2_x, x2_y))
     cdef:
         collision_vectors v = \
             momentum_angle_free(v1_x, v1_y, v2_x, v2_y, m1, m2, x1_x, x1_y, x2_x, x2_y)
@@ -213,6 +396,8 @@ cpdef tuple momentum_trigonometry_c(
         x1y *= -<float> 1.0
         x2y *= -<float> 1.0
 
+    check_status(collision_status(m1, m2, x1x, x1y, x2x, x2y))
+
     with nogil:
         vecinit(&v1, v1x, v1y)
         vecinit(&v2, v2x, v2y)
@@ -235,5 +420,254 @@ cpdef tuple momentum_trigonometry_c(
     return Vector2(vector1.x, vector1.y), Vector2(vector2.x, vector2.y)
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_angle_free_c_into(
+        float v1_x, float v1_y,
+        float v2_x, float v2_y,
+        float m1, float m2,
+        float x1_x, float x1_y,
+        float x2_x, float x2_y,
+        object out,
+        bint invert=False
+):
+    """
+    WRITE VECTORS V1 & V2 AFTER OBJECT COLLISION INTO A BUFFER (ANGLE FREE METHOD)
+    
+    Same than momentum_angle_free_c but the result is written into the caller buffer 
+    <out> as (v1.x, v1.y, v2.x, v2.y), no tuple or Vector2 is created.
+    
+    :param v1_x: float; object 1 velocity along the x-axis
+    :param v1_y: float; object 1 velocity along the y-axis
+    :param v2_x: float; object 2 velocity along the x-axis
+    :param v2_y: float; object 2 velocity along the y-axis
+    :param m1  : float; mass for object1 in kg
+    :param m2  : float; mass for object2 in kg
+    :param x1_x: float; object 1 centre position x coordinate
+    :param x1_y: float; object 1 centre position y coordinate
+    :param x2_x: float; object 2 centre position x coordinate
+    :param x2_y: float; object 2 centre position y coordinate
+    :param out : float32 writable contiguous buffer (numpy.ndarray, array.array('f') etc) 
+    of length >= 4; receive v1.x, v1.y, v2.x, v2.y
+    :param invert: Y-axis inversion | if True convert the model 
+    to a cartesian coordinate system
+    :return: void
+    """
+    if invert:
+        v1_y = -v1_y
+        v2_y = -v2_y
+        x1_y = -x1_y
+        x2_y = -x2_y
+
+    check_status(collision_status(m1, m2, x1_x, x1_y, x2_x, x2_y))
+    write_buffer(out, momentum_angle_free(
+        v1_x, v1_y, v2_x, v2_y, m1, m2, x1_x, x1_y, x2_x, x2_y))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_trigonometry_c_into(
+        float v1x, float v1y,
+        float m1,
+        float x1x, float x1y,
+        float v2x, float v2y,
+        float m2,
+        float x2x, float x2y,
+        object out,
+        bint invert=False
+):
+    """
+    WRITE VECTORS V1 & V2 AFTER OBJECT COLLISION INTO A BUFFER (TRIGONOMETRY)
+    
+    Same than momentum_trigonometry_c but the result is written into the caller buffer 
+    <out> as (v1.x, v1.y, v2.x, v2.y), no tuple or Vector2 is created.
+    
+    :param v1x : float, object 1 velocity along the x-axis
+    :param v1y : float, object 1 velocity along the y-axis
+    :param m1  : float, mass for object1 in kg
+    :param x1x : float, object 1 centre position x coordinate
+    :param x1y : float, object 1 centre position y coordinate
+    :param v2x : float, object 2 velocity along the x-axis
+    :param v2y : float, object 2 velocity along the y-axis
+    :param m2  : float, mass for object2 in kg
+    :param x2x : float, object 2 centre position x coordinate
+    :param x2y : float, object 2 centre position y coordinate
+    :param out : float32 writable contiguous buffer (numpy.ndarray, array.array('f') etc) 
+    of length >= 4; receive v1.x, v1.y, v2.x, v2.y
+    :param invert: bool Y-axis inversion | if True convert the model 
+    to a cartesian coordinate system
+    :return: void
+    """
+    cdef collider_object obj1_c, obj2_c
+
+    if invert:
+        v1y = -v1y
+        v2y = -v2y
+        x1y = -x1y
+        x2y = -x2y
+
+    check_status(collision_status(m1, m2, x1x, x1y, x2x, x2y))
+    vecinit(&obj1_c.vector, v1x, v1y)
+    vecinit(&obj1_c.centre, x1x, x1y)
+    obj1_c.mass = m1
+    vecinit(&obj2_c.vector, v2x, v2y)
+    vecinit(&obj2_c.centre, x2x, x2y)
+    obj2_c.mass = m2
+
+    write_buffer(out, momentum_t(obj1_c, obj2_c))
+
+
+cdef inline bint is_float32(const char * fmt)nogil:
+    """
+    RETURN TRUE WHEN A BUFFER FORMAT STRING DESCRIBES A NATIVE FLOAT32 ('f', '=f', '<f', '@f')
+    """
+    if fmt == NULL:
+        return False
+    if fmt[0] == b'@' or fmt[0] == b'=' or fmt[0] == b'<':
+        fmt += 1
+    return fmt[0] == b'f' and fmt[1] == 0
+
+
+cdef int write_buffer(object out, collision_vectors collision) except -1:
+    """
+    WRITE VECTORS V12 & V21 INTO A CALLER BUFFER AS (V12.X, V12.Y, V21.X, V21.Y)
+    
+    The buffer is accessed through the buffer protocol, no intermediate object is created
+    
+    :param out: float32 writable contiguous buffer of length >= 4
+    :param collision: collision_vectors; vectors v12 & v21
+    :return: 0, -1 when an exception is raised
+    """
+    cdef:
+        Py_buffer view
+        float * data
+
+    PyObject_GetBuffer(out, &view, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_ANY_CONTIGUOUS)
+    try:
+        if not is_float32(view.format) or view.len < <Py_ssize_t>(4 * sizeof(float)):
+            raise ValueError("\nArgument out must be a float32 buffer with at least 4 items.")
+        data = <float *>view.buf
+        data[0] = collision.v12.x
+        data[1] = collision.v12.y
+        data[2] = collision.v21.x
+        data[3] = collision.v21.y
+    finally:
+        PyBuffer_Release(&view)
+    return 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef object momentum_angle_free_c_soa(
+        float [::1] v1_x, float [::1] v1_y,
+        float [::1] v2_x, float [::1] v2_y,
+        float [::1] m1, float [::1] m2,
+        float [::1] x1_x, float [::1] x1_y,
+        float [::1] x2_x, float [::1] x2_y,
+        object out=None,
+        bint invert=False,
+        unsigned char [::1] valid=None
+):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FOR N PAIRS OF OBJECTS (ANGLE FREE METHOD, BATCH)
+    
+    Structure of arrays version of momentum_angle_free_c, each argument is a contiguous
+    float32 array of length N (one entry per pair). The pairs are solved by a SIMD kernel
+    (AVX2 or SSE2) selected at import time according to the CPU features (see soa_kernel),
+    or by a plain C loop on other processors.
+    
+    * Invalid pairs (both centres identical or m1 + m2 <= 0) are not solved, the
+      velocities of the pair are returned unchanged and valid[i] is set to 0.
+    
+    :param v1_x: numpy.ndarray (N,) float32; objects 1 velocities along the x-axis
+    :param v1_y: numpy.ndarray (N,) float32; objects 1 velocities along the y-axis
+    :param v2_x: numpy.ndarray (N,) float32; objects 2 velocities along the x-axis
+    :param v2_y: numpy.ndarray (N,) float32; objects 2 velocities along the y-axis
+    :param m1  : numpy.ndarray (N,) float32; objects 1 masses in kg
+    :param m2  : numpy.ndarray (N,) float32; objects 2 masses in kg
+    :param x1_x: numpy.ndarray (N,) float32; objects 1 centres x coordinate
+    :param x1_y: numpy.ndarray (N,) float32; objects 1 centres y coordinate
+    :param x2_x: numpy.ndarray (N,) float32; objects 2 centres x coordinate
+    :param x2_y: numpy.ndarray (N,) float32; objects 2 centres y coordinate
+    :param out : numpy.ndarray (4, N) float32 contiguous or None; receive the resultant 
+    vectors (rows v1x, v1y, v2x, v2y). A new array is allocated when None
+    :param invert: bool Y-axis inversion | if True convert the model 
+    to a cartesian coordinate system
+    :param valid: numpy.ndarray (N,) uint8 or None; receive 1 for the solved pairs and 0 
+    for the invalid pairs
+    :return: Return a numpy.ndarray (4, N) float32, rows v1x, v1y, v2x, v2y after contact
+    """
+    cdef soa_pairs p
+    cdef float [:, ::1] out_ = soa_pack(
+        &p, v1_x, v1_y, v2_x, v2_y, m1, m2, x1_x, x1_y, x2_x, x2_y, out, valid)
+
+    if p.n > 0:
+        with nogil:
+            momentum_angle_free_soa(&p)
+        if invert:
+            soa_invert(out_)
+
+    return out_.base if out is None else out
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef object momentum_trigonometry_c_soa(
+        float [::1] v1x, float [::1] v1y,
+        float [::1] m1,
+        float [::1] x1x, float [::1] x1y,
+        float [::1] v2x, float [::1] v2y,
+        float [::1] m2,
+        float [::1] x2x, float [::1] x2y,
+        object out=None,
+        bint invert=False,
+        unsigned char [::1] valid=None
+):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FOR N PAIRS OF OBJECTS (TRIGONOMETRY, BATCH)
+    
+    Structure of arrays version of momentum_trigonometry_c, each argument is a contiguous
+    float32 array of length N (one entry per pair). 
+    
+    * A zero length velocity (object at rest) has an angle theta equal to zero.
+    
+    * Invalid pairs (both centres identical or m1 + m2 <= 0) are not solved, the
+      velocities of the pair are returned unchanged and valid[i] is set to 0.
+    
+    :param v1x : numpy.ndarray (N,) float32; objects 1 velocities along the x-axis
+    :param v1y : numpy.ndarray (N,) float32; objects 1 velocities along the y-axis
+    :param m1  : numpy.ndarray (N,) float32; objects 1 masses in kg
+    :param x1x : numpy.ndarray (N,) float32; objects 1 centres x coordinate
+    :param x1y : numpy.ndarray (N,) float32; objects 1 centres y coordinate
+    :param v2x : numpy.ndarray (N,) float32; objects 2 velocities along the x-axis
+    :param v2y : numpy.ndarray (N,) float32; objects 2 velocities along the y-axis
+    :param m2  : numpy.ndarray (N,) float32; objects 2 masses in kg
+    :param x2x : numpy.ndarray (N,) float32; objects 2 centres x coordinate
+    :param x2y : numpy.ndarray (N,) float32; objects 2 centres y coordinate
+    :param out : numpy.ndarray (4, N) float32 contiguous or None; receive the resultant 
+    vectors (rows v1x, v1y, v2x, v2y). A new array is allocated when None
+    :param invert: bool Y-axis inversion | if True convert the model 
+    to a cartesian coordinate system
+    :param valid: numpy.ndarray (N,) uint8 or None; receive 1 for the solved pairs and 0 
+    for the invalid pairs
+    :return: Return a numpy.ndarray (4, N) float32, rows v1x, v1y, v2x, v2y after contact
+    """
+    cdef soa_pairs p
+    cdef float [:, ::1] out_ = soa_pack(
+        &p, v1x, v1y, v2x, v2y, m1, m2, x1x, x1y, x2x, x2y, out, valid)
 
+    if p.n > 0:
+        with nogil:
+            momentum_t_soa(&p)
+        if invert:
+            soa_invert(out_)
 
+    return out_.base if out is None else out
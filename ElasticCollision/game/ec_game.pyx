@@ -26,6 +26,7 @@ SOFTWARE.
 """
 
 
+import os
 import warnings
 
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -57,19 +58,16 @@ except ImportError:
     raise ImportError("\n<numpy> library is missing on your system."
           "\nTry: \n   C:\\pip install numpy on a window command prompt.")
 
-from libc.math cimport cos, sin, sqrt, atan2, acos, fmax, fmin, fabs
+from libc.math cimport cos, sin, sqrt, atan2, acos, fmax, fmin, fabs, INFINITY
+from libc.stdlib cimport malloc, free, qsort
 from libc.stdio cimport printf
+from cython.parallel cimport prange
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, \
+    PyBUF_WRITABLE, PyBUF_FORMAT, PyBUF_ANY_CONTIGUOUS
 
+# struct vector2d & v_struct are declared in ec_game.pxd (Source/vector.h)
 cdef extern from '../Source/vector.c':
 
-    struct vector2d:
-       float x
-       float y
-
-    struct v_struct:
-        vector2d vector1
-        vector2d vector2
-
     void vecinit(vector2d *v, float x, float y)nogil
     float vlength(vector2d *v)nogil
     void scale_inplace(float c, vector2d *v)nogil
@@ -80,8 +78,100 @@ cdef extern from '../Source/vector.c':
 DEF M_PI  = 3.14159265358979323846
 DEF M_PI2 = (3.14159265358979323846 / 2.0)
 
+# Floating point types accepted by the batch functions (numpy float32 & float64 arrays),
+# the float64 arrays are solved in double precision without conversion
+ctypedef fused real_t:
+    float
+    double
+
 __version__ = "1.0.5"
 
+# **************************** OPENMP SETTINGS ****************************************
+
+# Number of threads used by the batch kernels and minimum number of pairs
+# before the work is shared between the threads (small batches stay serial,
+# the thread start-up cost would be higher than the work itself).
+cdef int THREADS = <int>(os.cpu_count() or 1)
+cdef Py_ssize_t THRESHOLD = 4096
+
+
+cpdef void set_num_threads(int threads):
+    """
+    SET THE NUMBER OF THREADS USED BY THE BATCH KERNELS (OPENMP)
+
+    :param threads: integer; number of threads (must be > 0), 1 disable the parallel loops
+    :return: void
+    """
+    global THREADS
+    if threads < 1:
+        raise ValueError("\nArgument threads must be > 0, got %s " % threads)
+    THREADS = threads
+
+
+cpdef int get_num_threads():
+    """
+    RETURN THE NUMBER OF THREADS USED BY THE BATCH KERNELS (OPENMP)
+
+    :return: integer; number of threads
+    """
+    return THREADS
+
+
+cpdef void set_parallel_threshold(Py_ssize_t threshold):
+    """
+    SET THE MINIMUM NUMBER OF PAIRS BEFORE A BATCH IS SOLVED IN PARALLEL
+
+    Below this size the batch kernels are running on a single thread.
+
+    :param threshold: integer; number of pairs (must be >= 0)
+    :return: void
+    """
+    global THRESHOLD
+    if threshold < 0:
+        raise ValueError("\nArgument threshold must be >= 0, got %s " % threshold)
+    THRESHOLD = threshold
+
+
+cpdef Py_ssize_t get_parallel_threshold():
+    """
+    RETURN THE MINIMUM NUMBER OF PAIRS BEFORE A BATCH IS SOLVED IN PARALLEL
+
+    :return: integer; number of pairs
+    """
+    return THRESHOLD
+
+# **************************** TRIGONOMETRY EVALUATION MODE ***************************
+
+# When True the trigonometric entry points (momentum_trigonometry*) evaluate the same
+# equations with dot & cross products instead of atan2, acos, cos & sin
+cdef bint TRIG_FREE = False
+
+
+cpdef void set_trig_free(bint enable):
+    """
+    SELECT THE EVALUATION MODE OF THE TRIGONOMETRIC METHOD (momentum_trigonometry*)
+
+    With enable=True cos(θ - φ), sin(θ - φ), cos(φ) & sin(φ) are obtained from normalized
+    dot & cross products, the angles are never computed. The results are identical within
+    the float precision and the speed is close to the angle free method, the call sites
+    do not change.
+
+    :param enable: bool; True for the dot & cross products, False for the trigonometric
+    functions (default)
+    :return: void
+    """
+    global TRIG_FREE
+    TRIG_FREE = enable
+
+
+cpdef bint get_trig_free():
+    """
+    RETURN TRUE WHEN THE TRIGONOMETRIC METHOD IS EVALUATED WITH DOT & CROSS PRODUCTS
+
+    :return: bool
+    """
+    return TRIG_FREE
+
 # **************************** PYTHON INTERFACE ***************************************
 
 
@@ -149,11 +239,13 @@ cpdef tuple momentum_trigonometry(
         obj1_centre.y *= -<float>1.0
         obj2_centre.y *= -<float>1.0
 
+    check_status(pair_status(
+        obj1_mass, obj2_mass, obj1_centre.x, obj1_centre.y, obj2_centre.x, obj2_centre.y))
     vecinit(&vec1, obj1_vector.x, obj1_vector.y)
     vecinit(&vec2, obj2_vector.x, obj2_vector.y)
     # Determines v1 & v2 components after collision
     collision = \
-        get_momentum_trigonometry_vec(
+        trigonometry_vec(
             obj1_centre.x, obj1_centre.y,
             obj2_centre.x, obj2_centre.y,
             vec1, vec2,
@@ -229,11 +321,876 @@ cpdef tuple momentum_angle_free(
     vecinit(&x1_vec, obj1_centre.x, obj1_centre.y)
     vecinit(&x2_vec, obj2_centre.x, obj2_centre.y)
 
+    check_status(pair_status(obj1_mass, obj2_mass, x1_vec.x, x1_vec.y, x2_vec.x, x2_vec.y))
     v = get_angle_free_vec(vec1, vec2, obj1_mass, obj2_mass, x1_vec, x2_vec)
 
     # Y-axis is inverted
     return Vector2(v.vector1.x, v.vector1.y), Vector2(v.vector2.x, v.vector2.y)
 
+
+# **************************** ALLOCATION FREE *****************************************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_trigonometry_into(
+        obj1_centre : Vector2,
+        obj2_centre : Vector2,
+        obj1_vector : Vector2,
+        obj2_vector : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        object out,
+        bint invert=False):
+    """
+    WRITE VECTORS V1 & V2 AFTER OBJECT COLLISION INTO A BUFFER (TRIGONOMETRY)
+    
+    Same than momentum_trigonometry but the result is written into the caller buffer 
+    <out> as (v1.x, v1.y, v2.x, v2.y), no tuple or Vector2 is created. 
+    The input vectors are left unchanged when invert is True.
+    
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param out: float32 writable contiguous buffer (numpy.ndarray, array.array('f') etc) 
+    of length >= 4; receive v1.x, v1.y, v2.x, v2.y
+    :param invert: bool, If True, the model is revert to a cartesian domain.
+    :return: void 
+    """
+    write_buffer(out, trigonometry_vector2(
+        obj1_centre, obj2_centre, obj1_vector, obj2_vector, obj1_mass, obj2_mass, invert))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_trigonometry_inplace(
+        obj1_centre : Vector2,
+        obj2_centre : Vector2,
+        obj1_vector : Vector2,
+        obj2_vector : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        v1_out      : Vector2,
+        v2_out      : Vector2,
+        bint invert=False):
+    """
+    UPDATE TWO EXISTING VECTOR2 WITH VECTORS V1 & V2 AFTER OBJECT COLLISION (TRIGONOMETRY)
+    
+    Same than momentum_trigonometry but the result is written into the existing vectors 
+    v1_out & v2_out, no tuple or Vector2 is created. v1_out & v2_out can be the objects 
+    vectors obj1_vector & obj2_vector (the velocities are then updated in place).
+    
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param v1_out: Vector2; receive object 1 vector after collision
+    :param v2_out: Vector2; receive object 2 vector after collision
+    :param invert: bool, If True, the model is revert to a cartesian domain.
+    :return: void 
+    """
+    write_vector2(v1_out, v2_out, trigonometry_vector2(
+        obj1_centre, obj2_centre, obj1_vector, obj2_vector, obj1_mass, obj2_mass, invert))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_angle_free_into(
+        obj1_vector  : Vector2,
+        obj2_vector  : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        obj1_centre  : Vector2,
+        obj2_centre  : Vector2,
+        object out,
+        bint invert=False):
+    """
+    WRITE VECTORS V1 & V2 AFTER OBJECT COLLISION INTO A BUFFER (ANGLE FREE METHOD)
+    
+    Same than momentum_angle_free but the result is written into the caller buffer 
+    <out> as (v1.x, v1.y, v2.x, v2.y), no tuple or Vector2 is created. 
+    The input vectors are left unchanged when invert is True.
+    
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param out: float32 writable contiguous buffer (numpy.ndarray, array.array('f') etc) 
+    of length >= 4; receive v1.x, v1.y, v2.x, v2.y
+    :param invert: bool, If True, the model is revert to a cartesian domain.
+    :return: void 
+    """
+    write_buffer(out, angle_free_vector2(
+        obj1_vector, obj2_vector, obj1_mass, obj2_mass, obj1_centre, obj2_centre, invert))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_angle_free_inplace(
+        obj1_vector  : Vector2,
+        obj2_vector  : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        obj1_centre  : Vector2,
+        obj2_centre  : Vector2,
+        v1_out       : Vector2,
+        v2_out       : Vector2,
+        bint invert=False):
+    """
+    UPDATE TWO EXISTING VECTOR2 WITH VECTORS V1 & V2 AFTER OBJECT COLLISION (ANGLE FREE METHOD)
+    
+    Same than momentum_angle_free but the result is written into the existing vectors 
+    v1_out & v2_out, no tuple or Vector2 is created. v1_out & v2_out can be the objects 
+    vectors obj1_vector & obj2_vector (the velocities are then updated in place).
+    
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param v1_out: Vector2; receive object 1 vector after collision
+    :param v2_out: Vector2; receive object 2 vector after collision
+    :param invert: bool, If True, the model is revert to a cartesian domain.
+    :return: void 
+    """
+    write_vector2(v1_out, v2_out, angle_free_vector2(
+        obj1_vector, obj2_vector, obj1_mass, obj2_mass, obj1_centre, obj2_centre, invert))
+
+
+# **************************** TRIGONOMETRY (BATCH) ************************************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef tuple momentum_trigonometry_batch(
+        real_t [:, ::1] obj1_centre,
+        real_t [:, ::1] obj2_centre,
+        real_t [:, ::1] obj1_vector,
+        real_t [:, ::1] obj2_vector,
+        real_t [::1] obj1_mass,
+        real_t [::1] obj2_mass,
+        bint invert  = False,
+        object v1_out = None,
+        object v2_out = None,
+        object valid  = None):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FOR N PAIRS OF OBJECTS (TRIGONOMETRY)
+
+    Batch version of momentum_trigonometry. Row i of each array describes the i-th
+    pair of colliding objects, all the pairs are solved in a single call and the
+    loop is running without the GIL.
+
+    * The Y-axis inversion (invert=True) is applied inside the loop, the input
+      arrays are left untouched (unlike momentum_trigonometry that modify the
+      Vector2 y components of the caller).
+
+    * v1_out & v2_out can be the input arrays obj1_vector & obj2_vector, the
+      velocities are then updated in place.
+
+    * Invalid pairs (both centres identical or m1 + m2 <= 0) do not raise, the objects
+      keep their velocities and valid[i] is set to 0 (objects at rest are valid).
+
+    * The arrays can be float32 or float64 (all the arrays must share the same dtype).
+      float64 arrays are used without conversion and solved in double precision.
+
+    :param obj1_centre: numpy.ndarray shape (N, 2) float32|float64 contiguous; Centre of object 1
+    :param obj2_centre: numpy.ndarray shape (N, 2) float32|float64 contiguous; Centre of object 2
+    :param obj1_vector: numpy.ndarray shape (N, 2) float32|float64 contiguous; Object 1 direction vectors
+    :param obj2_vector: numpy.ndarray shape (N, 2) float32|float64 contiguous; Object 2 direction vectors
+    :param obj1_mass  : numpy.ndarray shape (N,) float32|float64 contiguous; Mass of object 1 in kg
+    :param obj2_mass  : numpy.ndarray shape (N,) float32|float64 contiguous; Mass of object 2 in kg
+    :param invert     : bool, If True, the model is revert to a cartesian domain.
+    :param v1_out     : numpy.ndarray shape (N, 2) same dtype contiguous or None; receive the
+    object 1 vectors after collision. A new array is created when None.
+    :param v2_out     : numpy.ndarray shape (N, 2) same dtype contiguous or None; receive the
+    object 2 vectors after collision. A new array is created when None.
+    :param valid      : numpy.ndarray shape (N,) uint8 contiguous or None; receive 1 for the
+    solved pairs and 0 for the invalid pairs.
+    :return: Tuple containing the arrays v1 and v2 (objects vectors after collision).
+    """
+    cdef:
+        Py_ssize_t n = obj1_vector.shape[0]
+        Py_ssize_t i
+        real_t sign = -1.0 if invert else 1.0
+        unsigned char [::1] valid_
+        unsigned char * mask = NULL
+        object dtype = numpy.float32 if real_t is float else numpy.float64
+
+    if obj2_vector.shape[0] != n or obj1_centre.shape[0] != n or obj2_centre.shape[0] != n \
+            or obj1_mass.shape[0] != n or obj2_mass.shape[0] != n:
+        raise ValueError("\nAll the arrays must have the same length, "
+                         "expecting %s pairs." % n)
+
+    if obj1_vector.shape[1] != 2 or obj2_vector.shape[1] != 2 \
+            or obj1_centre.shape[1] != 2 or obj2_centre.shape[1] != 2:
+        raise ValueError("\nVectors and centres arrays must be shape (N, 2).")
+
+    if v1_out is None:
+        v1_out = numpy.empty((n, 2), dtype=dtype)
+    if v2_out is None:
+        v2_out = numpy.empty((n, 2), dtype=dtype)
+
+    cdef:
+        real_t [:, ::1] r1 = v1_out
+        real_t [:, ::1] r2 = v2_out
+
+    if r1.shape[0] != n or r1.shape[1] != 2 or r2.shape[0] != n or r2.shape[1] != 2:
+        raise ValueError("\nv1_out & v2_out must be shape (%s, 2)." % n)
+
+    if valid is not None:
+        valid_ = valid
+        if valid_.shape[0] != n:
+            raise ValueError("\nvalid must be shape (%s,)." % n)
+        if n > 0:
+            mask = &valid_[0]
+
+    with nogil:
+        # LARGE BATCHES ARE SHARED BETWEEN THE THREADS (PAIRS ARE INDEPENDENT)
+        if n >= THRESHOLD and THREADS > 1:
+            for i in prange(n, schedule='static', num_threads=THREADS):
+                trigonometry_row(
+                    obj1_centre, obj2_centre, obj1_vector, obj2_vector,
+                    obj1_mass, obj2_mass, sign, r1, r2, mask, i)
+        else:
+            for i in range(n):
+                trigonometry_row(
+                    obj1_centre, obj2_centre, obj1_vector, obj2_vector,
+                    obj1_mass, obj2_mass, sign, r1, r2, mask, i)
+
+    return v1_out, v2_out
+
+
+# **************************** PAIR RESOLUTION (BODY STATE ARRAYS) *********************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void resolve_pairs(
+        real_t [:, ::1] pos,
+        real_t [:, ::1] vel,
+        real_t [::1] mass,
+        int [:, ::1] pairs):
+    """
+    RESOLVE A LIST OF COLLIDING PAIRS IN PLACE (ANGLE FREE METHOD)
+
+    pos, vel & mass describe all the bodies of the scene (body table), pairs contains
+    the indices (i, j) of the colliding bodies. The velocities vel[i] & vel[j] are
+    replaced by the angle free solution of the pair, the whole list is processed
+    without the GIL.
+
+    * The pairs are applied in order, a body involved in several contacts uses the
+      velocity returned by the previous contacts (same result than calling
+      momentum_angle_free for each pair and writing the vectors back to the objects)
+
+    * Pairs with identical indices or with both centres at the same position
+      are ignored (contact normal undefined).
+
+    * pos, vel & mass can be float32 or float64 (same dtype), float64 body tables are
+      updated in place and solved in double precision.
+
+    :param pos  : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    :param vel  : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies vectors
+    (updated in place)
+    :param mass : numpy.ndarray shape (N,) float32|float64 contiguous; bodies mass in kg
+    :param pairs: numpy.ndarray shape (K, 2) int32 contiguous; indices of the colliding bodies
+    :return: void
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t k = pairs.shape[0]
+        Py_ssize_t p
+        int i, j
+        vector2d v1, v2, x1, x2
+        v_struct collision
+        double r[4]
+
+    if vel.shape[0] != n or mass.shape[0] != n:
+        raise ValueError("\npos, vel & mass must have the same length.")
+
+    if pos.shape[1] != 2 or vel.shape[1] != 2 or pairs.shape[1] != 2:
+        raise ValueError("\npos, vel & pairs arrays must be shape (N, 2).")
+
+    if k > 0:
+        indices = numpy.asarray(pairs)
+        if indices.min() < 0 or indices.max() >= n:
+            raise ValueError("\npairs indices must be in range [0, %s]." % (n - 1))
+
+    with nogil:
+        for p in range(k):
+            i = pairs[p, 0]
+            j = pairs[p, 1]
+            if i == j or (pos[i, 0] == pos[j, 0] and pos[i, 1] == pos[j, 1]):
+                continue
+
+            if real_t is float:
+                vecinit(&v1, vel[i, 0], vel[i, 1])
+                vecinit(&v2, vel[j, 0], vel[j, 1])
+                vecinit(&x1, pos[i, 0], pos[i, 1])
+                vecinit(&x2, pos[j, 0], pos[j, 1])
+
+                collision = get_angle_free_vec(v1, v2, mass[i], mass[j], x1, x2)
+
+                vel[i, 0] = collision.vector1.x
+                vel[i, 1] = collision.vector1.y
+                vel[j, 0] = collision.vector2.x
+                vel[j, 1] = collision.vector2.y
+            else:
+                angle_free_pair_d(
+                    vel[i, 0], vel[i, 1], vel[j, 0], vel[j, 1], mass[i], mass[j],
+                    pos[i, 0], pos[i, 1], pos[j, 0], pos[j, 1], r)
+
+                vel[i, 0] = r[0]
+                vel[i, 1] = r[1]
+                vel[j, 0] = r[2]
+                vel[j, 1] = r[3]
+
+
+# **************************** INTEGRATION (BODY STATE ARRAYS) *************************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline void integrate_row(
+        real_t * pos, real_t * vel, double r,
+        double friction, double v_min, double v_max, double dt,
+        double x_min, double y_min, double x_max, double y_max) noexcept nogil:
+    """
+    ADVANCE ONE BODY (FRICTION, VELOCITY CLAMP, MOTION & WALL REFLECTION)
+
+    pos & vel point to the body row (x, y) of the body table
+    """
+    cdef:
+        double vx, vy, x, y, lo, hi
+
+    vx = <double>vel[0] * friction
+    vy = <double>vel[1] * friction
+    vx = v_min if vx < v_min else (v_max if vx > v_max else vx)
+    vy = v_min if vy < v_min else (v_max if vy > v_max else vy)
+    x = <double>pos[0] + vx * dt
+    y = <double>pos[1] + vy * dt
+
+    # The disc bounces on the wall it crosses (mirror position, outgoing velocity),
+    # a disc wider than the domain stays at the lower wall (no libm call, the test
+    # is on the hot path)
+    lo = x_min + r
+    hi = x_max - r
+    if x < lo:
+        x = lo + (lo - x)
+        x = x if x < hi else (hi if hi > lo else lo)
+        vx = fabs(vx)
+    elif x > hi:
+        x = hi - (x - hi)
+        x = x if x > lo else lo
+        vx = -fabs(vx)
+
+    lo = y_min + r
+    hi = y_max - r
+    if y < lo:
+        y = lo + (lo - y)
+        y = y if y < hi else (hi if hi > lo else lo)
+        vy = fabs(vy)
+    elif y > hi:
+        y = hi - (y - hi)
+        y = y if y > lo else lo
+        vy = -fabs(vy)
+
+    pos[0] = <real_t>x
+    pos[1] = <real_t>y
+    vel[0] = <real_t>vx
+    vel[1] = <real_t>vy
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void integrate(
+        real_t [:, ::1] pos,
+        real_t [:, ::1] vel,
+        real_t [::1] radius,
+        tuple lower,
+        tuple upper,
+        double friction = 1.0,
+        double v_min = -15.0,
+        double v_max = 15.0,
+        double dt = 1.0):
+    """
+    ADVANCE ALL THE BODIES OF THE SCENE IN PLACE (ONE FRAME)
+
+    For each body the velocity is multiplied by friction and clamped to the range
+    [v_min, v_max] (LIMIT_LOW & LIMIT_HIGH of the simulation), the centre moves by
+    vel * dt and a disc crossing a wall of the domain lower ... upper bounces on it:
+    the centre is mirrored inside [lower + radius, upper - radius] and the velocity
+    component points back into the domain.
+
+    * Replaces the per object Vertex.x & Vertex.y setters (Python properties and a
+      hard-coded 50 pixels size), the wall test uses the radius of each body.
+
+    * Large scenes (>= get_parallel_threshold() bodies) are shared between the threads.
+
+    * pos, vel & radius can be float32 or float64 (same dtype).
+
+    :param pos     : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    (updated in place)
+    :param vel     : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies vectors
+    (updated in place)
+    :param radius  : numpy.ndarray shape (N,) float32|float64 contiguous; bodies radii
+    :param lower   : tuple (x, y); domain top left corner
+    :param upper   : tuple (x, y); domain bottom right corner
+    :param friction: float; velocity factor applied every frame (default 1.0, no friction)
+    :param v_min   : float; lowest velocity component (default -15.0)
+    :param v_max   : float; highest velocity component (default 15.0)
+    :param dt      : float; time step in frames (default 1.0)
+    :return: void
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t i
+        double x_min, y_min, x_max, y_max
+
+    if vel.shape[0] != n or radius.shape[0] != n:
+        raise ValueError("\npos, vel & radius must have the same length.")
+
+    if pos.shape[1] != 2 or vel.shape[1] != 2:
+        raise ValueError("\npos & vel arrays must be shape (N, 2).")
+
+    if len(lower) != 2 or len(upper) != 2:
+        raise ValueError("\nlower & upper must be tuples (x, y).")
+
+    if v_min > v_max:
+        raise ValueError("\nv_min must be <= v_max, got %s and %s." % (v_min, v_max))
+
+    x_min, y_min = lower
+    x_max, y_max = upper
+    if n == 0:
+        return
+
+    with nogil:
+        if n >= THRESHOLD and THREADS > 1:
+            for i in prange(n, schedule='static', num_threads=THREADS):
+                integrate_row(&pos[i, 0], &vel[i, 0], <double>radius[i], friction,
+                              v_min, v_max, dt, x_min, y_min, x_max, y_max)
+        else:
+            for i in range(n):
+                integrate_row(&pos[i, 0], &vel[i, 0], <double>radius[i], friction,
+                              v_min, v_max, dt, x_min, y_min, x_max, y_max)
+
+
+# **************************** CONTINUOUS COLLISION DETECTION (BODY STATE ARRAYS) ******************
+
+# Pair index and time of impact (qsort)
+cdef struct impact:
+    double t
+    Py_ssize_t k
+
+
+cdef int impact_compare(const void * a, const void * b) noexcept nogil:
+    """
+    ORDER TWO IMPACTS BY TIME (THEN BY PAIR INDEX), qsort comparison function
+    """
+    cdef:
+        const impact * p = <const impact *>a
+        const impact * q = <const impact *>b
+    if p.t != q.t:
+        return -1 if p.t < q.t else 1
+    return -1 if p.k < q.k else (1 if p.k > q.k else 0)
+
+
+@cython.cdivision(True)
+cdef inline double impact_time(
+        double dx, double dy, double wx, double wy, double distance,
+        double lower, double floor_, double dt) noexcept nogil:
+    """
+    RETURN THE TIME OF IMPACT OF TWO MOVING DISCS (SWEPT CIRCLES), INFINITY WITHOUT IMPACT
+
+    Smallest root of |d + w t| = distance with d = x2 - x1 (centres) and w = v2 - v1
+    (vectors). Only the discs approaching at time lower collide, the time is in
+    [floor_, dt], a time before lower means the discs already overlap at time lower
+    (touched earlier, bounded by floor_).
+
+    :param dx, dy  : double; centre of object 2 minus centre of object 1 at time 0
+    :param wx, wy  : double; vector of object 2 minus vector of object 1
+    :param distance: double; contact distance r1 + r2
+    :param lower   : double; time of the last bounce of the discs (0.0 before any bounce)
+    :param floor_  : double; earliest time of impact (<= lower)
+    :param dt      : double; frame duration
+    :return: double; time of impact or INFINITY
+    """
+    cdef double a, b, c, disc, t
+
+    # Relative position at time lower
+    dx += wx * lower
+    dy += wy * lower
+    b = dx * wx + dy * wy
+    if b >= 0.0:
+        return INFINITY
+    a = wx * wx + wy * wy
+    c = dx * dx + dy * dy - distance * distance
+    disc = b * b - a * c
+    if disc < 0.0:
+        return INFINITY
+    t = lower + (-b - sqrt(disc)) / a
+    if t > dt:
+        return INFINITY
+    return t if t > floor_ else floor_
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef object time_of_impact(
+        real_t [:, ::1] pos,
+        real_t [:, ::1] vel,
+        real_t [::1] radius,
+        int [:, ::1] pairs,
+        double dt = 1.0):
+    """
+    RETURN THE TIME OF IMPACT OF EACH PAIR DURING THE NEXT FRAME (SWEPT CIRCLES)
+
+    The discs move in straight lines (pos + vel * t) during the frame [0, dt]. The time
+    of impact is the first time the discs touch while approaching, it is negative when
+    the discs already overlap (time they touched, bounded by -dt) and numpy.inf when the
+    discs do not touch during the frame or move apart.
+
+    * Fast bodies cannot pass through each other, the broadphase must return the pairs
+      of swept circles e.g pairs(pos + vel * dt / 2, radius + |vel| * dt / 2).
+
+    :param pos   : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    :param vel   : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies vectors
+    :param radius: numpy.ndarray shape (N,) float32|float64 contiguous; bodies radii
+    :param pairs : numpy.ndarray shape (K, 2) int32 contiguous; indices of the bodies
+    :param dt    : float; frame duration (default 1.0)
+    :return: numpy.ndarray shape (K,) float64; time of impact of each pair or numpy.inf
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t k = pairs.shape[0]
+        Py_ssize_t p
+        int i, j
+        double [::1] out_view
+
+    if vel.shape[0] != n or radius.shape[0] != n:
+        raise ValueError("\npos, vel & radius must have the same length.")
+
+    if pos.shape[1] != 2 or vel.shape[1] != 2 or pairs.shape[1] != 2:
+        raise ValueError("\npos, vel & pairs arrays must be shape (N, 2).")
+
+    if dt <= 0.0:
+        raise ValueError("\ndt must be > 0.0, got %s." % dt)
+
+    if k > 0:
+        indices = numpy.asarray(pairs)
+        if indices.min() < 0 or indices.max() >= n:
+            raise ValueError("\npairs indices must be in range [0, %s]." % (n - 1))
+
+    out = numpy.empty(k, dtype=numpy.float64)
+    out_view = out
+    with nogil:
+        for p in range(k):
+            i = pairs[p, 0]
+            j = pairs[p, 1]
+            out_view[p] = impact_time(
+                <double>pos[j, 0] - <double>pos[i, 0], <double>pos[j, 1] - <double>pos[i, 1],
+                <double>vel[j, 0] - <double>vel[i, 0], <double>vel[j, 1] - <double>vel[i, 1],
+                <double>radius[i] + <double>radius[j], 0.0, -dt, dt) if i != j else INFINITY
+    return out
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void resolve_impacts(
+        real_t [:, ::1] pos,
+        real_t [:, ::1] vel,
+        real_t [::1] mass,
+        real_t [::1] radius,
+        int [:, ::1] pairs,
+        double dt = 1.0,
+        int iterations = 8):
+    """
+    RESOLVE THE IMPACTS OF THE NEXT FRAME IN PLACE (CONTINUOUS COLLISION DETECTION)
+
+    The pairs are processed by time of impact t (see time_of_impact). Both bodies are
+    moved to their contact position (pos + vel * t), the vectors are replaced by the
+    angle free solution at the contact and the bodies are moved back by -t along their
+    new vectors. After the integration of the frame (pos + vel * dt, see integrate)
+    the bodies are at the exact position they would have reached bouncing at time t:
+    fast bodies do not pass through each other and the overlapping discs (t < 0) are
+    separated without the un_stick loop.
+
+    * The time of impact is computed again with the updated bodies when the pair is
+      processed, a body can bounce on several bodies during the frame (an impact is
+      never earlier than the last bounce of its bodies). A bounce can create new
+      impacts, the pairs are processed again (up to <iterations> passes) until no
+      impact is left.
+
+    * The solution is computed in double precision.
+
+    :param pos   : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    (updated in place)
+    :param vel   : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies vectors
+    (updated in place)
+    :param mass  : numpy.ndarray shape (N,) float32|float64 contiguous; bodies mass in kg
+    :param radius: numpy.ndarray shape (N,) float32|float64 contiguous; bodies radii
+    :param pairs : numpy.ndarray shape (K, 2) int32 contiguous; indices of the bodies
+    (swept circles pairs, see time_of_impact)
+    :param dt    : float; frame duration (default 1.0)
+    :param iterations: integer; maximum number of passes over the pairs (default 8)
+    :return: void
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t k = pairs.shape[0]
+        Py_ssize_t p, count
+        int i, j, it
+        double t, x1x, x1y, x2x, x2y
+        double r[4]
+        impact * order
+        double * bounce
+
+    if vel.shape[0] != n or mass.shape[0] != n or radius.shape[0] != n:
+        raise ValueError("\npos, vel, mass & radius must have the same length.")
+
+    if pos.shape[1] != 2 or vel.shape[1] != 2 or pairs.shape[1] != 2:
+        raise ValueError("\npos, vel & pairs arrays must be shape (N, 2).")
+
+    if dt <= 0.0:
+        raise ValueError("\ndt must be > 0.0, got %s." % dt)
+
+    if iterations < 1:
+        raise ValueError("\niterations must be >= 1, got %s." % iterations)
+
+    if k == 0:
+        return
+
+    indices = numpy.asarray(pairs)
+    if indices.min() < 0 or indices.max() >= n:
+        raise ValueError("\npairs indices must be in range [0, %s]." % (n - 1))
+
+    order = <impact *>malloc(k * sizeof(impact))
+    bounce = <double *>malloc(n * sizeof(double))
+    if order == NULL or bounce == NULL:
+        free(order)
+        free(bounce)
+        raise MemoryError("\nCannot allocate the impacts.")
+
+    with nogil:
+        # Time of the last bounce of each body (no bounce yet)
+        for p in range(n):
+            bounce[p] = -INFINITY
+
+        for it in range(iterations):
+
+            # Pairs with an impact (bodies updated by the previous pass), by time of impact
+            count = 0
+            for p in range(k):
+                i = pairs[p, 0]
+                j = pairs[p, 1]
+                if i == j:
+                    continue
+                t = fmax(bounce[i], bounce[j])
+                t = impact_time(
+                    <double>pos[j, 0] - <double>pos[i, 0], <double>pos[j, 1] - <double>pos[i, 1],
+                    <double>vel[j, 0] - <double>vel[i, 0], <double>vel[j, 1] - <double>vel[i, 1],
+                    <double>radius[i] + <double>radius[j],
+                    0.0 if t == -INFINITY else t, -dt if t == -INFINITY else t, dt)
+                if t != INFINITY:
+                    order[count].t = t
+                    order[count].k = p
+                    count += 1
+            if count == 0:
+                break
+            qsort(order, count, sizeof(impact), impact_compare)
+
+            for p in range(count):
+                i = pairs[order[p].k, 0]
+                j = pairs[order[p].k, 1]
+
+                # Bodies already moved by a previous impact
+                t = fmax(bounce[i], bounce[j])
+                t = impact_time(
+                    <double>pos[j, 0] - <double>pos[i, 0], <double>pos[j, 1] - <double>pos[i, 1],
+                    <double>vel[j, 0] - <double>vel[i, 0], <double>vel[j, 1] - <double>vel[i, 1],
+                    <double>radius[i] + <double>radius[j],
+                    0.0 if t == -INFINITY else t, -dt if t == -INFINITY else t, dt)
+                if t == INFINITY:
+                    continue
+
+                x1x = <double>pos[i, 0] + <double>vel[i, 0] * t
+                x1y = <double>pos[i, 1] + <double>vel[i, 1] * t
+                x2x = <double>pos[j, 0] + <double>vel[j, 0] * t
+                x2y = <double>pos[j, 1] + <double>vel[j, 1] * t
+
+                angle_free_pair_d(
+                    vel[i, 0], vel[i, 1], vel[j, 0], vel[j, 1], mass[i], mass[j],
+                    x1x, x1y, x2x, x2y, r)
+
+                vel[i, 0] = <real_t>r[0]
+                vel[i, 1] = <real_t>r[1]
+                vel[j, 0] = <real_t>r[2]
+                vel[j, 1] = <real_t>r[3]
+                pos[i, 0] = <real_t>(x1x - r[0] * t)
+                pos[i, 1] = <real_t>(x1y - r[1] * t)
+                pos[j, 0] = <real_t>(x2x - r[2] * t)
+                pos[j, 1] = <real_t>(x2y - r[3] * t)
+                bounce[i] = t
+                bounce[j] = t
+    free(order)
+    free(bounce)
+
+
+# **************************** POSITIONAL CORRECTION (BODY STATE ARRAYS) **************************
+
+@cython.cdivision(True)
+cdef inline void separate_row(
+        real_t * pos1,
+        real_t * pos2,
+        double w1,
+        double w2,
+        double distance,
+        double slop,
+        double percent
+)noexcept nogil:
+    """
+    SPLIT THE OVERLAP OF ONE PAIR OF DISCS BY INVERSE MASS (ONE ITERATION)
+
+    :param pos1    : pointer; centre of the first disc (updated in place)
+    :param pos2    : pointer; centre of the second disc (updated in place)
+    :param w1      : float; inverse mass of the first disc (0.0 static)
+    :param w2      : float; inverse mass of the second disc (0.0 static)
+    :param distance: float; sum of the radii
+    :param slop    : float; overlap tolerated
+    :param percent : float; fraction of the overlap corrected
+    :return: void
+    """
+    cdef:
+        double dx = <double>pos2[0] - <double>pos1[0]
+        double dy = <double>pos2[1] - <double>pos1[1]
+        double d2 = dx * dx + dy * dy
+        double d, c
+
+    if w1 + w2 == 0.0 or d2 >= distance * distance:
+        return
+    d = sqrt(d2)
+    c = distance - d - slop
+    if c <= 0.0:
+        return
+    c = c * percent / (w1 + w2)
+    if d > 0.0:
+        dx /= d
+        dy /= d
+    else:
+        # Coincident centres, separated along the x axis
+        dx = 1.0
+        dy = 0.0
+    pos1[0] = <real_t>(<double>pos1[0] - dx * c * w1)
+    pos1[1] = <real_t>(<double>pos1[1] - dy * c * w1)
+    pos2[0] = <real_t>(<double>pos2[0] + dx * c * w2)
+    pos2[1] = <real_t>(<double>pos2[1] + dy * c * w2)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void separate(
+        real_t [:, ::1] pos,
+        real_t [::1] mass,
+        real_t [::1] radius,
+        int [:, ::1] pairs,
+        int iterations = 4,
+        double slop = 0.1,
+        double percent = 1.0):
+    """
+    SEPARATE THE OVERLAPPING DISCS IN PLACE (BOUNDED POSITIONAL CORRECTION)
+
+    Each overlapping pair is pushed apart along the line of centres, the overlap minus
+    the slop is split by inverse mass (the light disc moves more, a disc with mass <= 0.0
+    is static). The pairs are corrected one after the other and the whole list is
+    processed <iterations> times, a disc pushed into a third disc is corrected by the
+    next iteration.
+
+    * Replaces the Collision.un_stick loop (unbounded number of iterations, Python
+      properties), the cost is <iterations> x len(pairs) whatever the overlaps. The
+      velocities are not modified.
+
+    * The slop keeps the resting contacts touching (no jitter), the overlaps below the
+      slop are left untouched.
+
+    * pos, mass & radius can be float32 or float64 (same dtype).
+
+    :param pos       : numpy.ndarray shape (N, 2) float32|float64 contiguous; bodies centres
+    (updated in place)
+    :param mass      : numpy.ndarray shape (N,) float32|float64 contiguous; bodies mass in kg
+    :param radius    : numpy.ndarray shape (N,) float32|float64 contiguous; bodies radii
+    :param pairs     : numpy.ndarray shape (K, 2) int32 contiguous; indices of the bodies
+    (candidate pairs, e.g cell_list_pairs)
+    :param iterations: integer; passes over the pairs (default 4)
+    :param slop      : float; overlap tolerated in pixels (default 0.1)
+    :param percent   : float; fraction of the overlap corrected per pass (default 1.0)
+    :return: void
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t k = pairs.shape[0]
+        Py_ssize_t p
+        int i, j, it
+        double m1, m2
+
+    if pos.shape[1] != 2:
+        raise ValueError("\npos array must be shape (N, 2).")
+
+    if mass.shape[0] != n or radius.shape[0] != n:
+        raise ValueError("\npos, mass & radius must have the same length.")
+
+    if pairs.shape[1] != 2:
+        raise ValueError("\npairs array must be shape (K, 2).")
+
+    if iterations < 0:
+        raise ValueError("\niterations must be >= 0, got %s." % iterations)
+
+    if slop < 0.0 or not 0.0 < percent <= 1.0:
+        raise ValueError("\nslop must be >= 0.0 and percent in ]0.0, 1.0], got %s and %s."
+                         % (slop, percent))
+
+    for p in range(k):
+        if pairs[p, 0] < 0 or pairs[p, 0] >= n or pairs[p, 1] < 0 or pairs[p, 1] >= n:
+            raise ValueError("\npairs index out of range (pair %s)." % p)
+
+    with nogil:
+        for it in range(iterations):
+            for p in range(k):
+                i = pairs[p, 0]
+                j = pairs[p, 1]
+                if i == j:
+                    continue
+                m1 = mass[i]
+                m2 = mass[j]
+                separate_row(
+                    &pos[i, 0], &pos[j, 0],
+                    1.0 / m1 if m1 > 0.0 else 0.0, 1.0 / m2 if m2 > 0.0 else 0.0,
+                    <double>radius[i] + <double>radius[j], slop, percent)
+
 # ***************************END INTERFACE *************************************
 
 
@@ -281,12 +1238,12 @@ cpdef tuple get_momentum_trigonometry_v1v2(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline v_struct get_momentum_trigonometry_vec(
+cdef v_struct get_momentum_trigonometry_vec(
         float obj1_cx, float obj1_cy,
         float obj2_cx, float obj2_cy,
         vector2d obj1_vec, vector2d obj2_vec,
         float obj1_mass, float obj2_mass
-)nogil:
+)noexcept nogil:
     """
     RETURN VECTORS V1 & V2 OF ORIGINAL OBJECTS AFTER COLLISION (TRIGONOMETRY)
     
@@ -308,12 +1265,15 @@ cdef inline v_struct get_momentum_trigonometry_vec(
         vector2d v1, v2
         v_struct collision
 
+    # Invalid pair, the objects keep their velocities
+    if pair_status(obj1_mass, obj2_mass, obj1_cx, obj1_cy, obj2_cx, obj2_cy) != EC_OK:
+        collision.vector1 = obj1_vec
+        collision.vector2 = obj2_vec
+        return collision
+
     v1_length         = vlength(&obj1_vec)
     v2_length         = vlength(&obj2_vec)
 
-    if v1_length == 0.0 and v2_length == 0.0:
-        printf("\nv1 & v2 vector length cannot be both null")
-
     v1  = get_v1(v1_length, v2_length, theta1, theta2, phi, obj1_mass, obj2_mass)
     v2  = get_v2(v1_length, v2_length, theta1, theta2, phi, obj1_mass, obj2_mass)
 
@@ -322,6 +1282,347 @@ cdef inline v_struct get_momentum_trigonometry_vec(
     return collision
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef v_struct get_momentum_projection_vec(
+        float obj1_cx, float obj1_cy,
+        float obj2_cx, float obj2_cy,
+        vector2d obj1_vec, vector2d obj2_vec,
+        float obj1_mass, float obj2_mass
+)noexcept nogil:
+    """
+    RETURN VECTORS V1 & V2 OF ORIGINAL OBJECTS AFTER COLLISION (TRIGONOMETRY WITHOUT 
+    TRIGONOMETRIC FUNCTIONS)
+    
+    Same equations than get_momentum_trigonometry_vec (get_v1 & get_v2), with n = (cos φ, sin φ) the 
+    unit vector from centre 1 to centre 2 and vi = |vi|.(cos θi, sin θi):
+    
+    * |vi|.cos(θi - φ) = vi . n (dot product) 
+    * |vi|.sin(θi - φ) = n x vi (cross product)
+    * cos(φ + π/2) = -sin φ and sin(φ + π/2) = cos φ
+    
+    :param obj1_cx  : float; Object 1 centre x coordinate
+    :param obj1_cy  : float; object 1 centre y coordinate
+    :param obj2_cx  : float; object 2 centre x coordinate
+    :param obj2_cy  : float; object 2 centre y coordinate
+    :param obj1_vec : vector2d; object 1 vector velocity/trajectory
+    :param obj2_vec : vector2d; object 2 vector velocity/trajectory
+    :param obj1_mass: float; object 1 mass in kilogrammes
+    :param obj2_mass: float; object 2 mass in kilogrammes
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    cdef:
+        float nx = obj2_cx - obj1_cx
+        float ny = obj2_cy - obj1_cy
+        float d, p1, p2, q1, q2, numerator
+        float m12 = obj1_mass + obj2_mass
+        v_struct collision
+
+    # Invalid pair, the objects keep their velocities
+    if pair_status(obj1_mass, obj2_mass, obj1_cx, obj1_cy, obj2_cx, obj2_cy) != EC_OK:
+        collision.vector1 = obj1_vec
+        collision.vector2 = obj2_vec
+        return collision
+
+    d  = <float>sqrt(nx * nx + ny * ny)
+    nx = nx / d
+    ny = ny / d
+    p1 = obj1_vec.x * nx + obj1_vec.y * ny
+    p2 = obj2_vec.x * nx + obj2_vec.y * ny
+    q1 = nx * obj1_vec.y - ny * obj1_vec.x
+    q2 = nx * obj2_vec.y - ny * obj2_vec.x
+
+    numerator = p1 * (obj1_mass - obj2_mass) + <float>2.0 * obj2_mass * p2
+    vecinit(&collision.vector1, numerator * nx / m12 - q1 * ny, numerator * ny / m12 + q1 * nx)
+    numerator = p2 * (obj2_mass - obj1_mass) + <float>2.0 * obj1_mass * p1
+    vecinit(&collision.vector2, numerator * nx / m12 - q2 * ny, numerator * ny / m12 + q2 * nx)
+    return collision
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline v_struct trigonometry_vec(
+        float obj1_cx, float obj1_cy,
+        float obj2_cx, float obj2_cy,
+        vector2d obj1_vec, vector2d obj2_vec,
+        float obj1_mass, float obj2_mass
+)noexcept nogil:
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION WITH THE SELECTED EVALUATION MODE (SEE SET_TRIG_FREE)
+    
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    if TRIG_FREE:
+        return get_momentum_projection_vec(
+            obj1_cx, obj1_cy, obj2_cx, obj2_cy, obj1_vec, obj2_vec, obj1_mass, obj2_mass)
+    return get_momentum_trigonometry_vec(
+        obj1_cx, obj1_cy, obj2_cx, obj2_cy, obj1_vec, obj2_vec, obj1_mass, obj2_mass)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline void trigonometry_row(
+        real_t [:, ::1] x1, real_t [:, ::1] x2,
+        real_t [:, ::1] v1, real_t [:, ::1] v2,
+        real_t [::1] m1, real_t [::1] m2,
+        real_t sign,
+        real_t [:, ::1] r1, real_t [:, ::1] r2,
+        unsigned char * valid,
+        Py_ssize_t i
+)noexcept nogil:
+    """
+    SOLVE THE ROW I OF THE BATCH ARRAYS AND WRITE V1 & V2 INTO R1[I] & R2[I] (TRIGONOMETRY)
+
+    :param x1  : real_t [:, ::1]; objects 1 centres
+    :param x2  : real_t [:, ::1]; objects 2 centres
+    :param v1  : real_t [:, ::1]; objects 1 vectors
+    :param v2  : real_t [:, ::1]; objects 2 vectors
+    :param m1  : real_t [::1]; objects 1 masses in kilograms
+    :param m2  : real_t [::1]; objects 2 masses in kilograms
+    :param sign: real_t; 1.0 or -1.0 when the Y-axis is inverted
+    :param r1  : real_t [:, ::1]; objects 1 resultant vectors
+    :param r2  : real_t [:, ::1]; objects 2 resultant vectors
+    :param valid: unsigned char pointer or NULL; receive 1 if the pair is valid, 0 otherwise
+    :param i   : Py_ssize_t; row index
+    :return: void
+    """
+    cdef:
+        vector2d vec1, vec2
+        v_struct collision
+        double r[4]
+
+    if real_t is float:
+        if valid != NULL:
+            valid[i] = pair_status(
+                m1[i], m2[i], x1[i, 0], x1[i, 1], x2[i, 0], x2[i, 1]) == EC_OK
+
+        vecinit(&vec1, v1[i, 0], v1[i, 1] * sign)
+        vecinit(&vec2, v2[i, 0], v2[i, 1] * sign)
+
+        collision = trigonometry_vec(
+            x1[i, 0], x1[i, 1] * sign,
+            x2[i, 0], x2[i, 1] * sign,
+            vec1, vec2, m1[i], m2[i])
+
+        r1[i, 0] = collision.vector1.x
+        r1[i, 1] = collision.vector1.y
+        r2[i, 0] = collision.vector2.x
+        r2[i, 1] = collision.vector2.y
+
+    else:
+        # float64 rows are solved in double precision
+        if valid != NULL:
+            valid[i] = pair_status_d(
+                m1[i], m2[i], x1[i, 0], x1[i, 1], x2[i, 0], x2[i, 1]) == EC_OK
+
+        trigonometry_pair_d(
+            x1[i, 0], x1[i, 1] * sign, x2[i, 0], x2[i, 1] * sign,
+            v1[i, 0], v1[i, 1] * sign, v2[i, 0], v2[i, 1] * sign,
+            m1[i], m2[i], r)
+
+        r1[i, 0] = r[0]
+        r1[i, 1] = r[1]
+        r2[i, 0] = r[2]
+        r2[i, 1] = r[3]
+
+
+# ************************************************************************
+# Double precision kernels (float64 batch arrays)
+# ************************************************************************
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline int pair_status_d(
+        double m1, double m2,
+        double x1x, double x1y,
+        double x2x, double x2y
+)noexcept nogil:
+    """
+    RETURN THE STATUS OF A PAIR OF OBJECTS, DOUBLE PRECISION VERSION OF PAIR_STATUS
+    
+    :return: integer; status code EC_OK, EC_INVALID_MASS or EC_COINCIDENT
+    """
+    if not m1 + m2 > 0.0:
+        return EC_INVALID_MASS
+    if x1x == x2x and x1y == x2y:
+        return EC_COINCIDENT
+    return EC_OK
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline double theta_angle_d(double vx, double vy, double vl)noexcept nogil:
+    """
+    RETURN THETA ANGLE Θ IN RADIANS [Π, -Π], DOUBLE PRECISION VERSION OF GET_THETA_ANGLE
+    
+    :param vx: double; vector x component
+    :param vy: double; vector y component
+    :param vl: double; vector length
+    :return  : double; angle Θ in radians (0.0 for an object at rest)
+    """
+    cdef double theta
+    if vl == 0.0:
+        return 0.0
+    theta = acos(fmin(fmax(vx / vl, -1.0), 1.0))
+    return -theta if vy < 0.0 else theta
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef void trigonometry_pair_d(
+        double x1x, double x1y,
+        double x2x, double x2y,
+        double v1x, double v1y,
+        double v2x, double v2y,
+        double m1, double m2,
+        double * r
+)noexcept nogil:
+    """
+    WRITE VECTORS V1 & V2 AFTER COLLISION INTO R[0:4] (TRIGONOMETRY, DOUBLE PRECISION)
+    
+    Same equations than get_momentum_trigonometry_vec, get_v1 & get_v2. 
+    Invalid pairs keep their velocities.
+    
+    :param x1x, x1y: double; object 1 centre
+    :param x2x, x2y: double; object 2 centre
+    :param v1x, v1y: double; object 1 vector
+    :param v2x, v2y: double; object 2 vector
+    :param m1, m2  : double; objects masses in kilograms
+    :param r       : double pointer; receive v1x, v1y, v2x, v2y
+    :return: void
+    """
+    cdef:
+        double phi, theta1, theta2, l1, l2, numerator
+        double m12 = m1 + m2
+
+    if pair_status_d(m1, m2, x1x, x1y, x2x, x2y) != EC_OK:
+        r[0] = v1x
+        r[1] = v1y
+        r[2] = v2x
+        r[3] = v2y
+        return
+
+    if TRIG_FREE:
+        projection_pair_d(x1x, x1y, x2x, x2y, v1x, v1y, v2x, v2y, m1, m2, r)
+        return
+
+    phi = atan2(x2y - x1y, x2x - x1x)
+    if phi > 0.0:
+        phi -= 2.0 * M_PI
+
+    l1 = sqrt(v1x * v1x + v1y * v1y)
+    l2 = sqrt(v2x * v2x + v2y * v2y)
+    theta1 = theta_angle_d(v1x, v1y, l1)
+    theta2 = theta_angle_d(v2x, v2y, l2)
+
+    numerator = l1 * cos(theta1 - phi) * (m1 - m2) + 2.0 * m2 * l2 * cos(theta2 - phi)
+    r[0] = numerator * cos(phi) / m12 + l1 * sin(theta1 - phi) * cos(phi + M_PI2)
+    r[1] = numerator * sin(phi) / m12 + l1 * sin(theta1 - phi) * sin(phi + M_PI2)
+
+    numerator = l2 * cos(theta2 - phi) * (m2 - m1) + 2.0 * m1 * l1 * cos(theta1 - phi)
+    r[2] = numerator * cos(phi) / m12 + l2 * sin(theta2 - phi) * cos(phi + M_PI2)
+    r[3] = numerator * sin(phi) / m12 + l2 * sin(theta2 - phi) * sin(phi + M_PI2)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline void projection_pair_d(
+        double x1x, double x1y,
+        double x2x, double x2y,
+        double v1x, double v1y,
+        double v2x, double v2y,
+        double m1, double m2,
+        double * r
+)noexcept nogil:
+    """
+    WRITE VECTORS V1 & V2 AFTER COLLISION INTO R[0:4] (DOT & CROSS PRODUCTS, DOUBLE PRECISION)
+    
+    Double precision version of get_momentum_projection_vec, the pair must be valid.
+    
+    :param r: double pointer; receive v1x, v1y, v2x, v2y
+    :return: void
+    """
+    cdef:
+        double nx = x2x - x1x
+        double ny = x2y - x1y
+        double d = sqrt(nx * nx + ny * ny)
+        double p1, p2, q1, q2, numerator
+        double m12 = m1 + m2
+
+    nx = nx / d
+    ny = ny / d
+    p1 = v1x * nx + v1y * ny
+    p2 = v2x * nx + v2y * ny
+    q1 = nx * v1y - ny * v1x
+    q2 = nx * v2y - ny * v2x
+
+    numerator = p1 * (m1 - m2) + 2.0 * m2 * p2
+    r[0] = numerator * nx / m12 - q1 * ny
+    r[1] = numerator * ny / m12 + q1 * nx
+    numerator = p2 * (m2 - m1) + 2.0 * m1 * p1
+    r[2] = numerator * nx / m12 - q2 * ny
+    r[3] = numerator * ny / m12 + q2 * nx
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef void angle_free_pair_d(
+        double v1x, double v1y,
+        double v2x, double v2y,
+        double m1, double m2,
+        double x1x, double x1y,
+        double x2x, double x2y,
+        double * r
+)noexcept nogil:
+    """
+    WRITE VECTORS V1 & V2 AFTER COLLISION INTO R[0:4] (ANGLE FREE, DOUBLE PRECISION)
+    
+    Same equations than get_v1_angle_free_vec & get_v2_angle_free_vec. 
+    Invalid pairs keep their velocities.
+    
+    :param v1x, v1y: double; object 1 vector
+    :param v2x, v2y: double; object 2 vector
+    :param m1, m2  : double; objects masses in kilograms
+    :param x1x, x1y: double; object 1 centre
+    :param x2x, x2y: double; object 2 centre
+    :param r       : double pointer; receive v1x, v1y, v2x, v2y
+    :return: void
+    """
+    cdef:
+        double dx = x1x - x2x
+        double dy = x1y - x2y
+        double k
+
+    if pair_status_d(m1, m2, x1x, x1y, x2x, x2y) != EC_OK:
+        r[0] = v1x
+        r[1] = v1y
+        r[2] = v2x
+        r[3] = v2y
+        return
+
+    # dot(v1 - v2, x1 - x2) / |x1 - x2|^2
+    k = ((v1x - v2x) * dx + (v1y - v2y) * dy) / (dx * dx + dy * dy)
+    r[0] = v1x - (2.0 * m2 / (m1 + m2)) * k * dx
+    r[1] = v1y - (2.0 * m2 / (m1 + m2)) * k * dy
+    r[2] = v2x + (2.0 * m1 / (m1 + m2)) * k * dx
+    r[3] = v2y + (2.0 * m1 / (m1 + m2)) * k * dy
+
+
 cpdef object get_v11(
         v1_     : Vector2,
         v2_     : Vector2,
@@ -355,12 +1656,12 @@ cpdef object get_v11(
     return Vector2(vector1.x, vector1.y)
 
 
-cdef inline vector2d get_v1(
+cdef vector2d get_v1(
         float v1_, float v2_,
         float theta1_, float theta2_,
         float phi_,
         float m1_, float m2_
-)nogil:
+)noexcept nogil:
     """
     RETURN SCALAR SIZE V1 OF THE ORIGINAL OBJECT REPRESENTED BY (V1, THETA1, M1) TRIGONOMETRY
  
@@ -386,16 +1687,11 @@ cdef inline vector2d get_v1(
         float m12 = m1_ + m2_
         vector2d v1_vec
 
-    if v1_ < 0.0 or v2_ < 0.0:
-        with gil:
-            raise ValueError(
-                '\n|v1_|, |v2_| magnitude must be >= 0.0 ' 
-                '\n|v1|=%s |v2|=%s ' % (v1_, v2_))
-
-    if m12 <= 0.0:
-        with gil:
-            raise ValueError(
-                "Object's mass should be > 0.0")
+    # A zero length vector (object at rest) is valid. With m1 + m2 <= 0 the
+    # object keeps its velocity (see pair_status)
+    if not m12 > 0.0:
+        vecinit(&v1_vec, v1_ * <float>cos(theta1_), v1_ * <float>sin(theta1_))
+        return v1_vec
 
     r1 = theta1_ - phi_
     r2 = phi_ + M_PI2
@@ -432,7 +1728,7 @@ cpdef object get_v12(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline vector2d get_v2(
+cdef vector2d get_v2(
         float v1_,
         float v2_,
         float theta1_,
@@ -440,7 +1736,7 @@ cdef inline vector2d get_v2(
         float phi_,
         float m1_,
         float m2_
-)nogil:
+)noexcept nogil:
     """
     RETURN SCALAR SIZE V2_ OF THE ORIGINAL OBJECT REPRESENTED BY (V2_, THETA2_, M2_) TRIGONOMETRY
 
@@ -468,15 +1764,11 @@ cdef inline vector2d get_v2(
     r1 = theta2_ - phi_
     r2 = phi_ + M_PI2
 
-    if v1_ < 0.0 or v2_ < 0.0:
-        with gil:
-            raise ValueError(
-                "\n|v1_|, |v2_| magnitude must be >= 0.0"
-                "\n|v1|=%s |v2|=%s " % (v1_, v2_))
-
-    if m21 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # A zero length vector (object at rest) is valid. With m1 + m2 <= 0 the
+    # object keeps its velocity (see pair_status)
+    if not m21 > 0.0:
+        vecinit(&v2_vec, v2_ * <float>cos(theta2_), v2_ * <float>sin(theta2_))
+        return v2_vec
 
     numerator = v2_ * <float>cos(r1) * (m2_ - m1_) + <float>(2.0 * m1_ * v1_) * <float>cos(theta1_ - phi_)
     v2x = numerator * <float>cos(phi_) / m21 + v2_ * <float>sin(r1) * <float>cos(r2)
@@ -529,14 +1821,14 @@ cpdef object get_v1_angle_free_v1(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline vector2d get_v1_angle_free_vec(
+cdef vector2d get_v1_angle_free_vec(
         vector2d v1,
         vector2d v2,
         float m1,
         float m2,
         vector2d x1,
         vector2d x2
-)nogil:
+)noexcept nogil:
     """
     SCALAR SIZE V1_ OF THE ORIGINAL OBJECT SPEED REPRESENTED BY (V1_, M1_, X1 ARGUMENTS).
 
@@ -550,18 +1842,9 @@ cdef inline vector2d get_v1_angle_free_vec(
     """
     cdef float m12 = m1 + m2
 
-    if vlength(&v1) == 0.0 and vlength(&v2) == 0.0:
-        printf("\nv1 & v2 vector length cannot be both null")
-
-    if vlength(&v1) < 0.0 or vlength(&v2) < 0.0:
-        with gil:
-            raise ValueError(
-                "\n|v1|, |v2| magnitude must be >= 0.0 "
-                "\n|v1|=%s |v2|=%s " % (vlength(&v1), vlength(&v2)))
-
-    if m12 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # Invalid pair, the object keeps its velocity (objects at rest are valid)
+    if pair_status(m1, m2, x1.x, x1.y, x2.x, x2.y) != EC_OK:
+        return v1
 
     cdef float mass = <float>(2.0 * m2 / m12)      # mass coefficient in the equation
     cdef vector2d v12, x12		                # 2d vector declaration v12 & x12
@@ -620,14 +1903,14 @@ cpdef object get_v2_angle_free_v2(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline vector2d get_v2_angle_free_vec(
+cdef vector2d get_v2_angle_free_vec(
         vector2d v1,
         vector2d v2,
         float m1,
         float m2,
         vector2d x1,
         vector2d x2
-)nogil:
+)noexcept nogil:
     """
     SCALAR SIZE V2_ OF THE ORIGINAL OBJECT SPEED REPRESENTED BY (V2_, M2_, X2 ARGUMENTS).
 
@@ -641,19 +1924,9 @@ cdef inline vector2d get_v2_angle_free_vec(
     """
     cdef float m12 = m1 + m2
 
-    if vlength(&v1) == 0.0 and vlength(&v2) == 0.0:
-        printf("\nv1 & v2 vector length cannot be both null")
-
-    # At least one object must be in motion
-    if vlength(&v1) < 0.0 or vlength(&v2) < 0.0:
-        with gil:
-            raise ValueError(
-                "\n|v1|, |v2| magnitude must be >= 0.0"
-                "\n|v1|=%s |v2|=%s " % (vlength(&v1), vlength(&v2)))
-
-    if m12 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # Invalid pair, the object keeps its velocity (objects at rest are valid)
+    if pair_status(m1, m2, x1.x, x1.y, x2.x, x2.y) != EC_OK:
+        return v2
 
     cdef float mass = <float>(2.0 * m1 / m12)   # mass coefficient in the equation
     cdef vector2d v21, x21		                # 2d vector declaration v21 & x21
@@ -713,14 +1986,14 @@ cpdef tuple get_angle_free_v1v2(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline v_struct get_angle_free_vec(
+cdef v_struct get_angle_free_vec(
         vector2d v1,
         vector2d v2,
         float m1,
         float m2,
         vector2d x1,
         vector2d x2
-)nogil:
+)noexcept nogil:
 
     """
     RETURN BOTH FINAL VELOCITIES VECTORS V1 & V2 
@@ -749,7 +2022,164 @@ cdef inline v_struct get_angle_free_vec(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline float vector_length(float x, float y)nogil:
+cdef v_struct trigonometry_vector2(
+        object obj1_centre, object obj2_centre,
+        object obj1_vector, object obj2_vector,
+        float obj1_mass, float obj2_mass,
+        bint invert):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FROM VECTOR2 INPUTS (TRIGONOMETRY)
+    
+    The Y-axis inversion is applied to local copies, the Vector2 inputs are unchanged
+    
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    cdef:
+        float sign = -<float>1.0 if invert else <float>1.0
+        float v1_y = obj1_vector.y, v2_y = obj2_vector.y
+        float c1_x = obj1_centre.x, c1_y = obj1_centre.y
+        float c2_x = obj2_centre.x, c2_y = obj2_centre.y
+        vector2d vec1, vec2
+
+    check_status(pair_status(obj1_mass, obj2_mass, c1_x, c1_y * sign, c2_x, c2_y * sign))
+    vecinit(&vec1, obj1_vector.x, v1_y * sign)
+    vecinit(&vec2, obj2_vector.x, v2_y * sign)
+    return trigonometry_vec(
+        c1_x, c1_y * sign, c2_x, c2_y * sign, vec1, vec2, obj1_mass, obj2_mass)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef v_struct angle_free_vector2(
+        object obj1_vector, object obj2_vector,
+        float obj1_mass, float obj2_mass,
+        object obj1_centre, object obj2_centre,
+        bint invert):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FROM VECTOR2 INPUTS (ANGLE FREE METHOD)
+    
+    The Y-axis inversion is applied to local copies, the Vector2 inputs are unchanged
+    
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    cdef:
+        float sign = -<float>1.0 if invert else <float>1.0
+        float v1_y = obj1_vector.y, v2_y = obj2_vector.y
+        float c1_y = obj1_centre.y, c2_y = obj2_centre.y
+        vector2d vec1, vec2, x1_vec, x2_vec
+
+    vecinit(&vec1, obj1_vector.x, v1_y * sign)
+    vecinit(&vec2, obj2_vector.x, v2_y * sign)
+    vecinit(&x1_vec, obj1_centre.x, c1_y * sign)
+    vecinit(&x2_vec, obj2_centre.x, c2_y * sign)
+    check_status(pair_status(obj1_mass, obj2_mass, x1_vec.x, x1_vec.y, x2_vec.x, x2_vec.y))
+    return get_angle_free_vec(vec1, vec2, obj1_mass, obj2_mass, x1_vec, x2_vec)
+
+
+cdef inline bint is_float32(const char * fmt)nogil:
+    """
+    RETURN TRUE WHEN A BUFFER FORMAT STRING DESCRIBES A NATIVE FLOAT32 ('f', '=f', '<f', '@f')
+    """
+    if fmt == NULL:
+        return False
+    if fmt[0] == b'@' or fmt[0] == b'=' or fmt[0] == b'<':
+        fmt += 1
+    return fmt[0] == b'f' and fmt[1] == 0
+
+
+cdef int write_buffer(object out, v_struct collision) except -1:
+    """
+    WRITE VECTORS V1 & V2 INTO A CALLER BUFFER AS (V1.X, V1.Y, V2.X, V2.Y)
+    
+    The buffer is accessed through the buffer protocol, no intermediate object is created
+    
+    :param out: float32 writable contiguous buffer of length >= 4
+    :param collision: v_struct; vectors v1 & v2
+    :return: 0, -1 when an exception is raised
+    """
+    cdef:
+        Py_buffer view
+        float * data
+
+    PyObject_GetBuffer(out, &view, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_ANY_CONTIGUOUS)
+    try:
+        if not is_float32(view.format) or view.len < <Py_ssize_t>(4 * sizeof(float)):
+            raise ValueError("\nArgument out must be a float32 buffer with at least 4 items.")
+        data = <float *>view.buf
+        data[0] = collision.vector1.x
+        data[1] = collision.vector1.y
+        data[2] = collision.vector2.x
+        data[3] = collision.vector2.y
+    finally:
+        PyBuffer_Release(&view)
+    return 0
+
+
+cdef inline void write_vector2(object v1_out, object v2_out, v_struct collision):
+    """
+    UPDATE THE VECTOR2 V1_OUT & V2_OUT WITH VECTORS V1 & V2 (IN PLACE)
+    """
+    v1_out.x = collision.vector1.x
+    v1_out.y = collision.vector1.y
+    v2_out.x = collision.vector2.x
+    v2_out.y = collision.vector2.y
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef int pair_status(
+        float m1, float m2,
+        float x1x, float x1y,
+        float x2x, float x2y
+)noexcept nogil:
+    """
+    RETURN THE STATUS OF A PAIR OF OBJECTS BEFORE SOLVING THE COLLISION
+    
+    The kernels do not raise, an invalid pair is not solved and both objects keep 
+    their velocities. Objects at rest (zero length vector) are valid.
+    
+    * EC_OK           : the pair can be solved 
+    * EC_INVALID_MASS : m1 + m2 <= 0 (or not a number)
+    * EC_COINCIDENT   : both centres are identical, the contact normal is undefined
+    
+    :param m1 : float; object 1 mass in kg
+    :param m2 : float; object 2 mass in kg
+    :param x1x: float; object 1 centre x coordinate
+    :param x1y: float; object 1 centre y coordinate
+    :param x2x: float; object 2 centre x coordinate
+    :param x2y: float; object 2 centre y coordinate
+    :return: integer; status code
+    """
+    if not m1 + m2 > 0.0:
+        return EC_INVALID_MASS
+    if x1x == x2x and x1y == x2y:
+        return EC_COINCIDENT
+    return EC_OK
+
+
+cdef int check_status(int status) except -1:
+    """
+    RAISE A VALUEERROR WHEN A PAIR CANNOT BE SOLVED (PYTHON INTERFACE ONLY)
+    
+    :param status: integer; status code returned by pair_status
+    :return: 0, -1 when an exception is raised
+    """
+    if status == EC_INVALID_MASS:
+        raise ValueError("\nObject's mass should be > 0.0")
+    if status == EC_COINCIDENT:
+        raise ValueError("\nObjects centres cannot be identical (contact normal undefined).")
+    return 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef float vector_length(float x, float y)noexcept nogil:
     """
     CALCULATE A VECTOR LENGTH GIVEN ITS COMPONENTS (SCALAR VALUES)
 
@@ -781,7 +2211,7 @@ cpdef float get_contact_angle_(v1x: float, v1y: float, v2x: float, v2y: float):
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline float get_contact_angle(float v1x, float v1y, float v2x, float v2y)nogil:
+cdef float get_contact_angle(float v1x, float v1y, float v2x, float v2y)noexcept nogil:
     """
     RETURN THE CONTACT ANGLE Φ [0, -2Π] IN RADIANS BETWEEN OBJ1 AND 
     OBJ2 OR [0 ... -360 degrees].
@@ -834,7 +2264,7 @@ cpdef float get_theta_angle_(vector_: Vector2):
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef inline float get_theta_angle(vector2d vector_)nogil:
+cdef float get_theta_angle(vector2d vector_)noexcept nogil:
     """
     RETURN THETA ANGLE Θ IN RADIANS [Π, -Π]
 
@@ -859,9 +2289,10 @@ cdef inline float get_theta_angle(vector2d vector_)nogil:
         float vl = vlength(&vector_)
 
     if vl != 0.0:
-        theta = <float> acos(vector_.x / vl)
+        # clamp the cosine, rounding errors can push x / |v| slightly outside [-1, 1]
+        theta = <float> acos(fmin(fmax(vector_.x / vl, -1.0), 1.0))
     else:
-        # Avoid division by zero, (at contact time object should be moving).
+        # Object at rest, no direction (theta is not used as |v| = 0)
         return 0.0
 
     # acos returns values in range [0 ... + pi]
@@ -25,6 +25,7 @@ SOFTWARE.
 
 """
 
+import os
 import warnings
 
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -56,18 +57,15 @@ except ImportError:
     raise ImportError("\n<numpy> library is missing on your system."
           "\nTry: \n   C:\\pip install numpy on a window command prompt.")
 
-from libc.math cimport cos, sin, atan2, acos, sqrt
+from libc.math cimport cos, sin, atan2, acos, sqrt, fabs, INFINITY
+from libc.stdlib cimport malloc, realloc, free
+from cython.parallel cimport prange
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, \
+    PyBUF_WRITABLE, PyBUF_FORMAT, PyBUF_ANY_CONTIGUOUS
 
+# struct vector2d & v_struct are declared in ec_real.pxd (Source/vector.h)
 cdef extern from '../Source/vector.c':
 
-    struct vector2d:
-       float x
-       float y
-
-    struct v_struct:
-        vector2d vector1
-        vector2d vector2
-
     void vecinit(vector2d *v, float x, float y)nogil
     float vlength(vector2d *v)nogil
     void scale_inplace(float c, vector2d *v)nogil
@@ -79,8 +77,100 @@ cdef extern from '../Source/vector.c':
 DEF M_PI  = 3.14159265358979323846
 DEF M_PI2 = 3.14159265358979323846 / 2.0
 
+# Floating point types accepted by the batch functions (numpy float32 & float64 arrays),
+# the float64 arrays are solved in double precision without conversion
+ctypedef fused real_t:
+    float
+    double
+
 __version__ = "1.0.5"
 
+# **************************** OPENMP SETTINGS ****************************************
+
+# Number of threads used by the batch kernels and minimum number of pairs
+# before the work is shared between the threads (small batches stay serial,
+# the thread start-up cost would be higher than the work itself).
+cdef int THREADS = <int>(os.cpu_count() or 1)
+cdef Py_ssize_t THRESHOLD = 4096
+
+
+cpdef void set_num_threads(int threads):
+    """
+    SET THE NUMBER OF THREADS USED BY THE BATCH KERNELS (OPENMP)
+
+    :param threads: integer; number of threads (must be > 0), 1 disable the parallel loops
+    :return: void
+    """
+    global THREADS
+    if threads < 1:
+        raise ValueError("\nArgument threads must be > 0, got %s " % threads)
+    THREADS = threads
+
+
+cpdef int get_num_threads():
+    """
+    RETURN THE NUMBER OF THREADS USED BY THE BATCH KERNELS (OPENMP)
+
+    :return: integer; number of threads
+    """
+    return THREADS
+
+
+cpdef void set_parallel_threshold(Py_ssize_t threshold):
+    """
+    SET THE MINIMUM NUMBER OF PAIRS BEFORE A BATCH IS SOLVED IN PARALLEL
+
+    Below this size the batch kernels are running on a single thread.
+
+    :param threshold: integer; number of pairs (must be >= 0)
+    :return: void
+    """
+    global THRESHOLD
+    if threshold < 0:
+        raise ValueError("\nArgument threshold must be >= 0, got %s " % threshold)
+    THRESHOLD = threshold
+
+
+cpdef Py_ssize_t get_parallel_threshold():
+    """
+    RETURN THE MINIMUM NUMBER OF PAIRS BEFORE A BATCH IS SOLVED IN PARALLEL
+
+    :return: integer; number of pairs
+    """
+    return THRESHOLD
+
+# **************************** TRIGONOMETRY EVALUATION MODE ***************************
+
+# When True the trigonometric entry points (momentum_trigonometry_real*) evaluate the same
+# equations with dot & cross products instead of atan2, acos, cos & sin
+cdef bint TRIG_FREE = False
+
+
+cpdef void set_trig_free(bint enable):
+    """
+    SELECT THE EVALUATION MODE OF THE TRIGONOMETRIC METHOD (momentum_trigonometry_real*)
+
+    With enable=True cos(θ - φ), sin(θ - φ), cos(φ) & sin(φ) are obtained from normalized
+    dot & cross products, the angles are never computed. The results are identical within
+    the float precision and the speed is close to the angle free method, the call sites
+    do not change.
+
+    :param enable: bool; True for the dot & cross products, False for the trigonometric
+    functions (default)
+    :return: void
+    """
+    global TRIG_FREE
+    TRIG_FREE = enable
+
+
+cpdef bint get_trig_free():
+    """
+    RETURN TRUE WHEN THE TRIGONOMETRIC METHOD IS EVALUATED WITH DOT & CROSS PRODUCTS
+
+    :return: bool
+    """
+    return TRIG_FREE
+
 # **************************** PYTHON INTERFACE ***************************************
 
 @cython.boundscheck(False)
@@ -128,12 +218,14 @@ cpdef tuple momentum_trigonometry_real(
     v1_x, v1_y, v2_x, v2_y = obj1_vector.x, obj1_vector.y, obj2_vector.x, obj2_vector.y
     c1_x, c1_y, c2_x, c2_y = obj1_centre.x, obj1_centre.y, obj2_centre.x, obj2_centre.y
 
+    check_status(pair_status(obj1_mass, obj2_mass, c1_x, c1_y, c2_x, c2_y))
+
     with nogil:
         vecinit(&vec1, v1_x, v1_y)
         vecinit(&vec2, v2_x, v2_y)
         # DETERMINES V1 & V2 COMPONENTS AFTER COLLISION
         collision = \
-            get_momentum_trigonometry_vecR(
+            trigonometry_vec(
                 c1_x, c1_y, c2_x, c2_y,
                 vec1, vec2, obj1_mass, obj2_mass)
 
@@ -189,6 +281,8 @@ cpdef tuple momentum_angle_free_real(
     v1_x, v1_y, v2_x, v2_y = obj1_vector.x, obj1_vector.y, obj2_vector.x, obj2_vector.y
     c1_x, c1_y, c2_x, c2_y = obj1_centre.x, obj1_centre.y, obj2_centre.x, obj2_centre.y
 
+    check_status(pair_status(obj1_mass, obj2_mass, c1_x, c1_y, c2_x, c2_y))
+
     with nogil:
         vecinit(&vec1, v1_x, v1_y)
         vecinit(&vec2, v2_x, v2_y)
@@ -200,6 +294,957 @@ cpdef tuple momentum_angle_free_real(
     return Vector2(v.vector1.x, v.vector1.y), \
            Vector2(v.vector2.x, v.vector2.y)
 
+
+# **************************** ALLOCATION FREE *****************************************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_trigonometry_real_into(
+        obj1_centre : Vector2,
+        obj2_centre : Vector2,
+        obj1_vector : Vector2,
+        obj2_vector : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        object out):
+    """
+    WRITE VECTORS V1 & V2 AFTER OBJECT COLLISION INTO A BUFFER (TRIGONOMETRY)
+    
+    Same than momentum_trigonometry_real but the result is written into the caller buffer 
+    <out> as (v1.x, v1.y, v2.x, v2.y), no tuple or Vector2 is created. 
+    
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param out: float32 writable contiguous buffer (numpy.ndarray, array.array('f') etc) 
+    of length >= 4; receive v1.x, v1.y, v2.x, v2.y
+    :return: void 
+    """
+    write_buffer(out, trigonometry_vector2(
+        obj1_centre, obj2_centre, obj1_vector, obj2_vector, obj1_mass, obj2_mass))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_trigonometry_real_inplace(
+        obj1_centre : Vector2,
+        obj2_centre : Vector2,
+        obj1_vector : Vector2,
+        obj2_vector : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        v1_out      : Vector2,
+        v2_out      : Vector2):
+    """
+    UPDATE TWO EXISTING VECTOR2 WITH VECTORS V1 & V2 AFTER OBJECT COLLISION (TRIGONOMETRY)
+    
+    Same than momentum_trigonometry_real but the result is written into the existing vectors 
+    v1_out & v2_out, no tuple or Vector2 is created. v1_out & v2_out can be the objects 
+    vectors obj1_vector & obj2_vector (the velocities are then updated in place).
+    
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param v1_out: Vector2; receive object 1 vector after collision
+    :param v2_out: Vector2; receive object 2 vector after collision
+    :return: void 
+    """
+    write_vector2(v1_out, v2_out, trigonometry_vector2(
+        obj1_centre, obj2_centre, obj1_vector, obj2_vector, obj1_mass, obj2_mass))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_angle_free_real_into(
+        obj1_vector  : Vector2,
+        obj2_vector  : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        obj1_centre  : Vector2,
+        obj2_centre  : Vector2,
+        object out):
+    """
+    WRITE VECTORS V1 & V2 AFTER OBJECT COLLISION INTO A BUFFER (ANGLE FREE METHOD)
+    
+    Same than momentum_angle_free_real but the result is written into the caller buffer 
+    <out> as (v1.x, v1.y, v2.x, v2.y), no tuple or Vector2 is created. 
+    
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param out: float32 writable contiguous buffer (numpy.ndarray, array.array('f') etc) 
+    of length >= 4; receive v1.x, v1.y, v2.x, v2.y
+    :return: void 
+    """
+    write_buffer(out, angle_free_vector2(
+        obj1_vector, obj2_vector, obj1_mass, obj2_mass, obj1_centre, obj2_centre))
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef void momentum_angle_free_real_inplace(
+        obj1_vector  : Vector2,
+        obj2_vector  : Vector2,
+        float obj1_mass,
+        float obj2_mass,
+        obj1_centre  : Vector2,
+        obj2_centre  : Vector2,
+        v1_out       : Vector2,
+        v2_out       : Vector2):
+    """
+    UPDATE TWO EXISTING VECTOR2 WITH VECTORS V1 & V2 AFTER OBJECT COLLISION (ANGLE FREE METHOD)
+    
+    Same than momentum_angle_free_real but the result is written into the existing vectors 
+    v1_out & v2_out, no tuple or Vector2 is created. v1_out & v2_out can be the objects 
+    vectors obj1_vector & obj2_vector (the velocities are then updated in place).
+    
+    :param obj1_vector: Vector2; Object 1 direction, un-normalized 2d Vector
+    :param obj2_vector: Vector2; Object 2 direction, un-normalized 2d Vector
+    :param obj1_mass: float; Mass of object 1 in kg 
+    :param obj2_mass: float; Mass of object 2 in kg
+    :param obj1_centre: Vector2; Centre of object 1 
+    :param obj2_centre: Vector2; Centre of object 2 
+    :param v1_out: Vector2; receive object 1 vector after collision
+    :param v2_out: Vector2; receive object 2 vector after collision
+    :return: void 
+    """
+    write_vector2(v1_out, v2_out, angle_free_vector2(
+        obj1_vector, obj2_vector, obj1_mass, obj2_mass, obj1_centre, obj2_centre))
+
+
+# **************************** ANGLE FREE (BATCH) **************************************************
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef tuple momentum_angle_free_real_batch(
+    real_t [:, ::1] obj1_vector,
+    real_t [:, ::1] obj2_vector,
+    real_t [::1] obj1_mass,
+    real_t [::1] obj2_mass,
+    real_t [:, ::1] obj1_centre,
+    real_t [:, ::1] obj2_centre,
+    object v1_out = None,
+    object v2_out = None,
+    object valid  = None
+    ):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FOR N PAIRS OF OBJECTS (ANGLE FREE METHOD)
+
+    Batch version of momentum_angle_free_real. Row i of each array describes the
+    i-th pair of colliding objects, all the pairs are solved in a single call and
+    the loop is running without the GIL.
+
+    * obj1_vector & obj2_vector are un-normalized vectors in order to keep the total kinetic
+      energy and to redistribute the force to the final velocities (v1 & v2)
+
+    * v1_out & v2_out can be the input arrays obj1_vector & obj2_vector, the
+      velocities are then updated in place.
+
+    * Invalid pairs (both centres identical or m1 + m2 <= 0) do not raise, the objects
+      keep their velocities and valid[i] is set to 0 (objects at rest are valid).
+
+    * The arrays can be float32 or float64 (all the arrays must share the same dtype).
+      float64 arrays are used without conversion and solved in double precision.
+
+    :param obj1_vector: numpy.ndarray shape (N, 2) float32|float64 contiguous; Object 1 direction vectors
+    :param obj2_vector: numpy.ndarray shape (N, 2) float32|float64 contiguous; Object 2 direction vectors
+    :param obj1_mass  : numpy.ndarray shape (N,) float32|float64 contiguous; Mass of object 1 in kg
+    :param obj2_mass  : numpy.ndarray shape (N,) float32|float64 contiguous; Mass of object 2 in kg
+    :param obj1_centre: numpy.ndarray shape (N, 2) float32|float64 contiguous; Centre of object 1
+    :param obj2_centre: numpy.ndarray shape (N, 2) float32|float64 contiguous; Centre of object 2
+    :param v1_out     : numpy.ndarray shape (N, 2) same dtype contiguous or None; receive the
+    object 1 vectors after collision. A new array is created when None.
+    :param v2_out     : numpy.ndarray shape (N, 2) same dtype contiguous or None; receive the
+    object 2 vectors after collision. A new array is created when None.
+    :param valid      : numpy.ndarray shape (N,) uint8 contiguous or None; receive 1 for the
+    solved pairs and 0 for the invalid pairs.
+    :return: Tuple containing the arrays v1 and v2 (objects vectors after collision).
+    """
+    cdef:
+        Py_ssize_t n = obj1_vector.shape[0]
+        Py_ssize_t i
+        unsigned char [::1] valid_
+        unsigned char * mask = NULL
+        object dtype = numpy.float32 if real_t is float else numpy.float64
+
+    if obj2_vector.shape[0] != n or obj1_centre.shape[0] != n or obj2_centre.shape[0] != n \
+            or obj1_mass.shape[0] != n or obj2_mass.shape[0] != n:
+        raise ValueError("\nAll the arrays must have the same length, "
+                         "expecting %s pairs." % n)
+
+    if obj1_vector.shape[1] != 2 or obj2_vector.shape[1] != 2 \
+            or obj1_centre.shape[1] != 2 or obj2_centre.shape[1] != 2:
+        raise ValueError("\nVectors and centres arrays must be shape (N, 2).")
+
+    if v1_out is None:
+        v1_out = numpy.empty((n, 2), dtype=dtype)
+    if v2_out is None:
+        v2_out = numpy.empty((n, 2), dtype=dtype)
+
+    cdef:
+        real_t [:, ::1] r1 = v1_out
+        real_t [:, ::1] r2 = v2_out
+
+    if r1.shape[0] != n or r1.shape[1] != 2 or r2.shape[0] != n or r2.shape[1] != 2:
+        raise ValueError("\nv1_out & v2_out must be shape (%s, 2)." % n)
+
+    if valid is not None:
+        valid_ = valid
+        if valid_.shape[0] != n:
+            raise ValueError("\nvalid must be shape (%s,)." % n)
+        if n > 0:
+            mask = &valid_[0]
+
+    with nogil:
+        # LARGE BATCHES ARE SHARED BETWEEN THE THREADS (PAIRS ARE INDEPENDENT)
+        if n >= THRESHOLD and THREADS > 1:
+            for i in prange(n, schedule='static', num_threads=THREADS):
+                angle_free_row(
+                    obj1_vector, obj2_vector, obj1_mass, obj2_mass,
+                    obj1_centre, obj2_centre, r1, r2, mask, i)
+        else:
+            for i in range(n):
+                angle_free_row(
+                    obj1_vector, obj2_vector, obj1_mass, obj2_mass,
+                    obj1_centre, obj2_centre, r1, r2, mask, i)
+
+    return v1_out, v2_out
+
+
+# **************************** EVENT DRIVEN SIMULATION *********************************************
+
+# Event kinds
+cdef enum:
+    EV_PAIR   = 0
+    EV_WALL_X = 1
+    EV_WALL_Y = 2
+    EV_CELL_X = 3
+    EV_CELL_Y = 4
+
+# Predicted event (time, bodies & their collision counters at prediction time)
+cdef struct event:
+    double t
+    int a
+    int b
+    int count_a
+    int count_b
+    int kind
+
+
+cdef inline bint event_less(event * p, event * q) noexcept nogil:
+    return p.t < q.t
+
+
+cdef class EventDriven:
+    """
+    EVENT DRIVEN SIMULATION OF ELASTIC DISCS (PRIORITY QUEUE)
+
+    The discs move in straight lines between two collisions. For each disc the time of
+    its next collision with the neighbouring discs, with the walls of the domain and
+    the time it leaves its cell are predicted and kept in a heap (priority queue). The
+    simulation jumps from one event to the next, each contact is solved with the angle
+    free equations of momentum_angle_free_real (double precision). A collision makes the
+    other predictions of both discs obsolete, the events are invalidated lazily (collision
+    counters) and the two discs are predicted again.
+
+    * Suited to dilute gases, the work only depends on the number of collisions and not
+      on the number of frames. The cells (cell list, at least the largest diameter) limit
+      the predictions to the discs of the 9 neighbouring cells.
+
+    * advance(dt) processes the events up to time + dt, the positions at that time are
+      available for rendering snapshots (pos & vel properties). The fixed time step
+      engine (Collision, resolve_pairs) remains available.
+
+    * The discs must be inside the domain lower ... upper and must not overlap.
+
+    e.g:
+        gas = EventDriven(pos, vel, mass, radius, (0, 0), (1024, 1024))
+        while True:
+            gas.advance(1.0)       # one frame
+            draw(gas.pos)
+    """
+    cdef:
+        readonly double time
+        readonly Py_ssize_t events
+        readonly Py_ssize_t collisions
+        int n
+        double * x
+        double * y
+        double * vx
+        double * vy
+        double * t
+        double * m
+        double * r
+        int * count
+        int * cx
+        int * cy
+        int * next
+        int * prev
+        int * head
+        int ncx, ncy
+        double x_min, y_min, x_max, y_max, cell
+        event * heap
+        Py_ssize_t length
+        Py_ssize_t capacity
+
+    def __cinit__(self):
+        self.x = self.y = self.vx = self.vy = self.t = self.m = self.r = NULL
+        self.count = self.cx = self.cy = self.next = self.prev = self.head = NULL
+        self.heap = NULL
+        self.length = 0
+        self.capacity = 0
+
+    def __init__(self, object pos, object vel, object mass, object radius,
+                 tuple lower, tuple upper, double cell_size = 0.0):
+        """
+        :param pos      : numpy.ndarray shape (N, 2); discs centres
+        :param vel      : numpy.ndarray shape (N, 2); discs vectors (pixels per time unit)
+        :param mass     : numpy.ndarray shape (N,); discs mass in kg
+        :param radius   : numpy.ndarray shape (N,); discs radii
+        :param lower    : tuple (x, y); domain top left corner
+        :param upper    : tuple (x, y); domain bottom right corner
+        :param cell_size: float; cell size (default 0.0, largest diameter)
+        """
+        cdef:
+            double [:, ::1] pos_ = numpy.ascontiguousarray(pos, dtype=numpy.float64)
+            double [:, ::1] vel_ = numpy.ascontiguousarray(vel, dtype=numpy.float64)
+            double [::1] mass_ = numpy.ascontiguousarray(mass, dtype=numpy.float64)
+            double [::1] radius_ = numpy.ascontiguousarray(radius, dtype=numpy.float64)
+            int i, n = <int>pos_.shape[0]
+            double r_max = 0.0
+
+        if pos_.shape[1] != 2 or vel_.shape[0] != n or vel_.shape[1] != 2:
+            raise ValueError("\npos & vel arrays must be shape (N, 2).")
+        if mass_.shape[0] != n or radius_.shape[0] != n:
+            raise ValueError("\npos, vel, mass & radius must have the same length.")
+        if len(lower) != 2 or len(upper) != 2:
+            raise ValueError("\nlower & upper must be tuples (x, y).")
+        if cell_size < 0.0:
+            raise ValueError("\ncell_size must be >= 0.0, got %s." % cell_size)
+
+        self.x_min, self.y_min = lower
+        self.x_max, self.y_max = upper
+        for i in range(n):
+            if not mass_[i] > 0.0 or radius_[i] < 0.0:
+                raise ValueError("\nmass must be > 0.0 and radius >= 0.0, got %s and %s "
+                                 "for the disc %s." % (mass_[i], radius_[i], i))
+            if pos_[i, 0] < self.x_min + radius_[i] or pos_[i, 0] > self.x_max - radius_[i] \
+                    or pos_[i, 1] < self.y_min + radius_[i] or pos_[i, 1] > self.y_max - radius_[i]:
+                raise ValueError("\nThe disc %s is not inside the domain." % i)
+            r_max = max(r_max, radius_[i])
+
+        self.n = n
+        self.time = 0.0
+        self.events = 0
+        self.collisions = 0
+        self.cell = max(cell_size, 2.0 * r_max, 1e-9)
+        self.ncx = max(1, min(<int>((self.x_max - self.x_min) / self.cell), 4096))
+        self.ncy = max(1, min(<int>((self.y_max - self.y_min) / self.cell), 4096))
+
+        self.x = <double *>malloc(max(n, 1) * sizeof(double))
+        self.y = <double *>malloc(max(n, 1) * sizeof(double))
+        self.vx = <double *>malloc(max(n, 1) * sizeof(double))
+        self.vy = <double *>malloc(max(n, 1) * sizeof(double))
+        self.t = <double *>malloc(max(n, 1) * sizeof(double))
+        self.m = <double *>malloc(max(n, 1) * sizeof(double))
+        self.r = <double *>malloc(max(n, 1) * sizeof(double))
+        self.count = <int *>malloc(max(n, 1) * sizeof(int))
+        self.cx = <int *>malloc(max(n, 1) * sizeof(int))
+        self.cy = <int *>malloc(max(n, 1) * sizeof(int))
+        self.next = <int *>malloc(max(n, 1) * sizeof(int))
+        self.prev = <int *>malloc(max(n, 1) * sizeof(int))
+        self.head = <int *>malloc(self.ncx * self.ncy * sizeof(int))
+        if self.x == NULL or self.y == NULL or self.vx == NULL or self.vy == NULL or \
+                self.t == NULL or self.m == NULL or self.r == NULL or self.count == NULL or \
+                self.cx == NULL or self.cy == NULL or self.next == NULL or \
+                self.prev == NULL or self.head == NULL:
+            raise MemoryError("\nCannot allocate the discs.")
+
+        for i in range(self.ncx * self.ncy):
+            self.head[i] = -1
+        for i in range(n):
+            self.x[i] = pos_[i, 0]
+            self.y[i] = pos_[i, 1]
+            self.vx[i] = vel_[i, 0]
+            self.vy[i] = vel_[i, 1]
+            self.t[i] = 0.0
+            self.m[i] = mass_[i]
+            self.r[i] = radius_[i]
+            self.count[i] = 0
+            self.cx[i] = min(max(<int>((self.x[i] - self.x_min) / self.cell), 0), self.ncx - 1)
+            self.cy[i] = min(max(<int>((self.y[i] - self.y_min) / self.cell), 0), self.ncy - 1)
+            self.link(i)
+
+        for i in range(n):
+            if self.predict(i) < 0:
+                raise MemoryError("\nCannot allocate the events.")
+
+    def __dealloc__(self):
+        free(self.x)
+        free(self.y)
+        free(self.vx)
+        free(self.vy)
+        free(self.t)
+        free(self.m)
+        free(self.r)
+        free(self.count)
+        free(self.cx)
+        free(self.cy)
+        free(self.next)
+        free(self.prev)
+        free(self.head)
+        free(self.heap)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def pos(self):
+        """
+        DISCS CENTRES AT THE CURRENT TIME
+
+        :return: numpy.ndarray shape (N, 2) float64; copy of the centres
+        """
+        cdef:
+            int i
+            double [:, ::1] out_view
+        out = numpy.empty((self.n, 2), dtype=numpy.float64)
+        out_view = out
+        for i in range(self.n):
+            out_view[i, 0] = self.x[i] + self.vx[i] * (self.time - self.t[i])
+            out_view[i, 1] = self.y[i] + self.vy[i] * (self.time - self.t[i])
+        return out
+
+    @property
+    def vel(self):
+        """
+        DISCS VECTORS
+
+        :return: numpy.ndarray shape (N, 2) float64; copy of the vectors
+        """
+        cdef:
+            int i
+            double [:, ::1] out_view
+        out = numpy.empty((self.n, 2), dtype=numpy.float64)
+        out_view = out
+        for i in range(self.n):
+            out_view[i, 0] = self.vx[i]
+            out_view[i, 1] = self.vy[i]
+        return out
+
+    @property
+    def queue(self):
+        """
+        NUMBER OF EVENTS IN THE PRIORITY QUEUE (VALID & OBSOLETE)
+        """
+        return self.length
+
+    # ---------------------------------------------------------------------------- cells
+
+    cdef inline void link(self, int i) noexcept nogil:
+        """
+        INSERT THE DISC i IN THE LIST OF ITS CELL
+        """
+        cdef int c = self.cy[i] * self.ncx + self.cx[i]
+        self.prev[i] = -1
+        self.next[i] = self.head[c]
+        if self.head[c] >= 0:
+            self.prev[self.head[c]] = i
+        self.head[c] = i
+
+    cdef inline void unlink(self, int i) noexcept nogil:
+        """
+        REMOVE THE DISC i FROM THE LIST OF ITS CELL
+        """
+        if self.prev[i] >= 0:
+            self.next[self.prev[i]] = self.next[i]
+        else:
+            self.head[self.cy[i] * self.ncx + self.cx[i]] = self.next[i]
+        if self.next[i] >= 0:
+            self.prev[self.next[i]] = self.prev[i]
+
+    cdef inline void drift(self, int i) noexcept nogil:
+        """
+        MOVE THE DISC i TO THE CURRENT TIME
+        """
+        self.x[i] += self.vx[i] * (self.time - self.t[i])
+        self.y[i] += self.vy[i] * (self.time - self.t[i])
+        self.t[i] = self.time
+
+    # ---------------------------------------------------------------------------- heap
+
+    cdef int push(self, double t, int a, int b, int kind) noexcept nogil:
+        """
+        ADD AN EVENT TO THE PRIORITY QUEUE
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            Py_ssize_t k, parent, capacity
+            event * heap
+            event e
+
+        if self.length == self.capacity:
+            capacity = max(2 * self.capacity, 1024)
+            heap = <event *>realloc(self.heap, capacity * sizeof(event))
+            if heap == NULL:
+                return -1
+            self.heap = heap
+            self.capacity = capacity
+
+        e.t = t
+        e.a = a
+        e.b = b
+        e.count_a = self.count[a]
+        e.count_b = self.count[b] if b >= 0 else 0
+        e.kind = kind
+
+        k = self.length
+        self.length += 1
+        while k > 0:
+            parent = (k - 1) >> 1
+            if not event_less(&e, &self.heap[parent]):
+                break
+            self.heap[k] = self.heap[parent]
+            k = parent
+        self.heap[k] = e
+        return 0
+
+    cdef void sift_down(self, Py_ssize_t k) noexcept nogil:
+        """
+        RESTORE THE HEAP ORDER BELOW THE EVENT k
+        """
+        cdef:
+            Py_ssize_t child
+            event e = self.heap[k]
+
+        while True:
+            child = 2 * k + 1
+            if child >= self.length:
+                break
+            if child + 1 < self.length and event_less(&self.heap[child + 1], &self.heap[child]):
+                child += 1
+            if not event_less(&self.heap[child], &e):
+                break
+            self.heap[k] = self.heap[child]
+            k = child
+        self.heap[k] = e
+
+    cdef inline bint valid(self, event * e) noexcept nogil:
+        return e.count_a == self.count[e.a] and (e.b < 0 or e.count_b == self.count[e.b])
+
+    cdef void compact(self) noexcept nogil:
+        """
+        REMOVE THE OBSOLETE EVENTS FROM THE PRIORITY QUEUE
+        """
+        cdef Py_ssize_t k, m = 0
+        for k in range(self.length):
+            if self.valid(&self.heap[k]):
+                self.heap[m] = self.heap[k]
+                m += 1
+        self.length = m
+        for k in range(m // 2 - 1, -1, -1):
+            self.sift_down(k)
+
+    # ---------------------------------------------------------------------------- predictions
+
+    @cython.cdivision(True)
+    cdef int predict(self, int i) noexcept nogil:
+        """
+        PREDICT THE NEXT EVENTS OF THE DISC i (DISCS OF THE 9 NEIGHBOURING CELLS, WALLS
+        AND CELL CROSSING), THE DISC IS AT THE CURRENT TIME
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            int j, gx, gy, kind
+            double dx, dy, wx, wy, a, b, c, disc, dt, xj, yj, lo, hi, edge, dt_y
+
+        self.drift(i)
+
+        # Discs
+        for gy in range(max(self.cy[i] - 1, 0), min(self.cy[i] + 2, self.ncy)):
+            for gx in range(max(self.cx[i] - 1, 0), min(self.cx[i] + 2, self.ncx)):
+                j = self.head[gy * self.ncx + gx]
+                while j >= 0:
+                    if j != i:
+                        xj = self.x[j] + self.vx[j] * (self.time - self.t[j])
+                        yj = self.y[j] + self.vy[j] * (self.time - self.t[j])
+                        dx = xj - self.x[i]
+                        dy = yj - self.y[i]
+                        wx = self.vx[j] - self.vx[i]
+                        wy = self.vy[j] - self.vy[i]
+                        b = dx * wx + dy * wy
+                        if b < 0.0:
+                            a = wx * wx + wy * wy
+                            c = dx * dx + dy * dy - (self.r[i] + self.r[j]) * (self.r[i] + self.r[j])
+                            disc = b * b - a * c
+                            if disc > 0.0:
+                                dt = max((-b - sqrt(disc)) / a, 0.0)
+                                if self.push(self.time + dt, i, j, EV_PAIR) < 0:
+                                    return -1
+                    j = self.next[j]
+
+        # Walls
+        if self.vx[i] != 0.0:
+            lo = self.x_min + self.r[i]
+            hi = self.x_max - self.r[i]
+            dt = ((hi if self.vx[i] > 0.0 else lo) - self.x[i]) / self.vx[i]
+            if self.push(self.time + max(dt, 0.0), i, -1, EV_WALL_X) < 0:
+                return -1
+        if self.vy[i] != 0.0:
+            lo = self.y_min + self.r[i]
+            hi = self.y_max - self.r[i]
+            dt = ((hi if self.vy[i] > 0.0 else lo) - self.y[i]) / self.vy[i]
+            if self.push(self.time + max(dt, 0.0), i, -1, EV_WALL_Y) < 0:
+                return -1
+
+        # Cell crossing (the first cell boundary reached)
+        dt = INFINITY
+        kind = EV_CELL_X
+        if self.vx[i] > 0.0 and self.cx[i] < self.ncx - 1:
+            edge = self.x_min + (self.cx[i] + 1) * self.cell
+            dt = (edge - self.x[i]) / self.vx[i]
+        elif self.vx[i] < 0.0 and self.cx[i] > 0:
+            edge = self.x_min + self.cx[i] * self.cell
+            dt = (edge - self.x[i]) / self.vx[i]
+        dt_y = INFINITY
+        if self.vy[i] > 0.0 and self.cy[i] < self.ncy - 1:
+            edge = self.y_min + (self.cy[i] + 1) * self.cell
+            dt_y = (edge - self.y[i]) / self.vy[i]
+        elif self.vy[i] < 0.0 and self.cy[i] > 0:
+            edge = self.y_min + self.cy[i] * self.cell
+            dt_y = (edge - self.y[i]) / self.vy[i]
+        if dt_y < dt:
+            dt = dt_y
+            kind = EV_CELL_Y
+        if dt != INFINITY:
+            if self.push(self.time + max(dt, 0.0), i, -1, kind) < 0:
+                return -1
+        return 0
+
+    # ---------------------------------------------------------------------------- events
+
+    @cython.cdivision(True)
+    cdef int process(self, double t_end) noexcept nogil:
+        """
+        PROCESS THE EVENTS UP TO THE TIME t_end
+
+        :return: 0 or -1 (out of memory)
+        """
+        cdef:
+            event e
+            int a, b
+            double r[4]
+
+        while self.length > 0 and self.heap[0].t <= t_end:
+            e = self.heap[0]
+            self.length -= 1
+            if self.length > 0:
+                self.heap[0] = self.heap[self.length]
+                self.sift_down(0)
+            if not self.valid(&e):
+                continue
+
+            self.time = max(e.t, self.time)
+            self.events += 1
+            a = e.a
+            b = e.b
+            self.drift(a)
+
+            if e.kind == EV_PAIR:
+                self.drift(b)
+                angle_free_pair_d(
+                    self.vx[a], self.vy[a], self.vx[b], self.vy[b], self.m[a], self.m[b],
+                    self.x[a], self.y[a], self.x[b], self.y[b], r)
+                self.vx[a] = r[0]
+                self.vy[a] = r[1]
+                self.vx[b] = r[2]
+                self.vy[b] = r[3]
+                self.count[a] += 1
+                self.count[b] += 1
+                self.collisions += 1
+                if self.predict(a) < 0 or self.predict(b) < 0:
+                    return -1
+
+            elif e.kind == EV_WALL_X or e.kind == EV_WALL_Y:
+                if e.kind == EV_WALL_X:
+                    self.vx[a] = -self.vx[a]
+                else:
+                    self.vy[a] = -self.vy[a]
+                self.count[a] += 1
+                if self.predict(a) < 0:
+                    return -1
+
+            else:
+                # The disc enters the next cell, predictions with its new neighbours
+                self.unlink(a)
+                if e.kind == EV_CELL_X:
+                    self.cx[a] += 1 if self.vx[a] > 0.0 else -1
+                else:
+                    self.cy[a] += 1 if self.vy[a] > 0.0 else -1
+                self.link(a)
+                self.count[a] += 1
+                if self.predict(a) < 0:
+                    return -1
+
+            if self.length > 16 * <Py_ssize_t>self.n + 1024:
+                self.compact()
+        return 0
+
+    def advance(self, double dt):
+        """
+        PROCESS THE EVENTS UNTIL time + dt (ONE FRAME, RENDERING SNAPSHOT)
+
+        :param dt: float; duration (>= 0.0)
+        :return: integer; number of collisions between discs during the period
+        """
+        cdef:
+            Py_ssize_t collisions = self.collisions
+            double t_end = self.time + dt
+            int status
+
+        if dt < 0.0:
+            raise ValueError("\ndt must be >= 0.0, got %s." % dt)
+
+        with nogil:
+            status = self.process(t_end)
+            self.time = t_end
+        if status < 0:
+            raise MemoryError("\nCannot allocate the events.")
+        return self.collisions - collisions
+
+    def energy(self):
+        """
+        TOTAL KINETIC ENERGY OF THE DISCS (0.5 * m * v^2, CONSERVED)
+
+        :return: float; kinetic energy
+        """
+        cdef:
+            int i
+            double e = 0.0
+        for i in range(self.n):
+            e += 0.5 * self.m[i] * (self.vx[i] * self.vx[i] + self.vy[i] * self.vy[i])
+        return e
+
+
+# **************************** CONTACT SOLVER (SEQUENTIAL IMPULSES) *******************************
+
+# Active contact (unit normal from the first to the second disc, accumulated impulse)
+cdef struct contact:
+    int i
+    int j
+    double nx
+    double ny
+    double w1
+    double w2
+    double impulse
+
+
+cdef inline void apply_impulse(real_t * vel, contact * c, double dp)noexcept nogil:
+    """
+    APPLY THE IMPULSE dp ALONG THE NORMAL OF THE CONTACT c
+
+    :param vel: pointer; discs vectors (N x 2, updated in place)
+    :param c  : pointer; contact
+    :param dp : float; impulse
+    :return: void
+    """
+    vel[2 * c.i] = <real_t>(<double>vel[2 * c.i] - dp * c.w1 * c.nx)
+    vel[2 * c.i + 1] = <real_t>(<double>vel[2 * c.i + 1] - dp * c.w1 * c.ny)
+    vel[2 * c.j] = <real_t>(<double>vel[2 * c.j] + dp * c.w2 * c.nx)
+    vel[2 * c.j + 1] = <real_t>(<double>vel[2 * c.j + 1] + dp * c.w2 * c.ny)
+
+
+@cython.cdivision(True)
+cdef int compression(
+        real_t * vel,
+        contact * contacts,
+        Py_ssize_t count,
+        int iterations,
+        double tolerance
+)noexcept nogil:
+    """
+    CANCEL THE APPROACHING NORMAL VELOCITIES OF ALL THE CONTACTS (SEQUENTIAL IMPULSES)
+
+    The accumulated impulses (reset to 0.0) are clamped to >= 0.0, the passes stop when
+    the largest velocity change of a pass is below tolerance.
+
+    :param vel       : pointer; discs vectors (N x 2, updated in place)
+    :param contacts  : pointer; active contacts (impulses updated)
+    :param count     : integer; number of contacts
+    :param iterations: integer; maximum number of passes
+    :param tolerance : float; largest velocity change of the last pass
+    :return: integer; number of passes done
+    """
+    cdef:
+        Py_ssize_t p
+        int it, passes = 0
+        double vn, dp, impulse, change
+        contact * c
+
+    for p in range(count):
+        contacts[p].impulse = 0.0
+
+    for it in range(iterations):
+        passes = it + 1
+        change = 0.0
+        for p in range(count):
+            c = &contacts[p]
+            vn = (<double>vel[2 * c.j] - <double>vel[2 * c.i]) * c.nx + \
+                 (<double>vel[2 * c.j + 1] - <double>vel[2 * c.i + 1]) * c.ny
+            impulse = c.impulse - vn / (c.w1 + c.w2)
+            impulse = impulse if impulse > 0.0 else 0.0
+            dp = impulse - c.impulse
+            c.impulse = impulse
+            if dp == 0.0:
+                continue
+            apply_impulse(vel, c, dp)
+            dp = fabs(dp) * (c.w1 + c.w2)
+            change = dp if dp > change else change
+        if change <= tolerance:
+            break
+    return passes
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cpdef int solve_contacts(
+        real_t [:, ::1] pos,
+        real_t [:, ::1] vel,
+        real_t [::1] mass,
+        real_t [::1] radius,
+        int [:, ::1] pairs,
+        int iterations = 10,
+        double tolerance = 1e-4,
+        double restitution = 1.0,
+        double slop = 0.1):
+    """
+    SOLVE ALL THE CONTACTS OF A FRAME TOGETHER IN PLACE (SEQUENTIAL IMPULSES)
+
+    The pairs of discs touching (distance <= r1 + r2 + slop) are the active contacts.
+    Each contact receives an impulse along the line of centres cancelling its approaching
+    normal velocity (compression), the impulses are accumulated and clamped (a contact
+    pushes, it never pulls) and the contacts are visited again until the largest velocity
+    change of a pass is below tolerance or <iterations> passes are done. Each contact then
+    receives restitution x its compression impulse (Poisson restitution, the kinetic
+    energy is conserved with restitution 1.0 and never increases). In a cluster the
+    contacts still approaching after the restitution are cancelled by a last series of
+    passes.
+
+    * A single contact receives the impulse of get_v1_angle_free_vecR &
+      get_v2_angle_free_vecR, v1 - 2 * m2 / (m1 + m2) * <v1 - v2, x1 - x2> / |x1 - x2|^2
+      * (x1 - x2) (restitution 1.0), solved in one pass.
+
+    * Several contacts of a cluster are solved together instead of one after the other in
+      list order, the result does not depend on the order of the pairs and the cluster
+      stops jittering.
+
+    * Invalid pairs (mass <= 0.0, coincident centres) are ignored, the positions are not
+      modified (see separate).
+
+    :param pos        : numpy.ndarray shape (N, 2) float32|float64 contiguous; discs centres
+    :param vel        : numpy.ndarray shape (N, 2) float32|float64 contiguous; discs vectors
+    (updated in place)
+    :param mass       : numpy.ndarray shape (N,) float32|float64 contiguous; discs mass in kg
+    :param radius     : numpy.ndarray shape (N,) float32|float64 contiguous; discs radii
+    :param pairs      : numpy.ndarray shape (K, 2) int32 contiguous; indices of the discs
+    (candidate pairs, e.g cell_list_pairs)
+    :param iterations : integer; maximum number of passes (default 10)
+    :param tolerance  : float; largest velocity change of the last pass (default 1e-4)
+    :param restitution: float; coefficient of restitution in [0.0, 1.0] (default 1.0 elastic)
+    :param slop       : float; gap below which two discs are touching (default 0.1)
+    :return: integer; number of passes done, both series (0 without active contact)
+    """
+    cdef:
+        Py_ssize_t n = pos.shape[0]
+        Py_ssize_t k = pairs.shape[0]
+        Py_ssize_t p, count = 0
+        int i, j, passes = 0
+        double dx, dy, d, distance
+        contact * c
+        contact * contacts
+
+    if pos.shape[1] != 2 or vel.shape[0] != n or vel.shape[1] != 2:
+        raise ValueError("\npos & vel arrays must be shape (N, 2).")
+
+    if mass.shape[0] != n or radius.shape[0] != n:
+        raise ValueError("\npos, vel, mass & radius must have the same length.")
+
+    if pairs.shape[1] != 2:
+        raise ValueError("\npairs array must be shape (K, 2).")
+
+    if iterations < 1:
+        raise ValueError("\niterations must be >= 1, got %s." % iterations)
+
+    if not 0.0 <= restitution <= 1.0:
+        raise ValueError("\nrestitution must be in [0.0, 1.0], got %s." % restitution)
+
+    for p in range(k):
+        if pairs[p, 0] < 0 or pairs[p, 0] >= n or pairs[p, 1] < 0 or pairs[p, 1] >= n:
+            raise ValueError("\npairs index out of range (pair %s)." % p)
+
+    contacts = <contact *>malloc(max(k, 1) * sizeof(contact))
+    if contacts == NULL:
+        raise MemoryError("\nCannot allocate the contacts.")
+
+    with nogil:
+        # Active contacts & target normal velocities
+        for p in range(k):
+            i = pairs[p, 0]
+            j = pairs[p, 1]
+            if i == j or not (mass[i] > 0.0 and mass[j] > 0.0):
+                continue
+            dx = <double>pos[j, 0] - <double>pos[i, 0]
+            dy = <double>pos[j, 1] - <double>pos[i, 1]
+            d = dx * dx + dy * dy
+            distance = <double>radius[i] + <double>radius[j] + slop
+            if d == 0.0 or d > distance * distance:
+                continue
+            d = sqrt(d)
+            c = &contacts[count]
+            c.i = i
+            c.j = j
+            c.nx = dx / d
+            c.ny = dy / d
+            c.w1 = 1.0 / <double>mass[i]
+            c.w2 = 1.0 / <double>mass[j]
+            c.impulse = 0.0
+            count += 1
+
+        if count > 0:
+            passes = compression(&vel[0, 0], contacts, count, iterations, tolerance)
+
+            # Restitution impulses, the contacts still approaching after the restitution
+            # (clusters) are cancelled again
+            if restitution > 0.0:
+                for p in range(count):
+                    apply_impulse(&vel[0, 0], &contacts[p], restitution * contacts[p].impulse)
+                passes += compression(&vel[0, 0], contacts, count, iterations, tolerance)
+    free(contacts)
+    return passes
+
 # ***************************END INTERFACE *************************************
 
 
@@ -215,7 +1260,7 @@ cdef v_struct get_momentum_trigonometry_vecR(
         float obj2_cx, float obj2_cy,
         vector2d obj1_vec, vector2d obj2_vec,
         float obj1_mass, float obj2_mass
-)nogil:
+)noexcept nogil:
     """
     RETURN VECTORS V1 & V2 OF ORIGINAL OBJECTS AFTER 
     COLLISION (TRIGONOMETRY)
@@ -240,6 +1285,12 @@ cdef v_struct get_momentum_trigonometry_vecR(
         vector2d v2
         v_struct collision
 
+    # INVALID PAIR, THE OBJECTS KEEP THEIR VELOCITIES
+    if pair_status(obj1_mass, obj2_mass, obj1_cx, obj1_cy, obj2_cx, obj2_cy) != EC_OK:
+        collision.vector1 = obj1_vec
+        collision.vector2 = obj2_vec
+        return collision
+
     v1_length         = vlength(&obj1_vec)
     v2_length         = vlength(&obj2_vec)
 
@@ -252,12 +1303,93 @@ cdef v_struct get_momentum_trigonometry_vecR(
     return collision
 
 
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef v_struct get_momentum_projection_vecR(
+        float obj1_cx, float obj1_cy,
+        float obj2_cx, float obj2_cy,
+        vector2d obj1_vec, vector2d obj2_vec,
+        float obj1_mass, float obj2_mass
+)noexcept nogil:
+    """
+    RETURN VECTORS V1 & V2 OF ORIGINAL OBJECTS AFTER 
+    COLLISION (TRIGONOMETRY WITHOUT TRIGONOMETRIC FUNCTIONS)
+    
+    Same equations than get_momentum_trigonometry_vecR (get_v1R & get_v2R), with 
+    n = (cos φ, sin φ) the unit vector from centre 1 to centre 2 and vi = |vi|.(cos θi, sin θi):
+    
+    * |vi|.cos(θi - φ) = vi . n (dot product) 
+    * |vi|.sin(θi - φ) = n x vi (cross product)
+    * cos(φ + π/2) = -sin φ and sin(φ + π/2) = cos φ
+    
+    :param obj1_cx  : float; Object 1 centre x coordinate
+    :param obj1_cy  : float; object 1 centre y coordinate
+    :param obj2_cx  : float; object 2 centre x coordinate
+    :param obj2_cy  : float; object 2 centre y coordinate
+    :param obj1_vec : float; object 1 vector velocity/trajectory
+    :param obj2_vec : float; object 2 vector velocity/trajectory
+    :param obj1_mass: float; object 1 mass in kilogrammes
+    :param obj2_mass: float; object 2 mass in kilogrammes
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    cdef:
+        float nx = obj2_cx - obj1_cx
+        float ny = obj2_cy - obj1_cy
+        float d, p1, p2, q1, q2, numerator
+        float m12 = obj1_mass + obj2_mass
+        v_struct collision
+
+    # INVALID PAIR, THE OBJECTS KEEP THEIR VELOCITIES
+    if pair_status(obj1_mass, obj2_mass, obj1_cx, obj1_cy, obj2_cx, obj2_cy) != EC_OK:
+        collision.vector1 = obj1_vec
+        collision.vector2 = obj2_vec
+        return collision
+
+    d  = <float>sqrt(nx * nx + ny * ny)
+    nx = nx / d
+    ny = ny / d
+    p1 = obj1_vec.x * nx + obj1_vec.y * ny
+    p2 = obj2_vec.x * nx + obj2_vec.y * ny
+    q1 = nx * obj1_vec.y - ny * obj1_vec.x
+    q2 = nx * obj2_vec.y - ny * obj2_vec.x
+
+    numerator = p1 * (obj1_mass - obj2_mass) + <float>2.0 * obj2_mass * p2
+    vecinit(&collision.vector1, numerator * nx / m12 - q1 * ny, numerator * ny / m12 + q1 * nx)
+    numerator = p2 * (obj2_mass - obj1_mass) + <float>2.0 * obj1_mass * p1
+    vecinit(&collision.vector2, numerator * nx / m12 - q2 * ny, numerator * ny / m12 + q2 * nx)
+    return collision
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline v_struct trigonometry_vec(
+        float obj1_cx, float obj1_cy,
+        float obj2_cx, float obj2_cy,
+        vector2d obj1_vec, vector2d obj2_vec,
+        float obj1_mass, float obj2_mass
+)noexcept nogil:
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION WITH THE SELECTED EVALUATION MODE (SEE SET_TRIG_FREE)
+    
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    if TRIG_FREE:
+        return get_momentum_projection_vecR(
+            obj1_cx, obj1_cy, obj2_cx, obj2_cy, obj1_vec, obj2_vec, obj1_mass, obj2_mass)
+    return get_momentum_trigonometry_vecR(
+        obj1_cx, obj1_cy, obj2_cx, obj2_cy, obj1_vec, obj2_vec, obj1_mass, obj2_mass)
+
+
 cdef vector2d get_v1R(
         float v1_, float v2_,
         float theta1_, float theta2_,
         float phi_,
         float m1_, float m2_
-)nogil:
+)noexcept nogil:
     """
     RETURN SCALAR SIZE V1 OF THE ORIGINAL OBJECT 
     REPRESENTED BY (V1, THETA1, M1) TRIGONOMETRY
@@ -283,14 +1415,11 @@ cdef vector2d get_v1R(
         float m12 = m1_ + m2_
         vector2d v1_vec
 
-    if v1_ <=0.0 or v2_ <=0.0:
-        with gil:
-            raise ValueError(
-                '\n|v1_|, |v2_| magnitude must be >= 0.0'
-                '\n|v1|=%s |v2|=%s ' % (v1_, v2_))
-    if m12 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # A ZERO LENGTH VECTOR (OBJECT AT REST) IS VALID. WITH M1 + M2 <= 0 THE
+    # OBJECT KEEPS ITS VELOCITY (SEE PAIR_STATUS)
+    if not m12 > 0.0:
+        vecinit(&v1_vec, v1_ * <float>cos(theta1_), v1_ * <float>sin(theta1_))
+        return v1_vec
 
     r1 = theta1_ - phi_
     r2 = phi_ + <float>M_PI2
@@ -311,7 +1440,7 @@ cdef vector2d get_v2R(
         float theta1_, float theta2_,
         float phi_,
         float m1_, float m2_
-)nogil:
+)noexcept nogil:
     """
     RETURN SCALAR SIZE V2_ OF THE ORIGINAL OBJECT 
     REPRESENTED BY (V2_, THETA2_, M2_) TRIGONOMETRY
@@ -340,14 +1469,11 @@ cdef vector2d get_v2R(
     r1 = (theta2_ - phi_)
     r2 = phi_ + <float>M_PI2
 
-    if v1_ <=0.0 or v2_ <=0.0:
-        with gil:
-            raise ValueError(
-                "\n|v1_|, |v2_| magnitude must be >= 0.0\n"
-                "|v1|=%s |v2|=%s " % (v1_, v2_))
-    if m21 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # A ZERO LENGTH VECTOR (OBJECT AT REST) IS VALID. WITH M1 + M2 <= 0 THE
+    # OBJECT KEEPS ITS VELOCITY (SEE PAIR_STATUS)
+    if not m21 > 0.0:
+        vecinit(&v2_vec, v2_ * <float>cos(theta2_), v2_ * <float>sin(theta2_))
+        return v2_vec
 
     numerator = v2_ * <float>cos(r1) * <float>(m2_ - m1_) + <float>(2 * m1_) * v1_ * <float>cos(theta1_ - phi_)
     v2x = numerator * <float>cos(phi_) / m21 + v2_ * <float>sin(r1) * <float>cos(r2)
@@ -372,7 +1498,7 @@ cdef vector2d get_v1_angle_free_vecR(
         vector2d v1, vector2d v2,
         float m1, float m2,
         vector2d x1, vector2d x2
-)nogil:
+)noexcept nogil:
     """
     SCALAR SIZE V1_ OF THE ORIGINAL OBJECT SPEED REPRESENTED 
     BY (V1_, M1_, X1 ARGUMENTS).
@@ -387,13 +1513,9 @@ cdef vector2d get_v1_angle_free_vecR(
     """
     cdef float m12 = m1 + m2
 
-    if vlength(&v1) <=0.0 or vlength(&v2) <= 0.0:
-        with gil:
-            raise ValueError("\n|v1|, |v2| magnitude must be >= 0.0\n"
-                  "|v1|=%s |v2|=%s " % (vlength(&v1), vlength(&v2)))
-    if m12 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # INVALID PAIR, THE OBJECT KEEPS ITS VELOCITY (OBJECTS AT REST ARE VALID)
+    if pair_status(m1, m2, x1.x, x1.y, x2.x, x2.y) != EC_OK:
+        return v1
 
     cdef float mass = <float>(2.0 * m2) / m12   # mass coefficient in the equation
     cdef vector2d v12, x12		                # 2d vector declaration v12 & x12
@@ -424,7 +1546,7 @@ cdef vector2d get_v2_angle_free_vecR(
         vector2d v1, vector2d v2,
         float m1, float m2,
         vector2d x1, vector2d x2
-)nogil:
+)noexcept nogil:
     """
     SCALAR SIZE V2_ OF THE ORIGINAL OBJECT SPEED REPRESENTED 
     BY (V2_, M2_, X2 ARGUMENTS).
@@ -439,14 +1561,9 @@ cdef vector2d get_v2_angle_free_vecR(
     """
     cdef float m12 = (m1 + m2)
 
-    # AT LEAST ONE OBJECT MUST BE IN MOTION
-    if vlength(&v1) <=0.0 or vlength(&v2) <= 0.0:
-        with gil:
-            raise ValueError("\n|v1|, |v2| magnitude must be >= 0.0"
-                  "\n|v1|=%s |v2|=%s " % (vlength(&v1), vlength(&v2)))
-    if m12 <= 0.0:
-        with gil:
-            raise ValueError("Object's mass should be > 0.0")
+    # INVALID PAIR, THE OBJECT KEEPS ITS VELOCITY (OBJECTS AT REST ARE VALID)
+    if pair_status(m1, m2, x1.x, x1.y, x2.x, x2.y) != EC_OK:
+        return v2
 
     cdef float mass = <float>(2.0 * m1) / m12   # mass coefficient in the equation
     cdef vector2d v21, x21		                # 2d vector declaration v21 & x21
@@ -475,7 +1592,7 @@ cdef v_struct get_angle_free_vecR(
         vector2d v1, vector2d v2,
         float m1, float m2,
         vector2d x1, vector2d x2
-)nogil:
+)noexcept nogil:
     """
     RETURN BOTH FINAL VELOCITIES VECTORS V1 & V2 
     
@@ -496,13 +1613,296 @@ cdef v_struct get_angle_free_vecR(
     return collision
 
 
+# ************************************************************************
+# Angle free calculation for the row i of the batch arrays
+# ************************************************************************
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline void angle_free_row(
+        real_t [:, ::1] v1, real_t [:, ::1] v2,
+        real_t [::1] m1, real_t [::1] m2,
+        real_t [:, ::1] x1, real_t [:, ::1] x2,
+        real_t [:, ::1] r1, real_t [:, ::1] r2,
+        unsigned char * valid,
+        Py_ssize_t i
+)noexcept nogil:
+    """
+    SOLVE THE ROW I OF THE BATCH ARRAYS AND WRITE V1 & V2 INTO R1[I] & R2[I]
+
+    :param v1: real_t [:, ::1]; objects 1 vectors
+    :param v2: real_t [:, ::1]; objects 2 vectors
+    :param m1: real_t [::1]; objects 1 masses in kilograms, must be > 0
+    :param m2: real_t [::1]; objects 2 masses in kilograms, must be > 0
+    :param x1: real_t [:, ::1]; objects 1 centres
+    :param x2: real_t [:, ::1]; objects 2 centres
+    :param r1: real_t [:, ::1]; objects 1 resultant vectors
+    :param r2: real_t [:, ::1]; objects 2 resultant vectors
+    :param valid: unsigned char pointer or NULL; receive 1 if the pair is valid, 0 otherwise
+    :param i : Py_ssize_t; row index
+    :return: void
+    """
+    cdef:
+        vector2d vec1, vec2, x1_vec, x2_vec
+        v_struct v
+        double r[4]
+
+    if real_t is float:
+        if valid != NULL:
+            valid[i] = pair_status(
+                m1[i], m2[i], x1[i, 0], x1[i, 1], x2[i, 0], x2[i, 1]) == EC_OK
+
+        vecinit(&vec1, v1[i, 0], v1[i, 1])
+        vecinit(&vec2, v2[i, 0], v2[i, 1])
+        vecinit(&x1_vec, x1[i, 0], x1[i, 1])
+        vecinit(&x2_vec, x2[i, 0], x2[i, 1])
+
+        v = get_angle_free_vecR(vec1, vec2, m1[i], m2[i], x1_vec, x2_vec)
+
+        r1[i, 0] = v.vector1.x
+        r1[i, 1] = v.vector1.y
+        r2[i, 0] = v.vector2.x
+        r2[i, 1] = v.vector2.y
+
+    else:
+        # float64 rows are solved in double precision
+        if valid != NULL:
+            valid[i] = pair_status_d(
+                m1[i], m2[i], x1[i, 0], x1[i, 1], x2[i, 0], x2[i, 1]) == EC_OK
+
+        angle_free_pair_d(
+            v1[i, 0], v1[i, 1], v2[i, 0], v2[i, 1], m1[i], m2[i],
+            x1[i, 0], x1[i, 1], x2[i, 0], x2[i, 1], r)
+
+        r1[i, 0] = r[0]
+        r1[i, 1] = r[1]
+        r2[i, 0] = r[2]
+        r2[i, 1] = r[3]
+
+
+# ************************************************************************
+# Double precision kernels (float64 batch arrays)
+# ************************************************************************
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef inline int pair_status_d(
+        double m1, double m2,
+        double x1x, double x1y,
+        double x2x, double x2y
+)noexcept nogil:
+    """
+    RETURN THE STATUS OF A PAIR OF OBJECTS, DOUBLE PRECISION VERSION OF PAIR_STATUS
+    
+    :return: integer; status code EC_OK, EC_INVALID_MASS or EC_COINCIDENT
+    """
+    if not m1 + m2 > 0.0:
+        return EC_INVALID_MASS
+    if x1x == x2x and x1y == x2y:
+        return EC_COINCIDENT
+    return EC_OK
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef void angle_free_pair_d(
+        double v1x, double v1y,
+        double v2x, double v2y,
+        double m1, double m2,
+        double x1x, double x1y,
+        double x2x, double x2y,
+        double * r
+)noexcept nogil:
+    """
+    WRITE VECTORS V1 & V2 AFTER COLLISION INTO R[0:4] (ANGLE FREE, DOUBLE PRECISION)
+    
+    Same equations than get_v1_angle_free_vecR & get_v2_angle_free_vecR. 
+    Invalid pairs keep their velocities.
+    
+    :param v1x, v1y: double; object 1 vector
+    :param v2x, v2y: double; object 2 vector
+    :param m1, m2  : double; objects masses in kilograms
+    :param x1x, x1y: double; object 1 centre
+    :param x2x, x2y: double; object 2 centre
+    :param r       : double pointer; receive v1x, v1y, v2x, v2y
+    :return: void
+    """
+    cdef:
+        double dx = x1x - x2x
+        double dy = x1y - x2y
+        double k
+
+    if pair_status_d(m1, m2, x1x, x1y, x2x, x2y) != EC_OK:
+        r[0] = v1x
+        r[1] = v1y
+        r[2] = v2x
+        r[3] = v2y
+        return
+
+    # dot(v1 - v2, x1 - x2) / |x1 - x2|^2
+    k = ((v1x - v2x) * dx + (v1y - v2y) * dy) / (dx * dx + dy * dy)
+    r[0] = v1x - (2.0 * m2 / (m1 + m2)) * k * dx
+    r[1] = v1y - (2.0 * m2 / (m1 + m2)) * k * dy
+    r[2] = v2x + (2.0 * m1 / (m1 + m2)) * k * dx
+    r[3] = v2y + (2.0 * m1 / (m1 + m2)) * k * dy
+
+
 # # ***************************************************************************************************
 
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef float vector_length(float x, float y)nogil:
+cdef v_struct trigonometry_vector2(
+        object obj1_centre, object obj2_centre,
+        object obj1_vector, object obj2_vector,
+        float obj1_mass, float obj2_mass):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FROM VECTOR2 INPUTS (TRIGONOMETRY)
+    
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    cdef vector2d vec1, vec2
+
+    check_status(pair_status(
+        obj1_mass, obj2_mass, obj1_centre.x, obj1_centre.y, obj2_centre.x, obj2_centre.y))
+    vecinit(&vec1, obj1_vector.x, obj1_vector.y)
+    vecinit(&vec2, obj2_vector.x, obj2_vector.y)
+    return trigonometry_vec(
+        obj1_centre.x, obj1_centre.y, obj2_centre.x, obj2_centre.y,
+        vec1, vec2, obj1_mass, obj2_mass)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef v_struct angle_free_vector2(
+        object obj1_vector, object obj2_vector,
+        float obj1_mass, float obj2_mass,
+        object obj1_centre, object obj2_centre):
+    """
+    RETURN VECTORS V1 & V2 AFTER COLLISION FROM VECTOR2 INPUTS (ANGLE FREE METHOD)
+    
+    :return: return a cython object v_struct (tuple of vector2d v1, v2)
+    """
+    cdef vector2d vec1, vec2, x1_vec, x2_vec
+
+    vecinit(&vec1, obj1_vector.x, obj1_vector.y)
+    vecinit(&vec2, obj2_vector.x, obj2_vector.y)
+    vecinit(&x1_vec, obj1_centre.x, obj1_centre.y)
+    vecinit(&x2_vec, obj2_centre.x, obj2_centre.y)
+    check_status(pair_status(obj1_mass, obj2_mass, x1_vec.x, x1_vec.y, x2_vec.x, x2_vec.y))
+    return get_angle_free_vecR(vec1, vec2, obj1_mass, obj2_mass, x1_vec, x2_vec)
+
+
+cdef inline bint is_float32(const char * fmt)nogil:
+    """
+    RETURN TRUE WHEN A BUFFER FORMAT STRING DESCRIBES A NATIVE FLOAT32 ('f', '=f', '<f', '@f')
+    """
+    if fmt == NULL:
+        return False
+    if fmt[0] == b'@' or fmt[0] == b'=' or fmt[0] == b'<':
+        fmt += 1
+    return fmt[0] == b'f' and fmt[1] == 0
+
+
+cdef int write_buffer(object out, v_struct collision) except -1:
+    """
+    WRITE VECTORS V1 & V2 INTO A CALLER BUFFER AS (V1.X, V1.Y, V2.X, V2.Y)
+    
+    The buffer is accessed through the buffer protocol, no intermediate object is created
+    
+    :param out: float32 writable contiguous buffer of length >= 4
+    :param collision: v_struct; vectors v1 & v2
+    :return: 0, -1 when an exception is raised
+    """
+    cdef:
+        Py_buffer view
+        float * data
+
+    PyObject_GetBuffer(out, &view, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_ANY_CONTIGUOUS)
+    try:
+        if not is_float32(view.format) or view.len < <Py_ssize_t>(4 * sizeof(float)):
+            raise ValueError("\nArgument out must be a float32 buffer with at least 4 items.")
+        data = <float *>view.buf
+        data[0] = collision.vector1.x
+        data[1] = collision.vector1.y
+        data[2] = collision.vector2.x
+        data[3] = collision.vector2.y
+    finally:
+        PyBuffer_Release(&view)
+    return 0
+
+
+cdef inline void write_vector2(object v1_out, object v2_out, v_struct collision):
+    """
+    UPDATE THE VECTOR2 V1_OUT & V2_OUT WITH VECTORS V1 & V2 (IN PLACE)
+    """
+    v1_out.x = collision.vector1.x
+    v1_out.y = collision.vector1.y
+    v2_out.x = collision.vector2.x
+    v2_out.y = collision.vector2.y
+
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef int pair_status(
+        float m1, float m2,
+        float x1x, float x1y,
+        float x2x, float x2y
+)noexcept nogil:
+    """
+    RETURN THE STATUS OF A PAIR OF OBJECTS BEFORE SOLVING THE COLLISION
+    
+    The kernels do not raise, an invalid pair is not solved and both objects keep 
+    their velocities. Objects at rest (zero length vector) are valid.
+    
+    * EC_OK           : the pair can be solved 
+    * EC_INVALID_MASS : m1 + m2 <= 0 (or not a number)
+    * EC_COINCIDENT   : both centres are identical, the contact normal is undefined
+    
+    :param m1 : float; object 1 mass in kg
+    :param m2 : float; object 2 mass in kg
+    :param x1x: float; object 1 centre x coordinate
+    :param x1y: float; object 1 centre y coordinate
+    :param x2x: float; object 2 centre x coordinate
+    :param x2y: float; object 2 centre y coordinate
+    :return: integer; status code
+    """
+    if not m1 + m2 > 0.0:
+        return EC_INVALID_MASS
+    if x1x == x2x and x1y == x2y:
+        return EC_COINCIDENT
+    return EC_OK
+
+
+cdef int check_status(int status) except -1:
+    """
+    RAISE A VALUEERROR WHEN A PAIR CANNOT BE SOLVED (PYTHON INTERFACE ONLY)
+    
+    :param status: integer; status code returned by pair_status
+    :return: 0, -1 when an exception is raised
+    """
+    if status == EC_INVALID_MASS:
+        raise ValueError("\nObject's mass should be > 0.0")
+    if status == EC_COINCIDENT:
+        raise ValueError("\nObjects centres cannot be identical (contact normal undefined).")
+    return 0
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+cdef float vector_length(float x, float y)noexcept nogil:
     """
     CALCULATE A VECTOR LENGTH GIVEN ITS COMPONENTS (SCALAR VALUES)
 
@@ -519,7 +1919,7 @@ cdef float vector_length(float x, float y)nogil:
 cdef float get_contact_angle(
         float v1x, float v1y,
         float v2x, float v2y
-)nogil:
+)noexcept nogil:
     """
     RETURN THE CONTACT ANGLE Φ [0, -2Π] IN RADIANS BETWEEN OBJ1 AND 
     OBJ2 OR [0 ... -360 degrees].
@@ -558,7 +1958,7 @@ cdef float get_contact_angle(
 @cython.wraparound(False)
 @cython.nonecheck(False)
 @cython.cdivision(True)
-cdef float get_theta_angle(vector2d vector_)nogil:
+cdef float get_theta_angle(vector2d vector_)noexcept nogil:
     """
     RETURN THETA ANGLE Θ IN RADIANS [Π, -Π]
 
@@ -583,10 +1983,10 @@ cdef float get_theta_angle(vector2d vector_)nogil:
         float vl = vlength(&vector_)
 
     if vl != <float>0.0:
-        theta = <float> acos(vector_.x / vl)
+        # CLAMP THE COSINE, ROUNDING ERRORS CAN PUSH X / |V| SLIGHTLY OUTSIDE [-1, 1]
+        theta = <float> acos(min(max(vector_.x / vl, -<float>1.0), <float>1.0))
     else:
-        # AT CONTACT TIME, OBJECT SHOULD BE MOVING.
-        # IDEALLY PROGRAM SHOULD RAISE AN ERROR MSG.
+        # OBJECT AT REST, NO DIRECTION (THETA IS NOT USED AS |V| = 0)
         return <float>0.0
     if vector_.y < 0.0:
         theta *= -<float>1.0
@@ -9,10 +9,11 @@ import numpy
 
 ext_modules = cythonize([
     Extension("ec_real", ["ec_real.pyx"],
-              extra_compile_args=["/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"], language="c")
+              extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"],
+              include_dirs=["../Source"], language="c")
     # Extension("c_real", ["c_real.pyx"],
-    #           extra_compile_args=["/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"], language="c")])
-])
+    #           extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"], language="c")])
+], include_path=[".."])
 
 setup(
     name="game",
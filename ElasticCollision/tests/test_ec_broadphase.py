@@ -0,0 +1,541 @@
+"""
+TEST LIBRARY ec_broadphase
+"""
+import sys
+import unittest
+
+import numpy
+from pygame.math import Vector2
+from ElasticCollision.ec_broadphase import SpatialHash, SweepAndPrune, LooseQuadtree, \
+    DynamicAABBTree, VerletList, HierarchicalGrid, cell_list_pairs, morton_order, \
+    strip_pairs, StripBroadphase, ContactCache
+from ElasticCollision.ec_game import resolve_pairs, momentum_angle_free
+
+
+def brute_force(pos, radius):
+    """
+    REFERENCE PAIRS, EVERY BODY TESTED AGAINST EVERY OTHER BODY
+
+    :param pos   : numpy.ndarray shape (N, 2); body centres
+    :param radius: numpy.ndarray shape (N, ); body radii
+    :return: numpy.ndarray shape (K, 2) int32; sorted index pairs (i < j)
+    """
+    pos = pos.astype(numpy.float64)
+    radius = radius.astype(numpy.float64)
+    dist = numpy.hypot(pos[:, None, 0] - pos[None, :, 0], pos[:, None, 1] - pos[None, :, 1])
+    i, j = numpy.nonzero(numpy.triu(dist <= radius[:, None] + radius[None, :], 1))
+    return numpy.stack([i, j], axis=1).astype(numpy.int32)
+
+
+def random_bodies(seed, n, low=0.0, high=1024.0, r_min=2.0, r_max=25.0):
+    """
+    RANDOM BODIES (CENTRES float32 & RADII float32)
+    """
+    rng = numpy.random.default_rng(seed)
+    pos = rng.uniform(low, high, (n, 2)).astype(numpy.float32)
+    radius = rng.uniform(r_min, r_max, n).astype(numpy.float32)
+    return pos, radius
+
+
+class TestSpatialHash(unittest.TestCase):
+    """
+    Test uniform grid broadphase SpatialHash
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object pairs(self, object pos, object radius)
+        :return:  void
+        """
+        grid = SpatialHash()
+        pos, radius = random_bodies(1, 800, low=-300.0)
+        pairs = grid.pairs(pos, radius)
+        self.assertEqual(pairs.dtype, numpy.int32)
+        self.assertEqual(pairs.shape[1], 2)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertEqual(len(grid), 800)
+
+        # Cell size derived from the largest diameter
+        self.assertAlmostEqual(grid.cell_size, 2.0 * float(radius.max()), places=4)
+
+        # Buffers re-used with fewer bodies and float64 arrays
+        pos, radius = random_bodies(2, 100)
+        pairs = grid.pairs(pos.astype(numpy.float64), radius)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+
+        # A cell size smaller than the bodies must not miss any pair
+        pos, radius = random_bodies(3, 500)
+        for cell_size in (3.0, 200.0):
+            pairs = SpatialHash(cell_size).pairs(pos, radius)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+
+        # No bodies, a single body & touching bodies
+        empty = numpy.empty((0, 2), dtype=numpy.float32)
+        self.assertEqual(grid.pairs(empty, numpy.empty(0, numpy.float32)).shape, (0, 2))
+        self.assertEqual(grid.pairs(pos[:1], radius[:1]).shape, (0, 2))
+        touching = numpy.array([[0.0, 0.0], [10.0, 0.0]], dtype=numpy.float32)
+        self.assertEqual(grid.pairs(touching, numpy.full(2, 5.0, numpy.float32)).tolist(),
+                         [[0, 1]])
+
+        # Invalid arguments
+        self.assertRaises(ValueError, SpatialHash, -1.0)
+        self.assertRaises(ValueError, grid.pairs, pos, radius[:-1])
+        self.assertRaises(ValueError, grid.pairs, numpy.zeros((4, 3), numpy.float32), radius[:4])
+
+
+class TestSweepAndPrune(unittest.TestCase):
+    """
+    Test incremental broadphase SweepAndPrune
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object pairs(self, object pos, object radius)
+        :return:  void
+        """
+        sap = SweepAndPrune()
+        pos, radius = random_bodies(4, 600)
+        pairs = sap.pairs(pos, radius)
+        self.assertEqual(pairs.dtype, numpy.int32)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertEqual(len(sap), 600)
+
+        # Same positions, the endpoint list is already sorted
+        sap.pairs(pos, radius)
+        self.assertEqual(sap.swaps, 0)
+
+        # Bodies moving up to 15 pixels per frame, the list is repaired
+        rng = numpy.random.default_rng(5)
+        for _ in range(10):
+            pos += rng.uniform(-15.0, 15.0, pos.shape).astype(numpy.float32)
+            pairs = sap.pairs(pos, radius)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertGreater(sap.swaps, 0)
+
+        # Growing radii & a different number of bodies (list rebuilt)
+        radius = radius * 2.0
+        self.assertTrue(numpy.array_equal(sap.pairs(pos, radius), brute_force(pos, radius)))
+        pos, radius = random_bodies(6, 50)
+        self.assertTrue(numpy.array_equal(
+            sap.pairs(pos.astype(numpy.float64), radius), brute_force(pos, radius)))
+
+        # Touching intervals & touching circles
+        touching = numpy.array([[0.0, 0.0], [10.0, 0.0], [30.0, 0.0]], dtype=numpy.float32)
+        self.assertEqual(sap.pairs(touching, numpy.full(3, 5.0, numpy.float32)).tolist(),
+                         [[0, 1]])
+        self.assertRaises(ValueError, sap.pairs, pos, radius[:-1])
+
+
+class TestLooseQuadtree(unittest.TestCase):
+    """
+    Test loose quadtree broadphase LooseQuadtree
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object pairs(self, object pos, object radius)
+        :return:  void
+        """
+        tree = LooseQuadtree(0.0, 0.0, 1024.0)
+        self.assertEqual(tree.nodes, 1)
+
+        # Large balls and small particles (radii ratio > 10), some outside the region
+        rng = numpy.random.default_rng(8)
+        pos = numpy.concatenate([
+            rng.uniform(-50.0, 1100.0, (100, 2)),
+            rng.normal(512.0, 60.0, (1500, 2))]).astype(numpy.float32)
+        radius = numpy.concatenate([
+            numpy.full(100, 25.0), rng.uniform(0.5, 2.0, 1500)]).astype(numpy.float32)
+        pairs = tree.pairs(pos, radius)
+        self.assertEqual(pairs.dtype, numpy.int32)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertEqual(len(tree), 1600)
+        self.assertEqual(tree.moves, 1600)
+
+        # Moving bodies, only the bodies changing node are moved
+        for _ in range(5):
+            pos += rng.uniform(-4.0, 4.0, pos.shape).astype(numpy.float32)
+            pairs = tree.pairs(pos, radius)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertLess(tree.moves, 1600)
+        tree.pairs(pos, radius)
+        self.assertEqual(tree.moves, 0)
+
+        # Bodies removed and added, the empty nodes are released
+        nodes = tree.nodes
+        pairs = tree.pairs(pos[:100], radius[:100])
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos[:100], radius[:100])))
+        self.assertLess(tree.nodes, nodes)
+        self.assertTrue(numpy.array_equal(tree.pairs(pos, radius), brute_force(pos, radius)))
+        tree.pairs(pos[:0], radius[:0])
+        self.assertEqual(tree.nodes, 1)
+
+        self.assertRaises(ValueError, LooseQuadtree, 0.0, 0.0, 0.0)
+        self.assertRaises(ValueError, LooseQuadtree, 0.0, 0.0, 1.0, 21)
+        self.assertRaises(ValueError, tree.pairs, pos, radius[:-1])
+
+
+class TestDynamicAABBTree(unittest.TestCase):
+    """
+    Test dynamic AABB tree broadphase DynamicAABBTree
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object pairs(self, object pos, object radius)
+        :return:  void
+        """
+        tree = DynamicAABBTree(margin=4.0)
+        self.assertEqual(tree.height, -1)
+        pos, radius = random_bodies(9, 1000, low=-100.0, r_min=0.5, r_max=30.0)
+        pairs = tree.pairs(pos, radius)
+        self.assertEqual(pairs.dtype, numpy.int32)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertEqual(tree.reinserts, 1000)
+        self.assertEqual(len(tree), 1000)
+
+        # Bodies moving inside their fat box are not re-inserted
+        rng = numpy.random.default_rng(10)
+        pairs = tree.pairs(pos + numpy.float32(3.5), radius)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos + numpy.float32(3.5), radius)))
+        self.assertEqual(tree.reinserts, 0)
+        for _ in range(5):
+            pos += rng.uniform(-6.0, 6.0, pos.shape).astype(numpy.float32)
+            pairs = tree.pairs(pos, radius)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertLess(tree.reinserts, 1000)
+
+        # Bodies inserted in order along a line, the rotations keep the tree balanced
+        line = numpy.zeros((4096, 2), dtype=numpy.float32)
+        line[:, 0] = numpy.arange(4096) * 3.0
+        tree = DynamicAABBTree(margin=0.0)
+        self.assertEqual(tree.pairs(line, numpy.ones(4096, numpy.float32)).shape, (0, 2))
+        self.assertLessEqual(tree.height, 2 * 12)
+
+        # Bodies removed and added
+        pairs = tree.pairs(pos[:10], radius[:10])
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos[:10], radius[:10])))
+        self.assertTrue(numpy.array_equal(tree.pairs(pos, radius), brute_force(pos, radius)))
+        tree.pairs(pos[:0], radius[:0])
+        self.assertEqual(tree.height, -1)
+
+        self.assertRaises(ValueError, DynamicAABBTree, -1.0)
+        self.assertRaises(ValueError, tree.pairs, pos, radius[:-1])
+
+
+class TestVerletList(unittest.TestCase):
+    """
+    Test Verlet neighbour lists broadphase VerletList
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object pairs(self, object pos, object radius)
+        :return:  void
+        """
+        verlet = VerletList(skin=20.0)
+        self.assertEqual(verlet.pairs(numpy.empty((0, 2), numpy.float32),
+                                      numpy.empty(0, numpy.float32)).shape, (0, 2))
+
+        # Dense gas, bodies moving less than 1 pixel per step
+        rng = numpy.random.default_rng(11)
+        pos = rng.uniform(0.0, 400.0, (1000, 2))
+        radius = numpy.full(1000, 6.0)
+        velocity = rng.uniform(-0.5, 0.5, (1000, 2))
+        rebuilds = verlet.rebuilds
+        for _ in range(40):
+            pos += velocity
+            pairs = verlet.pairs(pos, radius)
+            self.assertEqual(pairs.dtype, numpy.int32)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        # skin / 2 = 10 pixels, at most 0.71 pixel per step
+        self.assertLessEqual(verlet.rebuilds - rebuilds, 4)
+        self.assertEqual(len(verlet), 1000)
+
+        # A body moving further than skin / 2 forces a rebuild
+        pos[0] += 11.0
+        verlet.pairs(pos, radius)
+        self.assertTrue(verlet.rebuilt)
+        verlet.pairs(pos, radius)
+        self.assertFalse(verlet.rebuilt)
+
+        # Growing radius & different number of bodies
+        radius[3] = 9.0
+        self.assertTrue(numpy.array_equal(verlet.pairs(pos, radius), brute_force(pos, radius)))
+        self.assertTrue(verlet.rebuilt)
+        pairs = verlet.pairs(pos[:50], radius[:50])
+        self.assertTrue(verlet.rebuilt)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos[:50], radius[:50])))
+
+        self.assertRaises(ValueError, VerletList, -1.0)
+        self.assertRaises(ValueError, verlet.pairs, pos, radius[:-1])
+
+
+class TestCellListPairs(unittest.TestCase):
+    """
+    Test nogil cell list cell_list_pairs
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object cell_list_pairs(
+            real_t [:, ::1] pos,
+            real_t [::1] radius,
+            double cell_size = 0.0)
+        :return:  void
+        """
+        pos, radius = random_bodies(12, 1000, low=-300.0, r_min=0.5, r_max=30.0)
+        pairs = cell_list_pairs(pos, radius)
+        self.assertEqual(pairs.dtype, numpy.int32)
+        self.assertTrue(pairs.flags['C_CONTIGUOUS'])
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+
+        # float64 arrays, small & large cells, sparse scene
+        pos64, radius64 = pos.astype(numpy.float64), radius.astype(numpy.float64)
+        for cell_size in (0.0, 2.0, 400.0):
+            pairs = cell_list_pairs(pos64, radius64, cell_size)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        sparse = numpy.array([[0.0, 0.0], [1.0e7, 1.0e7], [5.0, 0.0]])
+        self.assertEqual(cell_list_pairs(sparse, numpy.full(3, 3.0)).tolist(), [[0, 2]])
+        self.assertEqual(cell_list_pairs(pos[:1], radius[:1]).shape, (0, 2))
+
+        # The pairs feed the batch solver, same result than the scalar solver
+        rng = numpy.random.default_rng(13)
+        vel = rng.uniform(-4.0, 4.0, pos.shape).astype(numpy.float32)
+        mass = rng.uniform(1.0, 10.0, len(pos)).astype(numpy.float32)
+        pairs = cell_list_pairs(pos, radius)
+        expected = vel.copy()
+        for i, j in pairs.tolist():
+            v1, v2 = momentum_angle_free(
+                Vector2(*expected[i]), Vector2(*expected[j]), float(mass[i]), float(mass[j]),
+                Vector2(*pos[i]), Vector2(*pos[j]))
+            expected[i] = (v1.x, v1.y)
+            expected[j] = (v2.x, v2.y)
+        resolve_pairs(pos, vel, mass, pairs)
+        self.assertTrue(numpy.allclose(vel, expected, atol=1e-3))
+
+        self.assertRaises(ValueError, cell_list_pairs, pos, radius[:-1])
+        self.assertRaises(ValueError, cell_list_pairs, pos, radius, -1.0)
+        self.assertRaises(ValueError, cell_list_pairs, pos, radius64)
+
+
+class TestHierarchicalGrid(unittest.TestCase):
+    """
+    Test multi-level grid broadphase HierarchicalGrid
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object pairs(self, object pos, object radius)
+        :return:  void
+        """
+        grid = HierarchicalGrid()
+        self.assertIsInstance(grid, SpatialHash)
+
+        # Obstacles, balls and debris (radius ratio 100:1)
+        rng = numpy.random.default_rng(14)
+        pos = rng.uniform(-100.0, 1100.0, (1520, 2)).astype(numpy.float32)
+        radius = numpy.concatenate([
+            numpy.full(20, 100.0), numpy.full(200, 25.0),
+            rng.uniform(1.0, 2.0, 1300)]).astype(numpy.float32)
+        pairs = grid.pairs(pos, radius)
+        self.assertEqual(pairs.dtype, numpy.int32)
+        self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        self.assertAlmostEqual(grid.cell_size, 2.0 * float(radius.min()), places=4)
+        self.assertGreaterEqual(grid.levels, 3)
+
+        # Fixed cell size (finest level), float64 arrays & a single size
+        for cell_size in (0.5, 300.0):
+            pairs = HierarchicalGrid(cell_size).pairs(pos.astype(numpy.float64), radius)
+            self.assertTrue(numpy.array_equal(pairs, brute_force(pos, radius)))
+        same = numpy.full(1520, 5.0, dtype=numpy.float32)
+        self.assertTrue(numpy.array_equal(grid.pairs(pos, same), brute_force(pos, same)))
+        self.assertEqual(grid.levels, 1)
+
+        # Points (radius 0.0) & no bodies
+        points = numpy.array([[1.0, 1.0], [1.0, 1.0], [2.0, 2.0]], dtype=numpy.float32)
+        self.assertEqual(grid.pairs(points, numpy.zeros(3, numpy.float32)).tolist(), [[0, 1]])
+        self.assertEqual(grid.pairs(points[:0], same[:0]).shape, (0, 2))
+
+        self.assertRaises(ValueError, HierarchicalGrid, -1.0)
+        self.assertRaises(ValueError, grid.pairs, pos, radius[:-1])
+
+
+class TestMortonOrder(unittest.TestCase):
+    """
+    Test Morton order morton_order & broadphase remap
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object morton_order(real_t [:, ::1] pos, double cell_size = 0.0)
+        def remap(self, object order)
+        :return:  void
+        """
+        # Z-curve over a 4 x 4 grid of cells
+        grid = numpy.array([(x, y) for y in range(4) for x in range(4)], dtype=numpy.float32)
+        order = morton_order(grid, 1.0)
+        self.assertEqual(order.dtype, numpy.int32)
+        self.assertEqual(grid[order][:8].tolist(), [
+            [0, 0], [1, 0], [0, 1], [1, 1], [2, 0], [3, 0], [2, 1], [3, 1]])
+
+        pos, radius = random_bodies(15, 1500, r_min=1.0, r_max=20.0)
+        order = morton_order(pos.astype(numpy.float64))
+        self.assertEqual(sorted(order.tolist()), list(range(1500)))
+        self.assertEqual(morton_order(pos[:0]).shape, (0,))
+
+        # The broadphase objects follow the new order without losing their state
+        structures = [SpatialHash(), SweepAndPrune(), LooseQuadtree(0.0, 0.0, 1024.0),
+                      DynamicAABBTree(), VerletList(), HierarchicalGrid()]
+        for structure in structures:
+            structure.pairs(pos, radius)
+        new_pos, new_radius = pos[order], radius[order]
+        expected = brute_force(new_pos, new_radius)
+        for structure in structures:
+            structure.remap(order)
+            pairs = structure.pairs(new_pos, new_radius)
+            self.assertTrue(numpy.array_equal(pairs, expected), type(structure).__name__)
+        self.assertEqual(structures[1].swaps, 0)
+        self.assertEqual(structures[2].moves, 0)
+        self.assertEqual(structures[3].reinserts, 0)
+
+        # Handles remapped, inverse[old] = new
+        inverse = numpy.empty_like(order)
+        inverse[order] = numpy.arange(len(order), dtype=numpy.int32)
+        self.assertTrue(numpy.array_equal(new_pos[inverse], pos))
+
+        self.assertRaises(ValueError, structures[1].remap, order[:-1])
+        self.assertRaises(ValueError, structures[1].remap, numpy.zeros(1500, numpy.int32))
+        self.assertRaises(ValueError, morton_order, pos, -1.0)
+
+
+class TestStripPairs(unittest.TestCase):
+    """
+    Test the parallel strips broadphase strip_pairs & StripBroadphase
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object strip_pairs(
+            real_t [:, ::1] pos,
+            real_t [::1] radius,
+            object lower = None,
+            object upper = None,
+            int strips = 0,
+            int threads = 0)
+        :return:  void
+        """
+        # Bodies inside & outside the domain, boundary pairs reported once
+        pos, radius = random_bodies(16, 1500, low=-200.0, high=1200.0, r_min=1.0, r_max=25.0)
+        expected = brute_force(pos, radius)
+        for strips, threads in ((0, 0), (1, 1), (3, 2), (17, 4), (500, 3)):
+            for lower, upper in ((None, None), ((0, 0), (1024, 1024)), ((400, 0), (400, 0))):
+                pairs = strip_pairs(pos, radius, lower, upper, strips, threads)
+                self.assertEqual(pairs.dtype, numpy.int32)
+                self.assertTrue(numpy.array_equal(pairs, expected), (strips, threads, lower))
+
+        pos64, radius64 = pos.astype(numpy.float64), radius.astype(numpy.float64)
+        self.assertTrue(numpy.array_equal(strip_pairs(pos64, radius64, strips=8), expected))
+        self.assertTrue(numpy.array_equal(
+            strip_pairs(pos, radius, threads=2), cell_list_pairs(pos, radius)))
+        self.assertEqual(strip_pairs(numpy.zeros((4, 2)), numpy.zeros(4), strips=8).shape, (6, 2))
+        self.assertEqual(strip_pairs(pos[:1], radius[:1]).shape, (0, 2))
+
+        # Object version (same interface than the other broadphase classes)
+        broadphase = StripBroadphase((0, 0), (1024, 1024), strips=6, threads=2)
+        self.assertTrue(numpy.array_equal(broadphase.pairs(pos64, radius), expected))
+        self.assertEqual(len(broadphase), 1500)
+        broadphase.remap(morton_order(pos))
+
+        self.assertRaises(ValueError, strip_pairs, pos, radius, (10, 0), (0, 0))
+        self.assertRaises(ValueError, strip_pairs, pos, radius, None, None, -1)
+        self.assertRaises(ValueError, StripBroadphase, None, None, 0, -2)
+
+
+class TestContactCache(unittest.TestCase):
+    """
+    Test the persistent contact cache ContactCache
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef object update(self, object pairs, object handles = None)
+        :return:  void
+        """
+        begin, persist = ContactCache.BEGIN, ContactCache.PERSIST
+        contacts = ContactCache()
+        handles = numpy.array([100, 7, 55, 3], dtype=numpy.int64)
+
+        state = contacts.update(numpy.array([[0, 1], [1, 2]], dtype=numpy.int32), handles)
+        self.assertEqual(state.dtype, numpy.int8)
+        self.assertEqual(state.tolist(), [begin, begin])
+        self.assertEqual(contacts.began.tolist(), [[7, 55], [7, 100]])
+        self.assertEqual(contacts.ended.shape, (0, 2))
+        self.assertEqual(len(contacts), 2)
+
+        # Contact (7, 55) persists, (3, 55) begins and (7, 100) ends
+        state = contacts.update(numpy.array([[1, 2], [2, 3]], dtype=numpy.int32), handles)
+        self.assertEqual(state.tolist(), [persist, begin])
+        self.assertEqual(contacts.began.tolist(), [[3, 55]])
+        self.assertEqual(contacts.ended.tolist(), [[7, 100]])
+
+        # The handles follow the bodies when the rows are re-ordered
+        state = contacts.update(numpy.array([[0, 1], [1, 2]], dtype=numpy.int32), handles[::-1])
+        self.assertEqual(state.tolist(), [persist, persist])
+        self.assertEqual(contacts.began.shape, (0, 2))
+
+        state = contacts.update(numpy.empty((0, 2), dtype=numpy.int32), handles)
+        self.assertEqual(state.shape, (0,))
+        self.assertEqual(contacts.ended.tolist(), [[3, 55], [7, 55]])
+        self.assertEqual(len(contacts), 0)
+
+        # Broadphase pairs, row index handles, every contact begins and ends once
+        pos, radius = random_bodies(17, 800, r_min=2.0, r_max=15.0)
+        grid = SpatialHash()
+        rng = numpy.random.default_rng(18)
+        vel = rng.uniform(-3.0, 3.0, pos.shape).astype(numpy.float32)
+        began = ended = 0
+        for frame in range(20):
+            pairs = grid.pairs(pos, radius)
+            state = contacts.update(pairs)
+            began += len(contacts.began)
+            ended += len(contacts.ended)
+            self.assertEqual(int((state == begin).sum()), len(contacts.began))
+            self.assertEqual(len(contacts), len(pairs))
+            pos += vel
+        self.assertEqual(began, ended + len(contacts))
+
+        contacts.clear()
+        self.assertEqual(contacts.update(pairs).tolist(), [begin] * len(pairs))
+        self.assertRaises(ValueError, contacts.update, numpy.array([[0, 9]]), handles)
+        self.assertRaises(ValueError, contacts.update, numpy.zeros((2, 3), dtype=numpy.int32))
+
+
+def run_testsuite():
+    """
+    test suite
+
+    :return: void
+    """
+
+    suite = unittest.TestSuite()
+
+    suite.addTests([
+        TestSpatialHash(),
+        TestSweepAndPrune(),
+        TestLooseQuadtree(),
+        TestDynamicAABBTree(),
+        TestVerletList(),
+        TestCellListPairs(),
+        TestHierarchicalGrid(),
+        TestMortonOrder(),
+        TestStripPairs(),
+        TestContactCache(),
+    ])
+
+    unittest.TextTestRunner().run(suite)
+
+
+if __name__ == '__main__':
+    run_testsuite()
+    sys.exit(0)
@@ -5,13 +5,21 @@ import sys
 import unittest
 import math
 
+import numpy
 from pygame.math import Vector2
 
-from ElasticCollision.c_game import momentum_angle_free_c, momentum_trigonometry_c
+from ElasticCollision.c_game import momentum_angle_free_c, momentum_trigonometry_c, \
+    momentum_angle_free_c_soa, momentum_trigonometry_c_soa, soa_kernel, \
+    momentum_angle_free_c_into, momentum_trigonometry_c_into
+from ElasticCollision import c_game, ec_game
 from ElasticCollision.ec_game import momentum_trigonometry, momentum_angle_free, \
     get_momentum_trigonometry_v1v2, \
      get_v11, get_v12, get_v1_angle_free_v1, get_v2_angle_free_v2, get_angle_free_v1v2, \
-     get_theta_angle_, get_contact_angle_
+     get_theta_angle_, get_contact_angle_, momentum_trigonometry_batch, \
+     resolve_pairs, set_num_threads, get_num_threads, set_parallel_threshold, \
+     get_parallel_threshold, momentum_trigonometry_into, momentum_trigonometry_inplace, \
+     momentum_angle_free_into, momentum_angle_free_inplace, integrate, time_of_impact, \
+     resolve_impacts, separate
 
 
 class TestMomentumTrigonometry(unittest.TestCase):
@@ -682,6 +690,679 @@ class TestMomentumTrigonometryC(unittest.TestCase):
         self.assertAlmostEqual(round(v12.y, 3), -round(math.sin(math.pi / 4.0), 3))
 
 
+class TestMomentumTrigonometryBatch(unittest.TestCase):
+    """
+    Test Momentum Trigonometry batch momentum_trigonometry_batch
+    """
+
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(11)
+        n = 64
+        c1 = rng.uniform(0.0, 100.0, (n, 2)).astype(numpy.float32)
+        c2 = (c1 + rng.uniform(1.0, 5.0, (n, 2))).astype(numpy.float32)
+        v1 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        v2 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        m1 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        m2 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        v1_copy, c1_copy = v1.copy(), c1.copy()
+
+        for invert in (False, True):
+            r1, r2 = momentum_trigonometry_batch(c1, c2, v1, v2, m1, m2, invert)
+            self.assertEqual(r1.shape, (n, 2))
+            self.assertEqual(r2.dtype, numpy.float32)
+
+            # Every row must match the scalar version
+            for i in range(n):
+                v11, v12 = momentum_trigonometry(
+                    Vector2(*c1[i]), Vector2(*c2[i]), Vector2(*v1[i]), Vector2(*v2[i]),
+                    float(m1[i]), float(m2[i]), invert)
+                self.assertAlmostEqual(r1[i, 0], v11.x, places=3)
+                self.assertAlmostEqual(r1[i, 1], v11.y, places=3)
+                self.assertAlmostEqual(r2[i, 0], v12.x, places=3)
+                self.assertAlmostEqual(r2[i, 1], v12.y, places=3)
+
+        # Inputs are left untouched by the Y-axis inversion
+        self.assertTrue(numpy.array_equal(v1, v1_copy))
+        self.assertTrue(numpy.array_equal(c1, c1_copy))
+
+        self.assertRaises(ValueError, momentum_trigonometry_batch,
+                          c1, c2[:-1], v1, v2, m1, m2)
+
+
+class TestResolvePairs(unittest.TestCase):
+    """
+    Test in place pair resolution resolve_pairs
+    """
+
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        pos = numpy.array([[0.0, 0.0], [1.0, 0.5], [2.0, 0.0], [9.0, 9.0]], dtype=numpy.float32)
+        vel = numpy.array([[1.0, 0.2], [-0.5, 0.0], [-1.0, 0.3], [0.0, 1.0]], dtype=numpy.float32)
+        mass = numpy.array([1.0, 2.0, 3.0, 1.0], dtype=numpy.float32)
+        # Body 1 is in contact with body 0 and body 2
+        pairs = numpy.array([[0, 1], [1, 2]], dtype=numpy.int32)
+
+        # Expected result, pairs applied one after the other
+        expected = [Vector2(*v) for v in vel]
+        for i, j in pairs:
+            v11, v12 = momentum_angle_free(
+                Vector2(expected[i]), Vector2(expected[j]), float(mass[i]), float(mass[j]),
+                Vector2(*pos[i]), Vector2(*pos[j]))
+            expected[i], expected[j] = v11, v12
+
+        resolve_pairs(pos, vel, mass, pairs)
+        for i in range(len(expected)):
+            self.assertAlmostEqual(vel[i, 0], expected[i].x, places=5)
+            self.assertAlmostEqual(vel[i, 1], expected[i].y, places=5)
+
+        # Body 3 is not colliding
+        self.assertEqual(tuple(vel[3]), (0.0, 1.0))
+
+        # Total momentum is conserved
+        before = (numpy.array([[1.0, 0.2], [-0.5, 0.0], [-1.0, 0.3], [0.0, 1.0]])
+                  * mass[:, None]).sum(axis=0)
+        after = (vel * mass[:, None]).sum(axis=0)
+        self.assertTrue(numpy.allclose(before, after, atol=1e-5))
+
+        # Index out of range
+        self.assertRaises(ValueError, resolve_pairs, pos, vel, mass,
+                          numpy.array([[0, 4]], dtype=numpy.int32))
+
+
+class TestIntegrate(unittest.TestCase):
+    """
+    Test the body table integrator integrate
+    """
+
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        pos = numpy.array([[10.0, 500.0], [1000.0, 500.0], [500.0, 3.0], [5.0, 5.0],
+                           [500.0, 500.0]], dtype=numpy.float32)
+        vel = numpy.array([[-8.0, 0.0], [30.0, 2.0], [0.0, -5.0], [1.0, 1.0],
+                           [1.0, -2.0]], dtype=numpy.float32)
+        radius = numpy.array([5.0, 25.0, 2.0, 10.0, 10.0], dtype=numpy.float32)
+        integrate(pos, vel, radius, (0, 0), (1024, 1024))
+
+        # Left wall (x = 2 mirrored at radius 5 -> 8), velocity clamped to 15 then right
+        # wall (1015 mirrored at 999 -> 983), bottom wall with a 2 pixels radius
+        self.assertEqual(pos.tolist(), [[8.0, 500.0], [983.0, 502.0], [500.0, 6.0],
+                                        [14.0, 14.0], [501.0, 498.0]])
+        self.assertEqual(vel.tolist(), [[8.0, 0.0], [-15.0, 2.0], [0.0, 5.0],
+                                        [1.0, 1.0], [1.0, -2.0]])
+
+        # Friction & time step, float64 body table
+        pos64 = numpy.array([[100.0, 100.0]])
+        vel64 = numpy.array([[10.0, -4.0]])
+        integrate(pos64, vel64, numpy.array([1.0]), (0, 0), (1024, 1024), 0.5, -15.0, 15.0, 2.0)
+        self.assertEqual(pos64.tolist(), [[110.0, 96.0]])
+        self.assertEqual(vel64.tolist(), [[5.0, -2.0]])
+
+        # The bodies stay inside the domain, the speed is kept (elastic walls)
+        rng = numpy.random.default_rng(5)
+        pos = rng.uniform(0, 1024, (5000, 2)).astype(numpy.float32)
+        vel = rng.uniform(-20, 20, (5000, 2)).astype(numpy.float32)
+        radius = rng.uniform(2, 25, 5000).astype(numpy.float32)
+        pos = numpy.clip(pos, radius[:, None], 1024 - radius[:, None])
+        integrate(pos, vel, radius, (0, 0), (1024, 1024))
+        speed = numpy.abs(vel)
+        for frame in range(200):
+            integrate(pos, vel, radius, (0, 0), (1024, 1024))
+        self.assertTrue((pos >= radius[:, None] - 1e-3).all())
+        self.assertTrue((pos <= 1024 - radius[:, None] + 1e-3).all())
+        self.assertTrue(numpy.array_equal(numpy.abs(vel), speed))
+
+        self.assertRaises(ValueError, integrate, pos, vel, radius[:10], (0, 0), (1024, 1024))
+        self.assertRaises(ValueError, integrate, pos, vel, radius, (0, 0, 0), (1024, 1024))
+        self.assertRaises(ValueError, integrate, pos, vel, radius, (0, 0), (1024, 1024),
+                          1.0, 15.0, -15.0)
+
+
+class TestTimeOfImpact(unittest.TestCase):
+    """
+    Test continuous collision detection time_of_impact & resolve_impacts
+    """
+
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        # 4 pixels debris 12 pixels apart moving at 15 pixels per frame (tunnelling)
+        pos = numpy.array([[100.0, 100.0], [112.0, 100.0], [300.0, 300.0], [300.0, 303.0],
+                           [500.0, 500.0], [510.0, 500.0]], dtype=numpy.float32)
+        vel = numpy.array([[15.0, 0.0], [-15.0, 0.0], [0.0, -1.0], [0.0, 1.0],
+                           [0.0, 15.0], [0.0, 15.0]], dtype=numpy.float32)
+        mass = numpy.array([1.0, 1.0, 1.0, 3.0, 1.0, 1.0], dtype=numpy.float32)
+        radius = numpy.full(6, 2.0, dtype=numpy.float32)
+        pairs = numpy.array([[0, 1], [2, 3], [4, 5]], dtype=numpy.int32)
+
+        toi = time_of_impact(pos, vel, radius, pairs)
+        self.assertEqual(toi.dtype, numpy.float64)
+        self.assertAlmostEqual(toi[0], 8.0 / 30.0, places=6)
+        # Overlapping discs touched 0.5 frame ago (moving apart, no impact)
+        self.assertEqual(toi[1], numpy.inf)
+        self.assertEqual(toi[2], numpy.inf)
+        self.assertEqual(time_of_impact(pos, -vel, radius, pairs)[1], -0.5)
+        self.assertEqual(time_of_impact(pos, vel, radius, pairs, 0.2)[0], numpy.inf)
+
+        # The debris bounce at time 8 / 30 instead of crossing each other
+        resolve_impacts(pos, vel, mass, radius, pairs)
+        integrate(pos, vel, radius, (0, 0), (1024, 1024))
+        self.assertTrue(numpy.allclose(pos[:2], [[93.0, 100.0], [119.0, 100.0]], atol=1e-4))
+        self.assertEqual(vel[:2].tolist(), [[-15.0, 0.0], [15.0, 0.0]])
+        self.assertEqual(pos[2:].tolist(), [[300.0, 299.0], [300.0, 304.0], [500.0, 515.0],
+                                            [510.0, 515.0]])
+
+        # Overlapping approaching discs are moved back to their contact (no overlap after
+        # the frame), momentum & kinetic energy are conserved
+        pos = numpy.array([[100.0, 100.0], [102.0, 100.5]])
+        vel = numpy.array([[1.0, 0.0], [-1.0, 0.0]])
+        mass = numpy.array([1.0, 3.0])
+        radius = numpy.array([2.0, 2.0])
+        pairs = numpy.array([[0, 1]], dtype=numpy.int32)
+        before = (vel * mass[:, None]).sum(axis=0)
+        energy = (mass * (vel ** 2).sum(axis=1)).sum()
+        resolve_impacts(pos, vel, mass, radius, pairs)
+        integrate(pos, vel, radius, (0, 0), (1024, 1024))
+        self.assertGreaterEqual(numpy.hypot(*(pos[1] - pos[0])), 4.0 - 1e-9)
+        self.assertTrue(numpy.allclose((vel * mass[:, None]).sum(axis=0), before))
+        self.assertAlmostEqual((mass * (vel ** 2).sum(axis=1)).sum(), energy)
+
+        # Fast debris (all the pairs), no overlap at the end of the frame, the bodies
+        # bouncing several times during the frame conserve momentum & energy
+        rng = numpy.random.default_rng(6)
+        pos = rng.uniform(100, 400, (120, 2))
+        vel = rng.uniform(-15, 15, (120, 2))
+        radius = numpy.full(120, 2.0)
+        mass = rng.uniform(0.1, 1.0, 120)
+        i, j = numpy.triu_indices(120, 1)
+        apart = numpy.hypot(*(pos[i] - pos[j]).T) > 4.0
+        pairs = numpy.ascontiguousarray(numpy.stack([i, j], axis=1)[apart], dtype=numpy.int32)
+        toi = time_of_impact(pos, vel, radius, pairs)
+        self.assertTrue(((toi >= 0.0) & (toi <= 1.0) | numpy.isinf(toi)).all())
+        self.assertGreater(numpy.isfinite(toi).sum(), 5)
+        before = (vel * mass[:, None]).sum(axis=0)
+        energy = (mass * (vel ** 2).sum(axis=1)).sum()
+        resolve_impacts(pos, vel, mass, radius, pairs)
+        integrate(pos, vel, radius, (0, 0), (1024, 1024), 1.0, -100.0, 100.0)
+        distance = numpy.hypot(*(pos[pairs[:, 0]] - pos[pairs[:, 1]]).T)
+        self.assertTrue((distance >= 4.0 - 1e-6).all())
+        self.assertTrue(numpy.allclose((vel * mass[:, None]).sum(axis=0), before))
+        self.assertAlmostEqual((mass * (vel ** 2).sum(axis=1)).sum(), energy)
+
+        self.assertRaises(ValueError, time_of_impact, pos, vel, radius[:5], pairs)
+        self.assertRaises(ValueError, time_of_impact, pos, vel, radius, pairs, 0.0)
+        self.assertRaises(ValueError, resolve_impacts, pos, vel, mass[:5], radius, pairs)
+        self.assertRaises(ValueError, resolve_impacts, pos, vel, mass, radius[:5], pairs)
+        self.assertRaises(ValueError, resolve_impacts, pos, vel, mass, radius, pairs, 0.0)
+        self.assertRaises(ValueError, resolve_impacts, pos, vel, mass, radius,
+                          numpy.array([[0, len(pos)]], dtype=numpy.int32))
+
+
+class TestSeparate(unittest.TestCase):
+    """
+    Test the bounded positional correction separate
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        # Overlap 4 pixels split by inverse mass (mass 1 moves 3 times more than mass 3)
+        pos = numpy.array([[0.0, 0.0], [6.0, 0.0]], dtype=numpy.float64)
+        mass = numpy.array([1.0, 3.0])
+        radius = numpy.array([5.0, 5.0])
+        pairs = numpy.array([[0, 1]], dtype=numpy.int32)
+        separate(pos, mass, radius, pairs, iterations=1, slop=0.0)
+        self.assertTrue(numpy.allclose(pos, [[-3.0, 0.0], [7.0, 0.0]]))
+
+        # Slop, the overlap below the slop is kept (resting contact)
+        pos = numpy.array([[0.0, 0.0], [6.0, 0.0]], dtype=numpy.float32)
+        separate(pos, mass.astype(numpy.float32), radius.astype(numpy.float32), pairs,
+                 iterations=1, slop=1.0)
+        self.assertAlmostEqual(float(pos[1, 0] - pos[0, 0]), 9.0, places=5)
+
+        # Static disc (mass 0.0) & no iteration
+        pos = numpy.array([[0.0, 0.0], [6.0, 0.0]], dtype=numpy.float64)
+        separate(pos, numpy.array([0.0, 1.0]), radius, pairs, iterations=1, slop=0.0)
+        self.assertTrue(numpy.allclose(pos, [[0.0, 0.0], [10.0, 0.0]]))
+        pos = numpy.array([[0.0, 0.0], [6.0, 0.0]], dtype=numpy.float64)
+        separate(pos, mass, radius, pairs, iterations=0)
+        self.assertTrue(numpy.allclose(pos, [[0.0, 0.0], [6.0, 0.0]]))
+
+        # Dense cluster, the overlaps shrink with the iterations, centre of mass unchanged
+        rng = numpy.random.default_rng(5)
+        pos = rng.uniform(0.0, 60.0, (40, 2))
+        mass = rng.uniform(1.0, 4.0, 40)
+        radius = numpy.full(40, 5.0)
+        pairs = numpy.array([(i, j) for i in range(40) for j in range(i + 1, 40)],
+                            dtype=numpy.int32)
+
+        def overlap(p):
+            d = numpy.hypot(*(p[pairs[:, 1]] - p[pairs[:, 0]]).T)
+            return numpy.maximum(10.0 - d, 0.0).max()
+
+        centre = (pos * mass[:, None]).sum(axis=0) / mass.sum()
+        before = overlap(pos)
+        separate(pos, mass, radius, pairs, iterations=20, slop=0.0)
+        self.assertLess(overlap(pos), before * 0.1)
+        self.assertTrue(numpy.allclose((pos * mass[:, None]).sum(axis=0) / mass.sum(), centre))
+
+        self.assertRaises(ValueError, separate, pos, mass[:10], radius, pairs)
+        self.assertRaises(ValueError, separate, pos, mass, radius,
+                          numpy.array([[0, 40]], dtype=numpy.int32))
+        self.assertRaises(ValueError, separate, pos, mass, radius, pairs, 4, 0.1, 0.0)
+
+
+class TestMomentumTrigonometryBatchParallel(unittest.TestCase):
+    """
+    Test OpenMP version of momentum_trigonometry_batch
+    """
+
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(5)
+        n = 5000
+        c1 = rng.uniform(0.0, 100.0, (n, 2)).astype(numpy.float32)
+        c2 = (c1 + rng.uniform(1.0, 5.0, (n, 2))).astype(numpy.float32)
+        v1 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        v2 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        m1 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        m2 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+
+        threads, threshold = get_num_threads(), get_parallel_threshold()
+        try:
+            set_num_threads(1)
+            serial1, serial2 = momentum_trigonometry_batch(c1, c2, v1, v2, m1, m2, True)
+
+            set_num_threads(4)
+            set_parallel_threshold(0)
+            parallel1, parallel2 = momentum_trigonometry_batch(c1, c2, v1, v2, m1, m2, True)
+        finally:
+            set_num_threads(threads)
+            set_parallel_threshold(threshold)
+
+        self.assertTrue(numpy.array_equal(serial1, parallel1))
+        self.assertTrue(numpy.array_equal(serial2, parallel2))
+
+
+class TestMomentumCSoa(unittest.TestCase):
+    """
+    Test the structure of arrays functions momentum_angle_free_c_soa &
+    momentum_trigonometry_c_soa against the scalar C functions
+    """
+
+    # pylint: disable=too-many-locals
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        self.assertIn(soa_kernel(), ('avx2', 'sse2', 'c'))
+
+        rng = numpy.random.default_rng(7)
+        # 37 pairs, exercise the SIMD loop and the remaining pairs (scalar tail)
+        n = 37
+        v1x, v1y, v2x, v2y = rng.uniform(-4.0, 4.0, (4, n)).astype(numpy.float32)
+        m1, m2 = rng.uniform(0.5, 10.0, (2, n)).astype(numpy.float32)
+        x1x, x1y = rng.uniform(0.0, 100.0, (2, n)).astype(numpy.float32)
+        x2x, x2y = (numpy.stack((x1x, x1y)) +
+                    rng.uniform(1.0, 5.0, (2, n))).astype(numpy.float32)
+
+        for invert in (False, True):
+            out = momentum_angle_free_c_soa(
+                v1x, v1y, v2x, v2y, m1, m2, x1x, x1y, x2x, x2y, invert=invert)
+            self.assertEqual(out.shape, (4, n))
+            self.assertEqual(out.dtype, numpy.float32)
+            for i in range(n):
+                v1, v2 = momentum_angle_free_c(
+                    v1x[i], v1y[i], v2x[i], v2y[i], m1[i], m2[i],
+                    x1x[i], x1y[i], x2x[i], x2y[i], invert)
+                self.assertTrue(numpy.allclose(out[:, i], (v1.x, v1.y, v2.x, v2.y),
+                                               rtol=1e-4, atol=1e-4))
+
+            out = momentum_trigonometry_c_soa(
+                v1x, v1y, m1, x1x, x1y, v2x, v2y, m2, x2x, x2y, invert=invert)
+            for i in range(n):
+                v1, v2 = momentum_trigonometry_c(
+                    v1x[i], v1y[i], m1[i], x1x[i], x1y[i],
+                    v2x[i], v2y[i], m2[i], x2x[i], x2y[i], invert)
+                self.assertTrue(numpy.allclose(out[:, i], (v1.x, v1.y, v2.x, v2.y),
+                                               rtol=1e-3, atol=1e-3))
+
+        # Caller buffer and identical centres (velocities unchanged)
+        buffer = numpy.empty((4, n), dtype=numpy.float32)
+        out = momentum_angle_free_c_soa(
+            v1x, v1y, v2x, v2y, m1, m2, x1x, x1y, x1x, x1y, out=buffer)
+        self.assertIs(out, buffer)
+        self.assertTrue(numpy.array_equal(buffer, numpy.stack((v1x, v1y, v2x, v2y))))
+
+        with self.assertRaises(ValueError):
+            momentum_angle_free_c_soa(
+                v1x, v1y, v2x, v2y, m1, m2[:-1], x1x, x1y, x2x, x2y)
+        with self.assertRaises(ValueError):
+            momentum_angle_free_c_soa(
+                v1x, v1y, v2x, v2y, m1, m2, x1x, x1y, x2x, x2y,
+                out=numpy.empty((2, n), dtype=numpy.float32))
+
+
+class TestAllocationFree(unittest.TestCase):
+    """
+    Test the buffer (_into) and in place (_inplace) variants against the
+    functions returning a tuple of Vector2
+    """
+
+    # pylint: disable=too-many-locals
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        out = numpy.zeros(4, dtype=numpy.float32)
+        for invert in (False, True):
+            centre1, centre2 = Vector2(0.0, 0.0), Vector2(1.2, 0.9)
+            vector1, vector2 = Vector2(0.8, 0.3), Vector2(-0.5, -0.6)
+
+            momentum_trigonometry_into(
+                centre1, centre2, vector1, vector2, 2.0, 1.0, out, invert)
+            # the input vectors are not modified by the allocation free variants
+            self.assertEqual(vector1, Vector2(0.8, 0.3))
+            self.assertEqual(centre2, Vector2(1.2, 0.9))
+            r1, r2 = Vector2(), Vector2()
+            momentum_trigonometry_inplace(
+                centre1, centre2, vector1, vector2, 2.0, 1.0, r1, r2, invert)
+            v1, v2 = momentum_trigonometry(
+                Vector2(centre1), Vector2(centre2), Vector2(vector1), Vector2(vector2),
+                2.0, 1.0, invert)
+            self.assertTrue(numpy.allclose(out, (v1.x, v1.y, v2.x, v2.y), atol=1e-6))
+            self.assertTrue(numpy.allclose((r1.x, r1.y, r2.x, r2.y), out, atol=1e-6))
+
+            momentum_trigonometry_c_into(
+                vector1.x, vector1.y, 2.0, centre1.x, centre1.y,
+                vector2.x, vector2.y, 1.0, centre2.x, centre2.y, out, invert)
+            v1, v2 = momentum_trigonometry_c(
+                vector1.x, vector1.y, 2.0, centre1.x, centre1.y,
+                vector2.x, vector2.y, 1.0, centre2.x, centre2.y, invert)
+            self.assertTrue(numpy.allclose(out, (v1.x, v1.y, v2.x, v2.y), atol=1e-6))
+
+            momentum_angle_free_c_into(
+                vector1.x, vector1.y, vector2.x, vector2.y, 2.0, 1.0,
+                centre1.x, centre1.y, centre2.x, centre2.y, out, invert)
+            v1, v2 = momentum_angle_free_c(
+                vector1.x, vector1.y, vector2.x, vector2.y, 2.0, 1.0,
+                centre1.x, centre1.y, centre2.x, centre2.y, invert)
+            self.assertTrue(numpy.allclose(out, (v1.x, v1.y, v2.x, v2.y), atol=1e-6))
+
+            momentum_angle_free_into(
+                vector1, vector2, 2.0, 1.0, centre1, centre2, out, invert)
+            v1, v2 = momentum_angle_free(
+                Vector2(vector1), Vector2(vector2), 2.0, 1.0,
+                Vector2(centre1), Vector2(centre2), invert)
+            self.assertTrue(numpy.allclose(out, (v1.x, v1.y, v2.x, v2.y), atol=1e-6))
+            # update the objects velocities in place
+            momentum_angle_free_inplace(
+                vector1, vector2, 2.0, 1.0, centre1, centre2, vector1, vector2, invert)
+            self.assertTrue(numpy.allclose(
+                (vector1.x, vector1.y, vector2.x, vector2.y), out, atol=1e-6))
+
+        with self.assertRaises(ValueError):
+            momentum_angle_free_into(vector1, vector2, 2.0, 1.0, centre1, centre2,
+                                     numpy.zeros(2, dtype=numpy.float32))
+        with self.assertRaises(ValueError):
+            momentum_angle_free_c_into(0.0, 1.0, 0.0, -1.0, 1.0, 1.0, 0.0, 0.0, 0.0, 1.0,
+                                       numpy.zeros(4, dtype=numpy.int32))
+
+
+class TestCApi(unittest.TestCase):
+    """
+    Test the C API exported for other extensions (ec_game.pxd & PyCapsule table)
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        import os
+        import ElasticCollision
+        from ElasticCollision import ec_game
+
+        capi = ec_game.__pyx_capi__
+        for name in ('get_angle_free_vec', 'get_v1_angle_free_vec', 'get_v2_angle_free_vec',
+                     'get_momentum_trigonometry_vec', 'get_v1', 'get_v2',
+                     'get_contact_angle', 'get_theta_angle', 'vector_length',
+                     'get_momentum_projection_vec'):
+            self.assertIn(name, capi)
+        self.assertTrue(os.path.isfile(os.path.join(ElasticCollision.get_include(), 'vector.h')))
+
+
+class TestPairStatus(unittest.TestCase):
+    """
+    Test the invalid pairs (identical centres, null masses) and the objects at rest.
+    The kernels do not raise, the Python interface raises a ValueError and the batch
+    functions report the invalid pairs in the valid mask
+    """
+
+    # pylint: disable=too-many-locals
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        # Object 2 at rest, head-on collision with equal masses (velocities are swapped)
+        v1, v2 = momentum_angle_free(
+            Vector2(1.0, 0.0), Vector2(0.0, 0.0), 1.0, 1.0, Vector2(0.0, 0.0), Vector2(1.0, 0.0))
+        self.assertTrue(numpy.allclose((v1.x, v1.y, v2.x, v2.y), (0.0, 0.0, 1.0, 0.0), atol=1e-6))
+        v1, v2 = momentum_trigonometry(
+            Vector2(0.0, 0.0), Vector2(1.0, 0.0), Vector2(1.0, 0.0), Vector2(0.0, 0.0), 1.0, 1.0)
+        self.assertTrue(numpy.allclose((v1.x, v1.y, v2.x, v2.y), (0.0, 0.0, 1.0, 0.0), atol=1e-6))
+        # Both objects at rest
+        v1, v2 = momentum_angle_free(
+            Vector2(0.0, 0.0), Vector2(0.0, 0.0), 1.0, 1.0, Vector2(0.0, 0.0), Vector2(1.0, 0.0))
+        self.assertEqual((v1.x, v1.y, v2.x, v2.y), (0.0, 0.0, 0.0, 0.0))
+
+        # Identical centres & null masses
+        with self.assertRaises(ValueError):
+            momentum_angle_free(Vector2(1.0, 0.0), Vector2(-1.0, 0.0), 1.0, 1.0,
+                                Vector2(2.0, 2.0), Vector2(2.0, 2.0))
+        with self.assertRaises(ValueError):
+            momentum_trigonometry(Vector2(2.0, 2.0), Vector2(2.0, 2.0),
+                                  Vector2(1.0, 0.0), Vector2(-1.0, 0.0), 1.0, 1.0)
+        with self.assertRaises(ValueError):
+            momentum_angle_free(Vector2(1.0, 0.0), Vector2(-1.0, 0.0), 0.0, 0.0,
+                                Vector2(0.0, 0.0), Vector2(1.0, 0.0))
+        with self.assertRaises(ValueError):
+            momentum_angle_free_into(Vector2(1.0, 0.0), Vector2(-1.0, 0.0), 1.0, 1.0,
+                                     Vector2(2.0, 2.0), Vector2(2.0, 2.0),
+                                     numpy.zeros(4, dtype=numpy.float32))
+        with self.assertRaises(ValueError):
+            momentum_angle_free_c(1.0, 0.0, -1.0, 0.0, 1.0, 1.0, 2.0, 2.0, 2.0, 2.0)
+        with self.assertRaises(ValueError):
+            momentum_trigonometry_c(1.0, 0.0, 0.0, 0.0, 0.0, -1.0, 0.0, 0.0, 1.0, 0.0)
+
+        # Batch, pair 1 identical centres, pair 2 null masses
+        c1 = numpy.array([[0.0, 0.0], [5.0, 5.0], [0.0, 0.0]], dtype=numpy.float32)
+        c2 = numpy.array([[1.0, 0.0], [5.0, 5.0], [1.0, 0.0]], dtype=numpy.float32)
+        vec1 = numpy.array([[1.0, 0.0], [1.0, 2.0], [3.0, 0.0]], dtype=numpy.float32)
+        vec2 = numpy.array([[0.0, 0.0], [-1.0, 0.5], [-3.0, 0.0]], dtype=numpy.float32)
+        m1 = numpy.array([1.0, 1.0, 0.0], dtype=numpy.float32)
+        m2 = numpy.array([1.0, 1.0, 0.0], dtype=numpy.float32)
+        valid = numpy.full(3, 7, dtype=numpy.uint8)
+        r1, r2 = momentum_trigonometry_batch(c1, c2, vec1, vec2, m1, m2, valid=valid)
+        self.assertEqual(valid.tolist(), [1, 0, 0])
+        self.assertTrue(numpy.allclose(r1[0], (0.0, 0.0), atol=1e-6))
+        self.assertTrue(numpy.allclose(r2[0], (1.0, 0.0), atol=1e-6))
+        self.assertTrue(numpy.array_equal(r1[1:], vec1[1:]))
+        self.assertTrue(numpy.array_equal(r2[1:], vec2[1:]))
+        with self.assertRaises(ValueError):
+            momentum_trigonometry_batch(c1, c2, vec1, vec2, m1, m2,
+                                        valid=numpy.zeros(2, dtype=numpy.uint8))
+
+        # Structure of arrays, 9 pairs (SIMD loop and scalar tail)
+        n = 9
+        v1x, v1y = numpy.full(n, 1.0, numpy.float32), numpy.full(n, 0.5, numpy.float32)
+        v2x, v2y = numpy.full(n, -1.0, numpy.float32), numpy.zeros(n, numpy.float32)
+        ma, mb = numpy.ones(n, numpy.float32), numpy.ones(n, numpy.float32)
+        x1x, x1y = numpy.zeros(n, numpy.float32), numpy.zeros(n, numpy.float32)
+        x2x, x2y = numpy.ones(n, numpy.float32), numpy.zeros(n, numpy.float32)
+        x2x[2] = 0.0
+        ma[8] = mb[8] = 0.0
+        expected = [1] * n
+        expected[2] = expected[8] = 0
+        valid = numpy.zeros(n, dtype=numpy.uint8)
+        out = momentum_angle_free_c_soa(
+            v1x, v1y, v2x, v2y, ma, mb, x1x, x1y, x2x, x2y, valid=valid)
+        self.assertEqual(valid.tolist(), expected)
+        for i in (2, 8):
+            self.assertTrue(numpy.allclose(out[:, i], (1.0, 0.5, -1.0, 0.0)))
+        self.assertTrue(numpy.allclose(out[:, 0], (-1.0, 0.5, 1.0, 0.0), atol=1e-6))
+        valid[:] = 0
+        out = momentum_trigonometry_c_soa(
+            v1x, v1y, ma, x1x, x1y, v2x, v2y, mb, x2x, x2y, valid=valid)
+        self.assertEqual(valid.tolist(), expected)
+        for i in (2, 8):
+            self.assertTrue(numpy.allclose(out[:, i], (1.0, 0.5, -1.0, 0.0)))
+
+
+class TestBatchFloat64(unittest.TestCase):
+    """
+    Test the float64 specialisation of momentum_trigonometry_batch & resolve_pairs
+    (double precision, no conversion of the arrays)
+    """
+
+    # pylint: disable=too-many-locals
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(11)
+        n = 50
+        c1 = rng.uniform(0.0, 100.0, (n, 2))
+        c2 = c1 + rng.uniform(1.0, 5.0, (n, 2))
+        vec1 = rng.uniform(-4.0, 4.0, (n, 2))
+        vec2 = rng.uniform(-4.0, 4.0, (n, 2))
+        m1 = rng.uniform(0.5, 10.0, n)
+        m2 = rng.uniform(0.5, 10.0, n)
+
+        # Angle free reference in double precision (same result than the trigonometry)
+        dx = c1 - c2
+        k = numpy.sum((vec1 - vec2) * dx, axis=1) / numpy.sum(dx * dx, axis=1)
+        e1 = vec1 - (2.0 * m2 / (m1 + m2) * k)[:, None] * dx
+        e2 = vec2 + (2.0 * m1 / (m1 + m2) * k)[:, None] * dx
+
+        r1, r2 = momentum_trigonometry_batch(c1, c2, vec1, vec2, m1, m2)
+        self.assertEqual(r1.dtype, numpy.float64)
+        self.assertTrue(numpy.allclose(r1, e1, rtol=0.0, atol=1e-10))
+        self.assertTrue(numpy.allclose(r2, e2, rtol=0.0, atol=1e-10))
+
+        # float32 arrays keep the float32 kernels
+        f1, f2 = momentum_trigonometry_batch(
+            *(a.astype(numpy.float32) for a in (c1, c2, vec1, vec2, m1, m2)))
+        self.assertEqual(f1.dtype, numpy.float32)
+        self.assertTrue(numpy.allclose(f1, e1, atol=1e-3))
+
+        # Y-axis inverted, float64 result is the float32 result in double precision
+        r1, r2 = momentum_trigonometry_batch(c1, c2, vec1, vec2, m1, m2, invert=True)
+        f1, f2 = momentum_trigonometry_batch(
+            *(a.astype(numpy.float32) for a in (c1, c2, vec1, vec2, m1, m2)), invert=True)
+        self.assertTrue(numpy.allclose(r1, f1, atol=1e-3))
+        self.assertTrue(numpy.allclose(r2, f2, atol=1e-3))
+
+        # in place update of the float64 arrays
+        v1, v2 = vec1.copy(), vec2.copy()
+        momentum_trigonometry_batch(c1, c2, v1, v2, m1, m2, v1_out=v1, v2_out=v2)
+        self.assertTrue(numpy.allclose(v1, e1, rtol=0.0, atol=1e-10))
+
+        # arrays with different dtypes are not accepted
+        with self.assertRaises((TypeError, ValueError)):
+            momentum_trigonometry_batch(c1.astype(numpy.float32), c2, vec1, vec2, m1, m2)
+
+        # body table in double precision
+        pos = numpy.concatenate((c1, c2))
+        vel = numpy.concatenate((vec1, vec2))
+        mass = numpy.concatenate((m1, m2))
+        pairs = numpy.stack((numpy.arange(n), numpy.arange(n) + n), axis=1).astype(numpy.int32)
+        resolve_pairs(pos, vel, mass, pairs)
+        self.assertTrue(numpy.allclose(vel[:n], e1, rtol=0.0, atol=1e-10))
+        self.assertTrue(numpy.allclose(vel[n:], e2, rtol=0.0, atol=1e-10))
+
+
+class TestTrigFree(unittest.TestCase):
+    """
+    Test the trigonometric method evaluated with dot & cross products (set_trig_free)
+    against the trigonometric functions
+    """
+
+    # pylint: disable=too-many-locals
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(5)
+        n = 40
+        c1 = rng.uniform(0.0, 100.0, (n, 2)).astype(numpy.float32)
+        c2 = (c1 + rng.uniform(-5.0, 5.0, (n, 2))).astype(numpy.float32)
+        vec1 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        vec2 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        vec2[0] = 0.0      # object at rest
+        m1 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        m2 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        soa = (vec1[:, 0].copy(), vec1[:, 1].copy(), m1, c1[:, 0].copy(), c1[:, 1].copy(),
+               vec2[:, 0].copy(), vec2[:, 1].copy(), m2, c2[:, 0].copy(), c2[:, 1].copy())
+
+        def evaluate():
+            result = []
+            for invert in (False, True):
+                for i in range(n):
+                    v1, v2 = momentum_trigonometry(
+                        Vector2(*c1[i]), Vector2(*c2[i]), Vector2(*vec1[i]), Vector2(*vec2[i]),
+                        m1[i], m2[i], invert)
+                    result.append((v1.x, v1.y, v2.x, v2.y))
+                    v1, v2 = momentum_trigonometry_c(
+                        *(float(a[i]) for a in soa), invert)
+                    result.append((v1.x, v1.y, v2.x, v2.y))
+                r1, r2 = momentum_trigonometry_batch(c1, c2, vec1, vec2, m1, m2, invert)
+                result.extend(numpy.hstack((r1, r2)))
+                r1, r2 = momentum_trigonometry_batch(
+                    *(a.astype(numpy.float64) for a in (c1, c2, vec1, vec2, m1, m2)), invert)
+                result.extend(numpy.hstack((r1, r2)))
+                result.extend(momentum_trigonometry_c_soa(*soa, invert=invert).T)
+            return numpy.array(result, dtype=numpy.float64)
+
+        self.assertFalse(ec_game.get_trig_free())
+        self.assertFalse(c_game.get_trig_free())
+        expected = evaluate()
+        try:
+            ec_game.set_trig_free(True)
+            c_game.set_trig_free(True)
+            self.assertTrue(ec_game.get_trig_free())
+            self.assertTrue(c_game.get_trig_free())
+            result = evaluate()
+        finally:
+            ec_game.set_trig_free(False)
+            c_game.set_trig_free(False)
+        # float32 trigonometric functions are accurate to ~1e-4 (see README)
+        self.assertTrue(numpy.allclose(result, expected, rtol=0.0, atol=1e-3))
+        # dot & cross products in float32 are close to the double precision solution
+        # (rows 2n:3n float32 batch, rows 3n:4n float64 batch)
+        self.assertTrue(numpy.allclose(result[2 * n: 3 * n], result[3 * n: 4 * n],
+                                       rtol=0.0, atol=1e-5))
+
+
 def run_testsuite():
     """
     test suite
@@ -704,7 +1385,19 @@ def run_testsuite():
         TestGetContactAngle(),
         # C external function testing
         TestMomentumAngleFreeC(),
-        TestMomentumTrigonometryC()
+        TestMomentumTrigonometryC(),
+        TestMomentumTrigonometryBatch(),
+        TestResolvePairs(),
+        TestIntegrate(),
+        TestTimeOfImpact(),
+        TestSeparate(),
+        TestMomentumTrigonometryBatchParallel(),
+        TestMomentumCSoa(),
+        TestAllocationFree(),
+        TestCApi(),
+        TestPairStatus(),
+        TestBatchFloat64(),
+        TestTrigFree()
     ])
 
     unittest.TextTestRunner().run(suite)
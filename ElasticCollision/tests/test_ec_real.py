@@ -5,8 +5,14 @@ import sys
 import unittest
 import math
 
+import numpy
 from pygame.math import Vector2
-from ElasticCollision.ec_real import momentum_trigonometry_real, momentum_angle_free_real
+from ElasticCollision.ec_real import momentum_trigonometry_real, momentum_angle_free_real, \
+    momentum_angle_free_real_batch, set_num_threads, get_num_threads, \
+    set_parallel_threshold, get_parallel_threshold, momentum_trigonometry_real_into, \
+    momentum_trigonometry_real_inplace, momentum_angle_free_real_into, \
+    momentum_angle_free_real_inplace, EventDriven, solve_contacts
+from ElasticCollision import ec_real
 
 
 class TestMomentumTrigonometryReal(unittest.TestCase):
@@ -191,6 +197,407 @@ class TestAngleFreeReal(unittest.TestCase):
         self.assertTrue(round(v12.y, 3) == 0.707)
 
 
+class TestAngleFreeRealBatch(unittest.TestCase):
+    """
+    Test Momentum Angle free batch momentum_angle_free_real_batch
+    """
+
+    def runTest(self) -> None:
+        """
+        cpdef tuple momentum_angle_free_real_batch(
+        float [:, ::1] obj1_vector,
+        float [:, ::1] obj2_vector,
+        float [::1] obj1_mass,
+        float [::1] obj2_mass,
+        float [:, ::1] obj1_centre,
+        float [:, ::1] obj2_centre,
+        object v1_out = None,
+        object v2_out = None)
+        :return:  void
+        """
+        rng = numpy.random.default_rng(7)
+        n = 64
+        v1 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        v2 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        m1 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        m2 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        x1 = rng.uniform(0.0, 100.0, (n, 2)).astype(numpy.float32)
+        x2 = (x1 + rng.uniform(1.0, 5.0, (n, 2))).astype(numpy.float32)
+
+        r1, r2 = momentum_angle_free_real_batch(v1, v2, m1, m2, x1, x2)
+        self.assertIsInstance(r1, numpy.ndarray)
+        self.assertEqual(r1.shape, (n, 2))
+        self.assertEqual(r2.dtype, numpy.float32)
+
+        # Every row must match the scalar version
+        for i in range(n):
+            v11, v12 = momentum_angle_free_real(
+                Vector2(*v1[i]), Vector2(*v2[i]), float(m1[i]), float(m2[i]),
+                Vector2(*x1[i]), Vector2(*x2[i]))
+            self.assertAlmostEqual(r1[i, 0], v11.x, places=4)
+            self.assertAlmostEqual(r1[i, 1], v11.y, places=4)
+            self.assertAlmostEqual(r2[i, 0], v12.x, places=4)
+            self.assertAlmostEqual(r2[i, 1], v12.y, places=4)
+
+        # In place update of the velocities
+        v1_copy, v2_copy = v1.copy(), v2.copy()
+        out1, out2 = momentum_angle_free_real_batch(
+            v1_copy, v2_copy, m1, m2, x1, x2, v1_copy, v2_copy)
+        self.assertIs(out1, v1_copy)
+        self.assertIs(out2, v2_copy)
+        self.assertTrue(numpy.allclose(v1_copy, r1))
+        self.assertTrue(numpy.allclose(v2_copy, r2))
+
+        # Arrays with different length
+        self.assertRaises(ValueError, momentum_angle_free_real_batch,
+                          v1, v2[:-1], m1, m2, x1, x2)
+
+
+class TestAngleFreeRealBatchParallel(unittest.TestCase):
+    """
+    Test OpenMP version of momentum_angle_free_real_batch
+    """
+
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(3)
+        n = 5000
+        v1 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        v2 = rng.uniform(-4.0, 4.0, (n, 2)).astype(numpy.float32)
+        m1 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        m2 = rng.uniform(0.5, 10.0, n).astype(numpy.float32)
+        x1 = rng.uniform(0.0, 100.0, (n, 2)).astype(numpy.float32)
+        x2 = (x1 + rng.uniform(1.0, 5.0, (n, 2))).astype(numpy.float32)
+
+        threads, threshold = get_num_threads(), get_parallel_threshold()
+        try:
+            set_num_threads(1)
+            serial1, serial2 = momentum_angle_free_real_batch(v1, v2, m1, m2, x1, x2)
+
+            set_num_threads(4)
+            set_parallel_threshold(0)
+            self.assertEqual(get_num_threads(), 4)
+            self.assertEqual(get_parallel_threshold(), 0)
+            parallel1, parallel2 = momentum_angle_free_real_batch(v1, v2, m1, m2, x1, x2)
+        finally:
+            set_num_threads(threads)
+            set_parallel_threshold(threshold)
+
+        self.assertTrue(numpy.array_equal(serial1, parallel1))
+        self.assertTrue(numpy.array_equal(serial2, parallel2))
+
+        self.assertRaises(ValueError, set_num_threads, 0)
+        self.assertRaises(ValueError, set_parallel_threshold, -1)
+
+
+class TestAllocationFreeReal(unittest.TestCase):
+    """
+    Test the buffer (_into) and in place (_inplace) variants against the
+    functions returning a tuple of Vector2
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        centre1, centre2 = Vector2(0.0, 0.0), Vector2(1.2, 0.9)
+        vector1, vector2 = Vector2(0.8, 0.3), Vector2(-0.5, -0.6)
+        out = numpy.zeros(4, dtype=numpy.float32)
+
+        v1, v2 = momentum_trigonometry_real(centre1, centre2, vector1, vector2, 2.0, 1.0)
+        momentum_trigonometry_real_into(centre1, centre2, vector1, vector2, 2.0, 1.0, out)
+        self.assertTrue(numpy.allclose(out, (v1.x, v1.y, v2.x, v2.y), atol=1e-6))
+        r1, r2 = Vector2(), Vector2()
+        momentum_trigonometry_real_inplace(
+            centre1, centre2, vector1, vector2, 2.0, 1.0, r1, r2)
+        self.assertTrue(numpy.allclose((r1.x, r1.y, r2.x, r2.y), out, atol=1e-6))
+
+        v1, v2 = momentum_angle_free_real(vector1, vector2, 2.0, 1.0, centre1, centre2)
+        momentum_angle_free_real_into(vector1, vector2, 2.0, 1.0, centre1, centre2, out)
+        self.assertTrue(numpy.allclose(out, (v1.x, v1.y, v2.x, v2.y), atol=1e-6))
+        # update the objects velocities in place
+        momentum_angle_free_real_inplace(
+            vector1, vector2, 2.0, 1.0, centre1, centre2, vector1, vector2)
+        self.assertTrue(numpy.allclose(
+            (vector1.x, vector1.y, vector2.x, vector2.y), out, atol=1e-6))
+
+        with self.assertRaises(ValueError):
+            momentum_angle_free_real_into(vector1, vector2, 2.0, 1.0, centre1, centre2,
+                                          numpy.zeros(4, dtype=numpy.float64))
+        with self.assertRaises(ValueError):
+            momentum_angle_free_real_into(vector1, vector2, 2.0, 1.0, centre1, centre2,
+                                          numpy.zeros(3, dtype=numpy.float32))
+
+
+class TestCApiReal(unittest.TestCase):
+    """
+    Test the C API exported for other extensions (ec_real.pxd & PyCapsule table)
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        import os
+        import ElasticCollision
+        from ElasticCollision import ec_real
+
+        capi = ec_real.__pyx_capi__
+        for name in ('get_angle_free_vecR', 'get_v1_angle_free_vecR', 'get_v2_angle_free_vecR',
+                     'get_momentum_trigonometry_vecR', 'get_v1R', 'get_v2R',
+                     'get_contact_angle', 'get_theta_angle', 'vector_length',
+                     'get_momentum_projection_vecR'):
+            self.assertIn(name, capi)
+        self.assertTrue(os.path.isfile(os.path.join(ElasticCollision.get_include(), 'vector.h')))
+
+
+class TestPairStatusReal(unittest.TestCase):
+    """
+    Test the invalid pairs (identical centres, null masses) and the objects at rest
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        # Object 2 at rest, head-on collision with equal masses (velocities are swapped)
+        v1, v2 = momentum_angle_free_real(
+            Vector2(1.0, 0.0), Vector2(0.0, 0.0), 1.0, 1.0, Vector2(0.0, 0.0), Vector2(1.0, 0.0))
+        self.assertTrue(numpy.allclose((v1.x, v1.y, v2.x, v2.y), (0.0, 0.0, 1.0, 0.0), atol=1e-6))
+        v1, v2 = momentum_trigonometry_real(
+            Vector2(0.0, 0.0), Vector2(1.0, 0.0), Vector2(1.0, 0.0), Vector2(0.0, 0.0), 1.0, 1.0)
+        self.assertTrue(numpy.allclose((v1.x, v1.y, v2.x, v2.y), (0.0, 0.0, 1.0, 0.0), atol=1e-6))
+
+        with self.assertRaises(ValueError):
+            momentum_angle_free_real(Vector2(1.0, 0.0), Vector2(-1.0, 0.0), 1.0, 1.0,
+                                     Vector2(2.0, 2.0), Vector2(2.0, 2.0))
+        with self.assertRaises(ValueError):
+            momentum_trigonometry_real(Vector2(0.0, 0.0), Vector2(1.0, 0.0),
+                                       Vector2(1.0, 0.0), Vector2(-1.0, 0.0), 0.0, 0.0)
+
+        # Batch, pair 1 identical centres, pair 2 null masses
+        c1 = numpy.array([[0.0, 0.0], [5.0, 5.0], [0.0, 0.0]], dtype=numpy.float32)
+        c2 = numpy.array([[1.0, 0.0], [5.0, 5.0], [1.0, 0.0]], dtype=numpy.float32)
+        vec1 = numpy.array([[1.0, 0.0], [1.0, 2.0], [3.0, 0.0]], dtype=numpy.float32)
+        vec2 = numpy.array([[0.0, 0.0], [-1.0, 0.5], [-3.0, 0.0]], dtype=numpy.float32)
+        m1 = numpy.array([1.0, 1.0, 0.0], dtype=numpy.float32)
+        m2 = numpy.array([1.0, 1.0, 0.0], dtype=numpy.float32)
+        valid = numpy.full(3, 7, dtype=numpy.uint8)
+        r1, r2 = momentum_angle_free_real_batch(vec1, vec2, m1, m2, c1, c2, valid=valid)
+        self.assertEqual(valid.tolist(), [1, 0, 0])
+        self.assertTrue(numpy.allclose(r1[0], (0.0, 0.0), atol=1e-6))
+        self.assertTrue(numpy.allclose(r2[0], (1.0, 0.0), atol=1e-6))
+        self.assertTrue(numpy.array_equal(r1[1:], vec1[1:]))
+        self.assertTrue(numpy.array_equal(r2[1:], vec2[1:]))
+
+
+class TestAngleFreeRealBatchFloat64(unittest.TestCase):
+    """
+    Test the float64 specialisation of momentum_angle_free_real_batch
+    (double precision, no conversion of the arrays)
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(13)
+        n = 50
+        c1 = rng.uniform(0.0, 100.0, (n, 2))
+        c2 = c1 + rng.uniform(1.0, 5.0, (n, 2))
+        vec1 = rng.uniform(-4.0, 4.0, (n, 2))
+        vec2 = rng.uniform(-4.0, 4.0, (n, 2))
+        m1 = rng.uniform(0.5, 10.0, n)
+        m2 = rng.uniform(0.5, 10.0, n)
+
+        dx = c1 - c2
+        k = numpy.sum((vec1 - vec2) * dx, axis=1) / numpy.sum(dx * dx, axis=1)
+        e1 = vec1 - (2.0 * m2 / (m1 + m2) * k)[:, None] * dx
+        e2 = vec2 + (2.0 * m1 / (m1 + m2) * k)[:, None] * dx
+
+        valid = numpy.zeros(n, dtype=numpy.uint8)
+        r1, r2 = momentum_angle_free_real_batch(vec1, vec2, m1, m2, c1, c2, valid=valid)
+        self.assertEqual(r1.dtype, numpy.float64)
+        self.assertTrue(valid.all())
+        self.assertTrue(numpy.allclose(r1, e1, rtol=0.0, atol=1e-12))
+        self.assertTrue(numpy.allclose(r2, e2, rtol=0.0, atol=1e-12))
+
+        f1, _ = momentum_angle_free_real_batch(
+            *(a.astype(numpy.float32) for a in (vec1, vec2, m1, m2, c1, c2)))
+        self.assertEqual(f1.dtype, numpy.float32)
+        self.assertTrue(numpy.allclose(f1, e1, atol=1e-3))
+
+        with self.assertRaises((TypeError, ValueError)):
+            momentum_angle_free_real_batch(vec1.astype(numpy.float32), vec2, m1, m2, c1, c2)
+
+
+class TestTrigFreeReal(unittest.TestCase):
+    """
+    Test the trigonometric method evaluated with dot & cross products (set_trig_free)
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        rng = numpy.random.default_rng(17)
+        pairs = [(Vector2(*rng.uniform(0.0, 100.0, 2)), Vector2(*rng.uniform(-4.0, 4.0, 2)),
+                  Vector2(*rng.uniform(-4.0, 4.0, 2)), *rng.uniform(0.5, 10.0, 2))
+                 for _ in range(40)]
+        pairs.append((Vector2(10.0, 10.0), Vector2(0.0, 0.0), Vector2(1.0, -1.0), 1.0, 3.0))
+
+        def evaluate():
+            result = []
+            out = numpy.zeros(4, dtype=numpy.float32)
+            for centre1, offset, vector1, mass1, mass2 in pairs:
+                centre2 = centre1 + offset + Vector2(0.1, 0.0)
+                vector2 = -vector1 * 0.5
+                v1, v2 = momentum_trigonometry_real(
+                    centre1, centre2, vector1, vector2, mass1, mass2)
+                momentum_trigonometry_real_into(
+                    centre1, centre2, vector1, vector2, mass1, mass2, out)
+                result.append((v1.x, v1.y, v2.x, v2.y, *out))
+            return numpy.array(result)
+
+        self.assertFalse(ec_real.get_trig_free())
+        expected = evaluate()
+        try:
+            ec_real.set_trig_free(True)
+            self.assertTrue(ec_real.get_trig_free())
+            result = evaluate()
+        finally:
+            ec_real.set_trig_free(False)
+        self.assertTrue(numpy.allclose(result, expected, rtol=1e-4, atol=1e-4))
+
+
+class TestEventDriven(unittest.TestCase):
+    """
+    Test the event driven simulation EventDriven (priority queue)
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        # Head-on collision of two equal discs at t = 35 (contact distance 10)
+        gas = EventDriven([[10.0, 50.0], [90.0, 50.0]], [[1.0, 0.0], [-1.0, 0.0]],
+                          [1.0, 1.0], [5.0, 5.0], (0.0, 0.0), (100.0, 100.0))
+        self.assertEqual(len(gas), 2)
+        self.assertEqual(gas.advance(34.0), 0)
+        self.assertTrue(numpy.allclose(gas.pos, [[44.0, 50.0], [56.0, 50.0]]))
+        self.assertEqual(gas.advance(2.0), 1)
+        self.assertAlmostEqual(gas.time, 36.0)
+        self.assertTrue(numpy.allclose(gas.vel, [[-1.0, 0.0], [1.0, 0.0]]))
+        self.assertTrue(numpy.allclose(gas.pos, [[44.0, 50.0], [56.0, 50.0]]))
+
+        # Wall reflection (disc radius 5, wall at x = 100)
+        gas = EventDriven([[90.0, 50.0]], [[2.0, 0.0]], [1.0], [5.0], (0.0, 0.0), (100.0, 100.0))
+        gas.advance(5.0)
+        self.assertTrue(numpy.allclose(gas.pos, [[90.0, 50.0]]))
+        self.assertTrue(numpy.allclose(gas.vel, [[-2.0, 0.0]]))
+
+        # Dilute gas, energy conserved, no overlap & discs inside the domain
+        rng = numpy.random.default_rng(23)
+        side, length = 20, 400.0
+        grid = (numpy.arange(side * side) + 0.0)
+        pos = numpy.c_[(grid % side + 0.5) * length / side, (grid // side + 0.5) * length / side]
+        vel = rng.normal(0.0, 2.0, (side * side, 2))
+        mass = rng.uniform(1.0, 3.0, side * side)
+        radius = rng.uniform(2.0, 8.0, side * side)
+        gas = EventDriven(pos, vel, mass, radius, (0.0, 0.0), (length, length))
+        energy = gas.energy()
+        collisions = 0
+        for _ in range(100):
+            collisions += gas.advance(1.0)
+        self.assertGreater(collisions, 0)
+        self.assertAlmostEqual(gas.energy() / energy, 1.0, places=9)
+        centre = gas.pos
+        distance = numpy.hypot(*(centre[:, None] - centre[None]).transpose(2, 0, 1))
+        overlap = numpy.triu(distance < radius[:, None] + radius[None] - 1e-6, 1)
+        self.assertFalse(overlap.any())
+        self.assertTrue(((centre - radius[:, None] > -1e-6) &
+                         (centre + radius[:, None] < length + 1e-6)).all())
+
+        self.assertRaises(ValueError, EventDriven, [[1.0, 50.0]], [[0.0, 0.0]], [1.0], [5.0],
+                          (0.0, 0.0), (100.0, 100.0))
+        self.assertRaises(ValueError, gas.advance, -1.0)
+
+
+class TestSolveContacts(unittest.TestCase):
+    """
+    Test the sequential impulse contact solver solve_contacts
+    """
+    def runTest(self) -> None:
+        """
+
+        :return:  void
+        """
+        # Single contact, same result than momentum_angle_free_real
+        rng = numpy.random.default_rng(31)
+        for _ in range(20):
+            m1, m2 = rng.uniform(0.5, 5.0, 2)
+            angle = rng.uniform(0.0, 2.0 * math.pi)
+            pos = numpy.array([[0.0, 0.0], [10.0 * math.cos(angle), 10.0 * math.sin(angle)]])
+            vel = rng.uniform(-4.0, 4.0, (2, 2))
+            v1, v2 = momentum_angle_free_real(
+                Vector2(*vel[0]), Vector2(*vel[1]), m1, m2, Vector2(*pos[0]), Vector2(*pos[1]))
+            approaching = numpy.dot(vel[1] - vel[0], pos[1] - pos[0]) < 0.0
+            expected = numpy.array([[v1.x, v1.y], [v2.x, v2.y]]) if approaching else vel.copy()
+            solve_contacts(pos, vel, numpy.array([m1, m2]), numpy.array([5.0, 5.0]),
+                           numpy.array([[0, 1]], dtype=numpy.int32))
+            self.assertTrue(numpy.allclose(vel, expected, atol=1e-4))
+
+        # Three equal discs in a row, the first one hits the two others at rest: the
+        # contacts are solved together (momentum & kinetic energy conserved)
+        pos = numpy.array([[0.0, 0.0], [10.0, 0.0], [20.0, 0.0]])
+        vel = numpy.array([[1.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+        mass = numpy.ones(3)
+        radius = numpy.full(3, 5.0)
+        pairs = numpy.array([[0, 1], [1, 2]], dtype=numpy.int32)
+        passes = solve_contacts(pos, vel, mass, radius, pairs, iterations=100, tolerance=1e-9)
+        self.assertLess(passes, 100)
+        self.assertTrue(numpy.allclose(vel, [[-1.0 / 3.0, 0.0], [2.0 / 3.0, 0.0],
+                                             [2.0 / 3.0, 0.0]], atol=1e-6))
+        # Same result whatever the order of the pairs
+        vel2 = numpy.array([[1.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+        solve_contacts(pos, vel2, mass, radius, pairs[::-1].copy(), iterations=100,
+                       tolerance=1e-9)
+        self.assertTrue(numpy.allclose(vel, vel2, atol=1e-6))
+
+        # Dense cluster, momentum & energy conserved, no contact left approaching
+        side = 6
+        grid = numpy.arange(side * side)
+        pos = numpy.c_[grid % side * 10.0, grid // side * 10.0].astype(numpy.float64)
+        vel = rng.uniform(-2.0, 2.0, (side * side, 2))
+        mass = rng.uniform(1.0, 3.0, side * side)
+        radius = numpy.full(side * side, 5.0)
+        pairs = numpy.array([(i, j) for i in range(side * side) for j in range(i + 1, side * side)
+                             if numpy.hypot(*(pos[i] - pos[j])) <= 10.0], dtype=numpy.int32)
+        momentum = (mass[:, None] * vel).sum(axis=0)
+        energy = (mass * (vel * vel).sum(axis=1)).sum()
+        solve_contacts(pos, vel, mass, radius, pairs, iterations=200, tolerance=1e-10)
+        self.assertTrue(numpy.allclose((mass[:, None] * vel).sum(axis=0), momentum))
+        self.assertLessEqual((mass * (vel * vel).sum(axis=1)).sum(), energy * (1.0 + 1e-9))
+        normal = pos[pairs[:, 1]] - pos[pairs[:, 0]]
+        vn = ((vel[pairs[:, 1]] - vel[pairs[:, 0]]) * normal).sum(axis=1)
+        self.assertGreater(vn.min(), -1e-6)
+
+        # Discs apart, no active contact
+        vel = numpy.array([[1.0, 0.0], [-1.0, 0.0]], dtype=numpy.float32)
+        self.assertEqual(solve_contacts(
+            numpy.array([[0.0, 0.0], [20.0, 0.0]], dtype=numpy.float32), vel,
+            numpy.ones(2, dtype=numpy.float32), numpy.full(2, 5.0, dtype=numpy.float32),
+            numpy.array([[0, 1]], dtype=numpy.int32)), 0)
+        self.assertTrue(numpy.allclose(vel, [[1.0, 0.0], [-1.0, 0.0]]))
+
+        self.assertRaises(ValueError, solve_contacts, pos, vel, mass, radius, pairs)
+        self.assertRaises(ValueError, solve_contacts, pos, pos.copy(), mass, radius, pairs,
+                          10, 1e-4, 1.5)
+
+
 def run_testsuite():
     """
     test suite
@@ -203,6 +610,15 @@ def run_testsuite():
     suite.addTests([
         TestMomentumTrigonometryReal(),
         TestAngleFreeReal(),
+        TestAngleFreeRealBatch(),
+        TestAngleFreeRealBatchParallel(),
+        TestAllocationFreeReal(),
+        TestCApiReal(),
+        TestPairStatusReal(),
+        TestAngleFreeRealBatchFloat64(),
+        TestTrigFreeReal(),
+        TestEventDriven(),
+        TestSolveContacts(),
     ])
 
     unittest.TextTestRunner().run(suite)
@@ -28,14 +28,22 @@ setuptools.setup(
     url="https://github.com/yoyoberenguer/ElasticCollision",
     # packages=setuptools.find_packages(),
     packages=['ElasticCollision'],
+    package_data={'ElasticCollision': ['*.pxd', 'Source/*.h', 'Source/*.c']},
     ext_modules=cythonize([
         Extension("ElasticCollision.ec_game", ["ElasticCollision/game/ec_game.pyx"],
                   extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"],
+                  include_dirs=["ElasticCollision/Source"],
                   language="c"),
         Extension("ElasticCollision.c_game", ["ElasticCollision/game/c_game.pyx"],
                   extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"],
+                  include_dirs=["ElasticCollision/Source"],
                   language="c"),
         Extension("ElasticCollision.ec_real", ["ElasticCollision/real/ec_real.pyx"],
+                  extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"],
+                  include_dirs=["ElasticCollision/Source"],
+                  language="c"),
+        Extension("ElasticCollision.ec_broadphase",
+                  ["ElasticCollision/broadphase/ec_broadphase.pyx"],
                   extra_compile_args=["/openmp", "/Qpar", "/fp:fast", "/O2", "/Oy", "/Ot"],
                   language="c")]),
     include_dirs=[numpy.get_include()],
@@ -73,7 +81,7 @@ setuptools.setup(
 
     install_requires=[
         'setuptools>=49.2.1',
-        'Cython>=0.28',
+        'Cython>=0.29.31',
         'numpy>=1.18',
         'pygame>=2.0'
     ],
@@ -87,7 +95,9 @@ setuptools.setup(
           'pyproject.toml',
           'README.md',
           'requirements.txt',
-          'simulation.py'
+          'simulation.py',
+          'ElasticCollision/ec_game.pxd',
+          'ElasticCollision/ec_real.pxd'
           ]),
 
         ('./lib/site-packages/ElasticCollision/game',
@@ -105,6 +115,13 @@ setuptools.setup(
              'ElasticCollision/real/setup_ec_real.py'
          ]
          ),
+        ('./lib/site-packages/ElasticCollision/broadphase',
+         [
+             'ElasticCollision/broadphase/__init__.py',
+             'ElasticCollision/broadphase/ec_broadphase.pyx',
+             'ElasticCollision/broadphase/setup_ec_broadphase.py'
+         ]
+         ),
 
         ('./lib/site-packages/ElasticCollision/Assets',
          [
@@ -123,6 +140,7 @@ setuptools.setup(
          [
             'ElasticCollision/tests/test_ec_game.py',
             'ElasticCollision/tests/test_ec_real.py',
+            'ElasticCollision/tests/test_ec_broadphase.py',
             'ElasticCollision/tests/__init__.py',
 
          ]),
@@ -131,6 +149,7 @@ setuptools.setup(
          [
              'ElasticCollision/Source/elastic_collision.c',
              'ElasticCollision/Source/vector.c',
+             'ElasticCollision/Source/vector.h',
 
 
          ])
@@ -28,9 +28,11 @@ from math import hypot, sqrt
 from random import uniform, randint
 import time
 import threading
+import numpy
 import pygame
-from pygame.math import Vector2
-from ec_game import momentum_trigonometry
+from ElasticCollision.ec_broadphase import SpatialHash, LooseQuadtree, morton_order, ContactCache
+from ElasticCollision.ec_game import integrate, time_of_impact, separate, resolve_impacts
+from ElasticCollision.ec_real import solve_contacts
 
 
 # Screen size
@@ -421,6 +423,17 @@ class Vertex():
             # go in the opposite direction
             self.momentum[1] *= -1
 
+    def place(self, x: float, y: float) -> None:
+        """
+        Set the coordinates without the wall test (positions already bounded by integrate)
+
+        :param x:
+        :param y:
+        :return:
+        """
+        self.__x = x
+        self.__y = y
+
     def __add__(self, point: object) -> object:
         """
 
@@ -864,7 +877,16 @@ class Collision:
     """ Class 2D Engine collision detection """
 
     # Constructor
-    def __init__(self):
+    # broadphase: object with a method pairs(centre, radius) returning the index pairs
+    # of overlapping objects, SpatialHash (default), SweepAndPrune (frame coherence),
+    # LooseQuadtree (objects of mixed sizes), DynamicAABBTree (long-lived objects,
+    # e.g Collision(DynamicAABBTree(margin=4.0))) or VerletList (neighbour lists re-used
+    # until an object moves by more than skin / 2, e.g Collision(VerletList(skin=2 * LIMIT_HIGH)))
+    # or HierarchicalGrid (obstacles, balls and debris, one cell size per object size)
+    # or StripBroadphase (multi-threaded, e.g Collision(StripBroadphase(LOWER, UPPER)))
+    # reorder: sort self.objects along the Morton curve every <reorder> frames (0 never),
+    # objects close on screen are then close in memory (large number of objects)
+    def __init__(self, broadphase: object = None, reorder: int = 0):
 
         # 2D Engine collision identification
         self.collision_item_id = id(self)
@@ -875,6 +897,19 @@ class Collision:
         # my_list returning colliding objects
         self.colliding_objects = []
 
+        # Broadphase returning the pairs of colliding objects (indices into self.objects)
+        self.broadphase = SpatialHash() if broadphase is None else broadphase
+
+        # Morton order period (frames) and frame counter
+        self.reorder = reorder
+        self.frame = 0
+
+        # Contacts of the previous frame keyed by id(object) pairs, contact_begin lists the
+        # pairs of objects touching since this frame and self.contacts.ended the id() pairs
+        # of the objects no longer touching (effects triggered once per contact)
+        self.contacts = ContactCache()
+        self.contact_begin = []
+
         print('Collision object engine id : %s initialized' % self.collision_item_id)
 
     def add_object(self, object_: object) -> None:
@@ -913,22 +948,28 @@ class Collision:
             color_.pop(n)
 
     @staticmethod
-    def un_stick(rect1: Rectangle, rect2: Rectangle, v1: Vector2, v2: Vector2) -> None:
-        """ Class method to un-stick objects after collision """
-
-        diff = Rectangle.center_distance(rect1, rect2)
-        while Rectangle.intersection(rect1, rect2):
-            rect1.p1.x += v1.x
-            rect1.p1.y += v1.y
-            rect2.p1.x += v2.x
-            rect2.p1.y += v2.y
-            # Check the distance after applying opposite force
-            diff_ = Rectangle.center_distance(rect1, rect2)
-            # If the distance diff_ is smaller than the original distance diff
-            # then something is going wrong; breaking the loop to avoid infinity loop
-            if diff_ < diff:
-                # print(v1, v2)
-                break
+    def integrate(objects: list) -> None:
+        """
+        Move every objects by one frame in a single call (friction, velocity clamp
+        LIMIT_LOW / LIMIT_HIGH and wall reflection using the object radius)
+
+        :param objects:
+        :return:
+        """
+        centre = numpy.empty((len(objects), 2), dtype=numpy.float32)
+        vel = numpy.empty((len(objects), 2), dtype=numpy.float32)
+        radius = numpy.empty(len(objects), dtype=numpy.float32)
+        for i, rect in enumerate(objects):
+            centre[i] = rect.center()
+            vel[i] = (rect.p1.momentum.vx, rect.p1.momentum.vy)
+            radius[i] = rect.p2.x / 2.0
+
+        integrate(centre, vel, radius, LOWER, UPPER, FRICTION, LIMIT_LOW, LIMIT_HIGH)
+
+        for rect, (x, y), (vx, vy) in zip(objects, centre.tolist(), vel.tolist()):
+            rect.p1.place(x - rect.p2.x / 2.0, y - rect.p2.y / 2.0)
+            rect.p1.momentum.vx = vx
+            rect.p1.momentum.vy = vy
 
     @staticmethod
     def explode(obj1: Rectangle) -> None:
@@ -995,83 +1036,95 @@ class Collision:
         :return:
         """
 
-        ind = 0
-
-        for rect1 in engine_.objects:
-            ind += 1
-
-            for rect2 in engine_.objects[ind:]:
-
-                # objects are colliding
-                if Rectangle.intersection(rect1, rect2):
-
-                    v1 = Vector2(rect1.p1.momentum[0], rect1.p1.momentum[1])
-                    v2 = Vector2(rect2.p1.momentum[0], rect2.p1.momentum[1])
-                    x1 = Vector2(rect1.center())
-                    x2 = Vector2(rect2.center())
-                    m1 = rect1.mass
-                    m2 = rect2.mass
-                    v11_angle_free, v12_angle_free = momentum_trigonometry(
-                        x1, x2, v1, v2, float(m1), float(m2), invert=False)
-
-                    # v1 = Vector2(rect1.p1.momentum[0], rect1.p1.momentum[1])
-                    # v2 = Vector2(rect2.p1.momentum[0], rect2.p1.momentum[1])
-                    # x1 = Vector2(rect1.center())
-                    # x2 = Vector2(rect2.center())
-                    # m1 = rect1.mass
-                    # m2 = rect2.mass
-                    # v11_trigonometry, v12_trigonometry = momentum_trigonometry_c(
-                    #     v1.x, v1.y, m1, x1.x, x1.y, v2.x, v2.y, m2, x2.x, x2.y, invert=False)
-
-                    # v1 = pygame.math.Vector2(rect1.p1.momentum[0], rect1.p1.momentum[1])
-                    # v2 = pygame.math.Vector2(rect2.p1.momentum[0], rect2.p1.momentum[1])
-                    # x1 = pygame.math.Vector2(rect1.center())
-                    # x2 = pygame.math.Vector2(rect2.center())
-                    # m1 = rect1.mass
-                    # m2 = rect2.mass
-                    # v11_angle_free, v12_angle_free = momentum_angle_free(
-                    #     v1, v2, m1, m2, x1, x2, invert=True)
-                    #
-                    # v1 = Vector2(rect1.p1.momentum[0], rect1.p1.momentum[1])
-                    # v2 = Vector2(rect2.p1.momentum[0], rect2.p1.momentum[1])
-                    # x1 = Vector2(rect1.center())
-                    # x2 = Vector2(rect2.center())
-                    # m1, m2 = rect1.mass, rect2.mass
-                    #
-                    # v11_trigonometry, v12_trigonometry = momentum_angle_free_c(
-                    #     v1.x, v1.y, v2.x, v2.y, m1, m2, x1.x, x1.y, x2.x, x2.y, invert=True)
-
-                    # p = 1e-5
-                    # diff1 = v11_angle_free.x - v11_trigonometry.x
-                    # diff2 = v11_angle_free.y - v11_trigonometry.y
-                    # diff3 = v12_angle_free.x - v12_trigonometry.x
-                    # diff4 = v12_angle_free.y - v12_trigonometry.y
-                    # assert diff1 < p, "diff1 %s %s %s" \
-                    #                   % (v11_angle_free.x, v11_trigonometry.x, diff1)
-                    # assert diff2 < p, "diff2 %s %s %s" \
-                    #                   % (v11_angle_free.y, v11_trigonometry.y, diff2)
-                    # assert diff3 < p, "diff3 %s %s %s" \
-                    #                   % (v12_angle_free.x, v12_trigonometry.x, diff3)
-                    # assert diff3 < p, "diff4 %s %s %s" \
-                    #                   % (v12_angle_free.y, v12_trigonometry.y, diff4)
-
-                    # Add components x,y to the vertex momentum
-                    rect1.p1.momentum[0] = v11_angle_free.x
-                    rect1.p1.momentum[1] = v11_angle_free.y
-                    rect2.p1.momentum[0] = v12_angle_free.x
-                    rect2.p1.momentum[1] = v12_angle_free.y
-
-                    # rect1.p1.x += v11_angle_free.x
-                    # rect1.p1.y += v11_angle_free.y
-                    # rect2.p1.x += v12_angle_free.x
-                    # rect2.p1.y += v12_angle_free.y
-
-                    # still colliding?
-                    if Rectangle.center_distance(rect1, rect2) <= rect1.p1.x + rect2.p2.x:
-                        Collision.un_stick(rect1, rect2, v11_angle_free, v12_angle_free)
-
-                    # Deformation(rect1).start()
-                    # Deformation(rect2).start()
+        objects = engine_.objects
+
+        # Objects centre, vector, radius and mass for the broadphase (cell size = largest
+        # diameter)
+        centre = numpy.empty((len(objects), 2), dtype=numpy.float32)
+        vel = numpy.empty((len(objects), 2), dtype=numpy.float32)
+        radius = numpy.empty(len(objects), dtype=numpy.float32)
+        mass = numpy.empty(len(objects), dtype=numpy.float32)
+        for i, rect in enumerate(objects):
+            centre[i] = rect.center()
+            vel[i] = (rect.p1.momentum.vx, rect.p1.momentum.vy)
+            radius[i] = rect.p2.x / 2.0
+            mass[i] = rect.mass
+
+        # Objects re-ordered along the Morton curve, the broadphase follows the new order
+        # (objects added or removed since the last frame are re-synchronised by pairs())
+        engine_.frame += 1
+        if engine_.reorder > 0 and engine_.frame % engine_.reorder == 0:
+            order = morton_order(centre)
+            objects[:] = [objects[k] for k in order.tolist()]
+            centre = centre[order]
+            vel = vel[order]
+            radius = radius[order]
+            mass = mass[order]
+            if len(engine_.broadphase) == len(objects):
+                engine_.broadphase.remap(order)
+
+        # Swept circles (objects moving during the next frame), fast objects cannot pass
+        # through each other between two frames
+        sweep = numpy.hypot(vel[:, 0], vel[:, 1]) * 0.5
+        pairs = engine_.broadphase.pairs(centre + vel * 0.5, radius + sweep)
+
+        # Overlapping objects pushed apart by inverse mass (bounded number of passes,
+        # replaces the un_stick loop), only the corrected objects are moved
+        corrected = centre.copy()
+        separate(corrected, mass, radius, pairs)
+        for i in numpy.flatnonzero((corrected != centre).any(axis=1)).tolist():
+            rect = objects[i]
+            rect.p1.place(float(corrected[i, 0]) - rect.p2.x / 2.0,
+                          float(corrected[i, 1]) - rect.p2.y / 2.0)
+        centre = corrected
+
+        # Objects touching at the start of the frame (clusters) solved together, the
+        # result does not depend on the order of the pairs
+        solved = vel.copy()
+        solve_contacts(centre, solved, mass, radius, pairs)
+        for i in numpy.flatnonzero((solved != vel).any(axis=1)).tolist():
+            objects[i].p1.momentum.vx = float(solved[i, 0])
+            objects[i].p1.momentum.vy = float(solved[i, 1])
+        vel = solved
+
+        # Time of impact during the frame (numpy.inf when the objects do not touch or move
+        # apart), the pairs touching now or during the frame are the contacts
+        toi = time_of_impact(centre, vel, radius, pairs)
+        dx = centre[pairs[:, 1]] - centre[pairs[:, 0]]
+        touching = numpy.isfinite(toi) | \
+            ((dx * dx).sum(axis=1) <= (radius[pairs[:, 0]] + radius[pairs[:, 1]]) ** 2)
+        pairs = pairs[touching]
+
+        handles = numpy.fromiter((id(rect) for rect in objects), dtype=numpy.int64, count=len(objects))
+        state = engine_.contacts.update(pairs, handles)
+        engine_.contact_begin = []
+
+        # Contacts that began this frame (sounds and effects triggered once)
+        for k in numpy.flatnonzero(state == ContactCache.BEGIN).tolist():
+            i, j = pairs[k].tolist()
+            engine_.contact_begin.append((objects[i], objects[j]))
+
+        # Impacts solved in time order at their contact position (angle free), the time of
+        # impact is computed again after each bounce (a pair already moving apart is not
+        # solved) and the objects are moved back along their new vectors: after the
+        # integration of the frame they are at the position reached bouncing at time t.
+        # No un_stick loop, the remaining overlaps are corrected by separate on the next
+        # frame
+        resolved_centre = centre.copy()
+        resolved_vel = vel.copy()
+        resolve_impacts(resolved_centre, resolved_vel, mass, radius, pairs)
+        # Vectors clamped like the momentum setters, the centres follow (same position at
+        # the end of the frame)
+        clamped = numpy.clip(resolved_vel, LIMIT_LOW, LIMIT_HIGH)
+        resolved_centre += resolved_vel - clamped
+        resolved_vel = clamped
+        for i in numpy.flatnonzero(((resolved_centre != centre) |
+                                    (resolved_vel != vel)).any(axis=1)).tolist():
+            rect = objects[i]
+            rect.p1.place(float(resolved_centre[i, 0]) - rect.p2.x / 2.0,
+                          float(resolved_centre[i, 1]) - rect.p2.y / 2.0)
+            rect.p1.momentum.vx = float(resolved_vel[i, 0])
+            rect.p1.momentum.vy = float(resolved_vel[i, 1])
 
 
 if __name__ == '__main__':
@@ -1111,8 +1164,9 @@ if __name__ == '__main__':
             ball.p1.momentum[0] = x_
             ball.p1.momentum[1] = y_
 
-        # Initialized 2D Engine collision detection
-        Engine = Collision()
+        # Initialized 2D Engine collision detection, the balls and the 4 pixels
+        # particles created by explode are stored at the quadtree depth matching their size
+        Engine = Collision(LooseQuadtree(LOWER[0], LOWER[1], max(SIZE)))
 
         # Add balls to the Engine
         for ball in BALL:
@@ -1199,9 +1253,7 @@ if __name__ == '__main__':
             pygame.draw.line(SCREEN, RED, list(POS1), list(POS2), 1)
 
         j = 1
-        for r in BALL:
-            r.p1.x += r.p1.momentum[0] * FRICTION
-            r.p1.y += r.p1.momentum[1] * FRICTION
+        Collision.integrate(BALL)
 
         j = 0
 